@@ -0,0 +1,170 @@
+"""Throughput and latency of the core data paths over a synthetic catalog.
+
+Loads a generated catalog into the in-memory Mongo and Redis stand-ins,
+then times ``store_rag_content``, ``search_products``,
+``get_product_recommendations`` and ``get_product_data``. Results are
+printed (or written with ``--output``) as JSON so runs on two commits can
+be diffed. Run with ``python benchmarks/bench_catalog.py --docs 100000``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+from catalog import (
+    generate_contexts,
+    generate_lookups,
+    generate_orders,
+    generate_products,
+    generate_queries,
+    product_record,
+    rag_document,
+)
+from contextawarerag import DataManager
+from contextawarerag.core.data.indexes import reconcile_indexes
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration
+from contextawarerag.utils.testing import InMemoryDatabase, InMemoryRedis
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _summary(latencies, wall):
+    ms = sorted(s * 1000 for s in latencies)
+    cuts = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    return {
+        "ops": len(ms),
+        "throughput_per_s": round(len(ms) / wall, 1) if wall else None,
+        "mean_ms": round(statistics.fmean(ms), 4),
+        "p50_ms": round(cuts[49], 4),
+        "p95_ms": round(cuts[94], 4),
+        "p99_ms": round(cuts[98], 4),
+        "max_ms": round(ms[-1], 4),
+    }
+
+
+async def _measure(call, args_list, concurrency):
+    """Run ``call`` over ``args_list`` from ``concurrency`` workers, timing each call"""
+    latencies = []
+    pending = iter(args_list)
+
+    async def worker():
+        for args in pending:
+            start = time.perf_counter()
+            await call(*args)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return _summary(latencies, time.perf_counter() - start)
+
+
+async def _setup(args, timings):
+    config = {
+        'cache': {'enabled': not args.no_cache},
+        'recommendations': {},
+    }
+    manager = DataManager(config)
+    manager.db = InMemoryDatabase()
+    manager.redis_client = manager.cache.redis = InMemoryRedis()
+    await reconcile_indexes(manager.db)
+
+    start = time.perf_counter()
+    product_ids = []
+    documents = []
+    for product in generate_products(args.docs, args.seed):
+        product_ids.append(product["id"])
+        documents.append(rag_document(product))
+        await manager.db.products.insert_one(product_record(product))
+    await manager.store_rag_content_many(documents, batch_size=1000)
+    for order in generate_orders(product_ids, args.orders, args.seed):
+        await manager.db.orders.insert_one(order)
+    timings["load_s"] = round(time.perf_counter() - start, 3)
+
+    chat = ChatRAGIntegration(config)
+    chat.rag_manager = manager
+    start = time.perf_counter()
+    await chat.build_search_index()
+    timings["search_index_s"] = round(time.perf_counter() - start, 3)
+    start = time.perf_counter()
+    await chat.build_recommender()
+    timings["recommender_s"] = round(time.perf_counter() - start, 3)
+    return chat, product_ids
+
+
+async def main(args):
+    timings = {}
+    chat, product_ids = await _setup(args, timings)
+    manager = chat.rag_manager
+    results = {}
+
+    results["get_product_data"] = await _measure(
+        manager.get_product_data,
+        [(product_id,) for product_id in generate_lookups(product_ids, args.ops, args.seed)],
+        args.concurrency
+    )
+    results["search_products"] = await _measure(
+        chat.search_products,
+        [(q["query"], q["category"]) for q in generate_queries(args.ops, args.seed)],
+        args.concurrency
+    )
+    results["get_product_recommendations"] = await _measure(
+        chat.get_product_recommendations,
+        [(context,) for context in generate_contexts(product_ids, args.ops, args.seed + 1)],
+        args.concurrency
+    )
+    # Writes last: each one invalidates cached reads for its category
+    new_documents = [rag_document(p) for p in generate_products(args.ops, args.seed, start=args.docs)]
+    results["store_rag_content"] = await _measure(
+        lambda doc: manager.store_rag_content(doc["content"], doc["content_type"],
+                                              doc["metadata"], document_id=doc["_id"]),
+        [(doc,) for doc in new_documents],
+        args.concurrency
+    )
+
+    report = {
+        "benchmark": "catalog",
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "docs": args.docs,
+            "orders": args.orders,
+            "ops": args.ops,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "cache": not args.no_cache,
+            **timings,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--orders", type=int, default=None, help="default: docs // 2")
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-cache", action="store_true", help="disable the result cache")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args()
+    if args.orders is None:
+        args.orders = args.docs // 2
+    asyncio.run(main(args))
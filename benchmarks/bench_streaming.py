@@ -0,0 +1,98 @@
+"""Time-to-first-byte of the buffered vs streaming chat response.
+
+Retrieval runs against an in-memory collection whose cursor adds a
+round-trip delay and a per-document delay, like a remote Mongo cursor
+returning batches. Run with ``python benchmarks/bench_streaming.py``.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from contextawarerag import DataManager
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration
+
+
+class LatencyCollection:
+    """Minimal async collection with simulated cursor latency"""
+
+    def __init__(self, docs, round_trip=0.005, per_doc=0.002):
+        self.docs = docs
+        self.round_trip = round_trip
+        self.per_doc = per_doc
+
+    def find(self, query=None, projection=None):
+        return self._iterate(query or {})
+
+    async def _iterate(self, query):
+        ids = set(query.get("_id", {}).get("$in", [])) if query else None
+        await asyncio.sleep(self.round_trip)
+        for doc in self.docs:
+            if ids and doc["_id"] not in ids:
+                continue
+            await asyncio.sleep(self.per_doc)
+            yield doc
+
+
+class LatencyDatabase:
+    def __init__(self, rag_content):
+        self.rag_content = rag_content
+
+
+async def _setup(n_docs, round_trip, per_doc):
+    docs = [
+        {"_id": i, "content": f"ageloc serum product {i} " + "hydrating " * (i % 7),
+         "metadata": {"category": "face", "product_id": f"P{i}", "price": "49.99"}}
+        for i in range(n_docs)
+    ]
+    manager = DataManager({'cache': {'enabled': False}})
+    manager.db = LatencyDatabase(LatencyCollection(docs, round_trip, per_doc))
+    chat = ChatRAGIntegration()
+    chat.rag_manager = manager
+    await chat.build_search_index()
+    return chat
+
+
+async def _buffered(chat, query):
+    start = time.perf_counter()
+    products = await chat.search_products(query)
+    chat.format_product_response(products)
+    return time.perf_counter() - start
+
+
+async def _streaming(chat, query, k):
+    start = time.perf_counter()
+    stream = chat.stream_product_response(chat.iter_search_products(query, k=k))
+    await stream.__anext__()
+    first_byte = time.perf_counter() - start
+    async for _ in stream:
+        pass
+    return first_byte
+
+
+def _summary(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {"p50_ms": round(statistics.median(ms), 3),
+            "p95_ms": round(ms[int(0.95 * (len(ms) - 1))], 3)}
+
+
+async def main(args):
+    chat = await _setup(args.docs, args.round_trip, args.per_doc)
+    buffered = [await _buffered(chat, "ageloc serum") for _ in range(args.runs)]
+    streaming = [await _streaming(chat, "ageloc serum", 5) for _ in range(args.runs)]
+    print(json.dumps({
+        "benchmark": "streaming_ttfb",
+        "docs": args.docs,
+        "buffered": _summary(buffered),
+        "streaming": _summary(streaming),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--round-trip", type=float, default=0.005)
+    parser.add_argument("--per-doc", type=float, default=0.002)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,146 @@
+"""Synthetic product catalog shaped like the scraper's output.
+
+Products carry the fields ``parse_product_html`` produces and are turned
+into ``rag_content`` documents the same way ``NuSkinScraper`` builds them.
+Everything is drawn from a seeded RNG, so a given size and seed always
+yields the same catalog. Popularity is Zipf-like: a few products and
+query terms account for most of the traffic.
+"""
+import itertools
+import random
+from typing import Any, Dict, Iterator, List, Sequence
+
+from contextawarerag.core.processing import stable_document_id
+
+BASE_URL = "https://www.nuskin.com/us/en/catalog"
+
+# Same categories the scraper crawls
+CATEGORIES = ("exfoliators", "hair_care", "anti-aging", "dark_circles_and_puffiness", "tru_face")
+
+LINES = ("ageLOC", "Nutricentials", "Epoch", "Tru Face", "Nu Colour", "Pharmanex", "180")
+
+FORMS = {
+    "exfoliators": ("Polish", "Scrub", "Peel", "Exfoliant", "Resurfacing Pads"),
+    "hair_care": ("Shampoo", "Conditioner", "Hair Mask", "Scalp Serum", "Leave-In Treatment"),
+    "anti-aging": ("Serum", "Night Cream", "Day Lotion", "Essence", "Transformation Kit"),
+    "dark_circles_and_puffiness": ("Eye Cream", "Eye Gel", "Eye Patches", "Eye Serum"),
+    "tru_face": ("Firming Serum", "Line Corrector", "Essence Ultra", "Instant Targeted Lift"),
+}
+
+BENEFITS = (
+    "hydrating", "brightening", "firming", "smoothing", "soothing", "nourishing", "clarifying",
+    "volumizing", "strengthening", "reduces fine lines", "reduces puffiness", "evens skin tone",
+    "boosts radiance", "refines pores", "restores elasticity", "protects against dryness",
+)
+
+INGREDIENTS = (
+    "hyaluronic acid", "niacinamide", "retinol", "vitamin C", "vitamin E", "peptides", "ceramides",
+    "caffeine", "glycolic acid", "salicylic acid", "aloe vera", "green tea extract", "squalane",
+    "jojoba oil", "argan oil", "shea butter", "panthenol", "allantoin", "bakuchiol", "zinc",
+)
+
+ADJECTIVES = ("gentle", "daily", "advanced", "intensive", "lightweight", "rich", "clinical", "overnight")
+
+
+def _zipf_weights(n: int, s: float = 1.1) -> List[float]:
+    return list(itertools.accumulate(1.0 / (rank ** s) for rank in range(1, n + 1)))
+
+
+def generate_products(n: int, seed: int = 0, start: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield ``n`` parsed products, numbered from ``start``"""
+    rng = random.Random(f"{seed}:{start}")
+    for i in range(start, start + n):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        line = rng.choice(LINES)
+        form = rng.choice(FORMS[category])
+        name = f"{line} {rng.choice(ADJECTIVES).title()} {form} {i}"
+        benefits = rng.sample(BENEFITS, rng.randint(2, 5))
+        ingredients = rng.sample(INGREDIENTS, rng.randint(3, 8))
+        product_id = f"{category[:3].upper()}{i:07d}"
+        yield {
+            "id": product_id,
+            "name": name,
+            "description": (
+                f"A {rng.choice(ADJECTIVES)} {form.lower()} from the {line} line that is "
+                f"{benefits[0]} and {benefits[-1]}, made with {ingredients[0]}."
+            ),
+            "benefits": benefits,
+            "ingredients": ", ".join(ingredients),
+            "category": category,
+            "price": round(rng.uniform(9, 400), 2),
+            "url": f"{BASE_URL}/{category}/{product_id.lower()}",
+        }
+
+
+def rag_document(product: Dict[str, Any]) -> Dict[str, Any]:
+    """The rag_content document ``NuSkinScraper.build_rag_document`` makes for a product"""
+    content = (
+        f"Product: {product['name']}\n"
+        f"Description: {product['description']}\n"
+        f"Benefits: {', '.join(product['benefits'])}\n"
+        f"Ingredients: {product['ingredients']}"
+    )
+    return {
+        "_id": stable_document_id(product["id"], product["url"]),
+        "content": content,
+        "content_type": "product",
+        "metadata": {
+            "product_id": product["id"],
+            "category": product["category"],
+            "price": product["price"],
+            "url": product["url"],
+        },
+    }
+
+
+def product_record(product: Dict[str, Any]) -> Dict[str, Any]:
+    """The ``products`` collection record served by ``get_product_data``"""
+    return {
+        "product_id": product["id"],
+        "name": product["name"],
+        "category": product["category"],
+        "price": product["price"],
+        "url": product["url"],
+    }
+
+
+def generate_orders(product_ids: Sequence[str], n: int, seed: int = 0,
+                    max_items: int = 6) -> Iterator[Dict[str, Any]]:
+    """Yield ``n`` orders whose items follow Zipf-like product popularity"""
+    rng = random.Random(f"orders:{seed}")
+    weights = _zipf_weights(len(product_ids))
+    for i in range(n):
+        items = rng.choices(product_ids, cum_weights=weights, k=rng.randint(1, max_items))
+        yield {"_id": f"order-{i}", "items": [{"product_id": p} for p in dict.fromkeys(items)]}
+
+
+def generate_lookups(product_ids: Sequence[str], n: int, seed: int = 0) -> Iterator[str]:
+    """Yield ``n`` product ids to look up, following product popularity"""
+    rng = random.Random(f"lookups:{seed}")
+    yield from rng.choices(product_ids, cum_weights=_zipf_weights(len(product_ids)), k=n)
+
+
+def generate_queries(n: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield ``n`` search queries, half of them scoped to a category"""
+    rng = random.Random(f"queries:{seed}")
+    terms = list(BENEFITS + INGREDIENTS + tuple(f.lower() for forms in FORMS.values() for f in forms))
+    rng.shuffle(terms)
+    weights = _zipf_weights(len(terms))
+    for _ in range(n):
+        words = rng.choices(terms, cum_weights=weights, k=rng.randint(1, 3))
+        yield {
+            "query": " ".join(words),
+            "category": rng.choice(CATEGORIES) if rng.random() < 0.5 else None,
+        }
+
+
+def generate_contexts(product_ids: Sequence[str], n: int, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Yield ``n`` recommendation contexts with interests and past purchases"""
+    rng = random.Random(f"contexts:{seed}")
+    weights = _zipf_weights(len(product_ids))
+    for _ in range(n):
+        yield {
+            "interests": rng.sample(CATEGORIES, rng.randint(0, 2)),
+            "previous_purchases": list(dict.fromkeys(
+                rng.choices(product_ids, cum_weights=weights, k=rng.randint(0, 3)))),
+        }
@@ -1,4 +1,13 @@
 """ContextAwareRAG package."""
-from contextawarerag.core.data.data_manager import DataManager
+from typing import TYPE_CHECKING
 
-__all__ = ['DataManager']
\ No newline at end of file
+from contextawarerag._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from contextawarerag.core.data.data_manager import DataManager
+
+__all__ = ['DataManager']
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'DataManager': 'contextawarerag.core.data.data_manager',
+})
@@ -0,0 +1,24 @@
+"""PEP 562 helpers so packages only import submodules when an attribute is used."""
+from typing import Callable, Dict, List, Tuple
+import importlib
+import sys
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """Build ``__getattr__`` and ``__dir__`` for a package.
+
+    ``exports`` maps each public name to the module defining it. A name is
+    imported on first access and then cached on the package.
+    """
+    def __getattr__(name: str):
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(module), name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,16 @@
+"""Caching package."""
+from typing import TYPE_CHECKING
+
+from contextawarerag._lazy import lazy_exports
+from contextawarerag.core.cache.result_cache import LRUCache, ResultCache, normalize_query
+from contextawarerag.core.cache.singleflight import SingleFlight
+
+if TYPE_CHECKING:
+    from contextawarerag.core.cache.semantic import SemanticCache
+
+__all__ = ['LRUCache', 'ResultCache', 'SemanticCache', 'SingleFlight', 'normalize_query']
+
+# SemanticCache needs numpy, which the rest of this package does not
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'SemanticCache': 'contextawarerag.core.cache.semantic',
+})
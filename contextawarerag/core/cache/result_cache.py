@@ -0,0 +1,199 @@
+from collections import OrderedDict
+from hashlib import sha1
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+import json
+import logging
+import re
+import time
+
+from contextawarerag.utils.metrics import REGISTRY, timer
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Generation scope bumped by every write, for results that span categories
+GLOBAL_SCOPE = '*'
+
+CACHE_LOOKUPS = REGISTRY.counter('cache_lookups_total', 'Result cache lookups by outcome', ('cache', 'result'))
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so equivalent queries share a key"""
+    return _WHITESPACE_RE.sub(' ', query.strip().lower())
+
+
+def _json_util():
+    # Deferred so importing the package does not load bson; only the Redis
+    # tier serializes values
+    from bson import json_util
+
+    return json_util
+
+
+def _normalize_params(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _normalize_params(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        # Filters are sets of values; their order must not split the cache
+        return sorted((_normalize_params(v) for v in value), key=repr)
+    return value
+
+
+class LRUCache:
+    """Bounded in-process cache with least-recently-used eviction and TTLs"""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, Tuple[Any, Optional[float]]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        self._data.pop(key, None)
+
+    def clear(self):
+        self._data.clear()
+
+
+class ResultCache:
+    """Two-tier result cache: an in-process LRU in front of ``redis.asyncio``.
+
+    Keys embed a generation number per category scope. Writes bump the
+    generation instead of deleting keys, so stale entries simply stop being
+    addressed and age out through their TTL. Generations are re-read from
+    Redis at most every ``generation_ttl`` seconds, which bounds how long
+    another process's write can go unnoticed. Redis failures degrade to the
+    local tier rather than failing the request.
+    """
+
+    def __init__(
+        self,
+        redis: Any = None,
+        namespace: str = 'rag',
+        ttl: float = 300,
+        local_maxsize: int = 1024,
+        local_ttl: float = 30,
+        generation_ttl: float = 1.0,
+        enabled: bool = True
+    ):
+        self.redis = redis
+        self.namespace = namespace
+        self.ttl = ttl
+        self.generation_ttl = generation_ttl
+        self.enabled = enabled
+        self.local = LRUCache(local_maxsize, local_ttl)
+        self._generations: Dict[str, Tuple[int, float]] = {}
+
+    def _generation_key(self, scope: str) -> str:
+        return f"{self.namespace}:gen:{scope}"
+
+    async def _get_generations(self, scopes: List[str]) -> List[int]:
+        now = time.monotonic()
+        stale = [s for s in scopes
+                 if s not in self._generations or now - self._generations[s][1] >= self.generation_ttl]
+        if stale and self.redis is not None:
+            try:
+                with timer('redis.mget'):
+                    values = await self.redis.mget([self._generation_key(s) for s in stale])
+                for scope, value in zip(stale, values):
+                    self._generations[scope] = (int(value or 0), now)
+            except Exception as e:
+                logger.warning(f"Failed to read cache generations: {e}")
+        return [self._generations.get(s, (0, now))[0] for s in scopes]
+
+    async def make_key(self, name: str, params: Dict[str, Any],
+                       categories: Optional[Iterable[Optional[str]]] = None) -> str:
+        """Build the cache key for a call, tagged with its scopes' current generations"""
+        scopes = sorted({c for c in categories or () if c}) or [GLOBAL_SCOPE]
+        generations = await self._get_generations(scopes)
+        tag = '.'.join(f"{s}={g}" for s, g in zip(scopes, generations))
+        payload = json.dumps(_normalize_params(params), sort_keys=True, default=str)
+        digest = sha1(f"{tag}|{payload}".encode('utf-8')).hexdigest()
+        return f"{self.namespace}:{name}:{digest}"
+
+    async def get_or_compute(
+        self,
+        name: str,
+        params: Dict[str, Any],
+        compute: Callable[[], Awaitable[Any]],
+        categories: Optional[Iterable[Optional[str]]] = None,
+        ttl: Optional[float] = None
+    ) -> Any:
+        """Return a cached result, or await ``compute`` and cache what it returns.
+
+        Exceptions from ``compute`` propagate and nothing is cached.
+        """
+        if not self.enabled:
+            return await compute()
+
+        key = await self.make_key(name, params, categories)
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            CACHE_LOOKUPS.inc(1, name, 'local')
+            return value
+
+        if self.redis is not None:
+            try:
+                with timer('redis.get'):
+                    cached = await self.redis.get(key)
+                if cached is not None:
+                    value = _json_util().loads(cached)
+                    self.local.set(key, value)
+                    CACHE_LOOKUPS.inc(1, name, 'redis')
+                    return value
+            except Exception as e:
+                logger.warning(f"Cache read failed for {name}: {e}")
+
+        CACHE_LOOKUPS.inc(1, name, 'miss')
+        value = await compute()
+        self.local.set(key, value)
+        if self.redis is not None:
+            try:
+                with timer('redis.set'):
+                    await self.redis.set(key, _json_util().dumps(value), ex=int(ttl or self.ttl))
+            except Exception as e:
+                logger.warning(f"Cache write failed for {name}: {e}")
+        return value
+
+    async def invalidate(self, category: Optional[str] = None):
+        """Bump the generation of a category (and the global scope)"""
+        scopes = [GLOBAL_SCOPE] + ([category] if category else [])
+        now = time.monotonic()
+        if self.redis is not None:
+            try:
+                pipe = self.redis.pipeline()
+                for scope in scopes:
+                    pipe.incr(self._generation_key(scope))
+                with timer('redis.incr'):
+                    values = await pipe.execute()
+                for scope, value in zip(scopes, values):
+                    self._generations[scope] = (int(value), now)
+                return
+            except Exception as e:
+                logger.warning(f"Failed to bump cache generation: {e}")
+        for scope in scopes:
+            current = self._generations.get(scope, (0, now))[0]
+            self._generations[scope] = (current + 1, now)
@@ -0,0 +1,125 @@
+from typing import Any, Dict, FrozenSet, Hashable, List, Optional
+import time
+
+import numpy as np
+
+from contextawarerag.core.search.bm25 import tokenize
+
+
+def _singular(term: str) -> str:
+    # Just enough stemming that "serums" and "serum" are the same query
+    if len(term) > 3 and term.endswith('s') and not term.endswith('ss'):
+        return term[:-1]
+    return term
+
+
+def query_terms(query: str) -> List[str]:
+    """Tokenized, singularized query terms, as the cache compares them"""
+    return [_singular(term) for term in tokenize(query)]
+
+
+def _exact_terms(terms: List[str]) -> FrozenSet[str]:
+    # Numbers and single letters ("vitamin c", "under 50") change what a
+    # query asks for while barely moving its embedding
+    return frozenset(term for term in terms if len(term) == 1 or term.isdigit())
+
+
+class SemanticCache:
+    """Cache keyed by query meaning rather than exact text.
+
+    Query embeddings live in one normalized float32 matrix, so a lookup is a
+    single matrix-vector product over entries in the same category. Queries
+    are embedded from their ``query_terms``, so case, punctuation, stopwords
+    and plurals do not matter. A hit needs cosine similarity of at least
+    ``threshold`` and the same numbers and single-letter terms. Entries
+    expire after ``ttl`` seconds and the least recently used entry is
+    evicted when the cache holds ``maxsize`` of them.
+    """
+
+    def __init__(self, embedder: Any = None, threshold: float = 0.9, maxsize: int = 1024,
+                 ttl: Optional[float] = 600):
+        if embedder is None:
+            from contextawarerag.core.vectorstore import HashingEmbedder
+
+            embedder = HashingEmbedder()
+        self.embedder = embedder
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._vectors = np.zeros((maxsize, embedder.dim), dtype=np.float32)
+        self._live = np.zeros(maxsize, dtype=bool)
+        self._expires_at = np.full(maxsize, np.inf)
+        self._last_used = np.zeros(maxsize, dtype=np.int64)
+        self._codes = np.zeros(maxsize, dtype=np.int32)
+        self._exact = np.zeros(maxsize, dtype=np.int64)
+        self._category_codes: Dict[Optional[Hashable], int] = {None: 0}
+        self._values: List[Any] = [None] * maxsize
+        self._clock = 0
+
+    def __len__(self) -> int:
+        return int(self._live.sum())
+
+    def embed(self, query: str) -> np.ndarray:
+        vector = np.asarray(self.embedder.embed_one(' '.join(query_terms(query))), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, query: str, category: Optional[Hashable] = None,
+            vector: Optional[np.ndarray] = None) -> Optional[Any]:
+        """Value cached for the most similar query in ``category``, if similar enough"""
+        self._expire()
+        code = self._category_codes.get(category or None)
+        if code is None:
+            return None
+        mask = self._live & (self._codes == code) & (self._exact == self._exact_key(query))
+        if not mask.any():
+            return None
+        vector = self.embed(query) if vector is None else vector
+        similarity = np.where(mask, self._vectors @ vector, -np.inf)
+        slot = int(np.argmax(similarity))
+        if similarity[slot] < self.threshold:
+            return None
+        self._touch(slot)
+        return self._values[slot]
+
+    def set(self, query: str, value: Any, category: Optional[Hashable] = None,
+            vector: Optional[np.ndarray] = None, ttl: Optional[float] = None):
+        self._expire()
+        free = np.flatnonzero(~self._live)
+        # Full: evict the least recently used entry
+        slot = int(free[0]) if len(free) else int(np.argmin(self._last_used))
+        ttl = self.ttl if ttl is None else ttl
+        self._vectors[slot] = self.embed(query) if vector is None else vector
+        self._live[slot] = True
+        self._expires_at[slot] = time.monotonic() + ttl if ttl else np.inf
+        # An empty category is the unscoped one, as in search
+        self._codes[slot] = self._category_codes.setdefault(category or None, len(self._category_codes))
+        self._exact[slot] = self._exact_key(query)
+        self._values[slot] = value
+        self._touch(slot)
+
+    def invalidate(self, category: Optional[Hashable] = None):
+        """Drop entries for ``category`` and entries not scoped to one"""
+        codes = [0, self._category_codes.get(category or None, 0)]
+        self._drop(np.flatnonzero(self._live & np.isin(self._codes, codes)))
+
+    def clear(self):
+        self._drop(np.flatnonzero(self._live))
+
+    @staticmethod
+    def _exact_key(query: str) -> int:
+        return hash(_exact_terms(query_terms(query)))
+
+    def _expire(self):
+        expired = np.flatnonzero(self._live & (self._expires_at <= time.monotonic()))
+        if len(expired):
+            self._drop(expired)
+
+    def _drop(self, slots: np.ndarray):
+        self._live[slots] = False
+        for slot in slots:
+            self._values[slot] = None
+
+    def _touch(self, slot: int):
+        self._clock += 1
+        self._last_used[slot] = self._clock
@@ -1,4 +1,18 @@
 """Data management package."""
-from contextawarerag.core.data.data_manager import DataManager
+from typing import TYPE_CHECKING
 
-__all__ = ['DataManager']
\ No newline at end of file
+from contextawarerag._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from contextawarerag.core.data.bulk import BulkWriter
+    from contextawarerag.core.data.data_manager import DataManager, DataManagerError
+    from contextawarerag.core.data.loader import BatchLoader
+
+__all__ = ['BatchLoader', 'BulkWriter', 'DataManager', 'DataManagerError']
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'BatchLoader': 'contextawarerag.core.data.loader',
+    'BulkWriter': 'contextawarerag.core.data.bulk',
+    'DataManager': 'contextawarerag.core.data.data_manager',
+    'DataManagerError': 'contextawarerag.core.data.data_manager',
+})
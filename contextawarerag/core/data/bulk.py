@@ -0,0 +1,169 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import logging
+
+from contextawarerag.utils.metrics import timer
+
+logger = logging.getLogger(__name__)
+
+_CLOSE = object()
+
+
+class BulkWriter:
+    """Stream documents into a collection as batched, unordered bulk writes.
+
+    Producers ``await put(document)``; the bounded queue blocks them while the
+    writer is behind, which applies backpressure. A batch is flushed when it
+    reaches ``batch_size`` documents or ``flush_interval`` seconds after its
+    first document arrived, whichever comes first. Documents that carry an
+    ``_id`` are upserted with ``ReplaceOne``; the rest are inserted.
+
+    ``results`` holds one ``{"id", "error", "skipped"}`` entry per document,
+    in the order the documents were put. ``skipped`` is True for a document
+    superseded by a later one with the same ``_id`` in its batch, which was
+    not sent. ``prepare`` maps each document as it is
+    put; a document it raises on is recorded as failed and never queued.
+    ``before_write`` is awaited with each batch's documents just before
+    they are sent, ``on_written`` with the ones that were written.
+    """
+
+    def __init__(
+        self,
+        collection: Any,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_queue: Optional[int] = None,
+        on_written: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+        before_write: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None,
+        prepare: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None
+    ):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_written = on_written
+        self.before_write = before_write
+        self.prepare = prepare
+        self.results: List[Dict[str, Any]] = []
+        self._queue: asyncio.Queue = asyncio.Queue(max_queue or batch_size * 2)
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> 'BulkWriter':
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def start(self):
+        """Start the background flush task"""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def put(self, document: Dict[str, Any]) -> int:
+        """Queue a document, waiting while the queue is full; returns its result index"""
+        if self._task is None:
+            self.start()
+        index = len(self.results)
+        self.results.append({"id": None, "error": None, "skipped": False})
+        if self.prepare is not None:
+            try:
+                document = self.prepare(document)
+            except Exception as e:
+                self.results[index]["error"] = str(e)
+                return index
+        try:
+            await self._queue.put((index, document))
+        except asyncio.CancelledError:
+            self.results[index]["error"] = "cancelled before it was queued"
+            raise
+        return index
+
+    async def close(self) -> List[Dict[str, Any]]:
+        """Flush everything queued and stop the writer"""
+        if self._task is not None:
+            await self._queue.put(_CLOSE)
+            await self._task
+            self._task = None
+        return self.results
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            item = await self._queue.get()
+            if item is _CLOSE:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _CLOSE:
+                    closing = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Any]):
+        # Deferred so importing the package does not load the driver
+        from bson import ObjectId
+        from pymongo import InsertOne, ReplaceOne
+        from pymongo.errors import BulkWriteError
+
+        # Unordered writes may apply in any order, so only the last upsert
+        # for a given _id in the batch is sent
+        last_position = {}
+        for position, (_, document) in enumerate(batch):
+            if "_id" in document:
+                last_position[document["_id"]] = position
+
+        requests, positions, superseded = [], [], set()
+        for position, (_, document) in enumerate(batch):
+            if "_id" not in document:
+                document["_id"] = ObjectId()
+                requests.append(InsertOne(document))
+            elif last_position[document["_id"]] == position:
+                requests.append(ReplaceOne({"_id": document["_id"]}, document, upsert=True))
+            else:
+                superseded.add(position)
+                continue
+            positions.append(position)
+
+        if self.before_write is not None:
+            try:
+                await self.before_write([batch[position][1] for position in positions])
+            except Exception as e:
+                logger.error(f"Pre-write hook failed: {e}")
+
+        failed: Dict[int, str] = {}
+        try:
+            with timer('mongodb.bulk_write'):
+                await self.collection.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[positions[error["index"]]] = error.get("errmsg", "write error")
+        except Exception as e:
+            logger.error(f"Bulk write of {len(batch)} documents failed: {e}")
+            failed = {position: str(e) for position in range(len(batch))}
+
+        written = []
+        for position, (index, document) in enumerate(batch):
+            if position in failed:
+                self.results[index]["error"] = failed[position]
+            elif position in superseded:
+                # Its id is reported, but listeners only see the version written
+                self.results[index].update(id=str(document["_id"]), skipped=True)
+            else:
+                self.results[index]["id"] = str(document["_id"])
+                written.append(document)
+
+        if written and self.on_written is not None:
+            try:
+                await self.on_written(written)
+            except Exception as e:
+                logger.error(f"Post-write hook failed: {e}")
@@ -1,70 +1,493 @@
-from typing import Dict, List, Optional, Any
-import asyncpg
-from motor.motor_asyncio import AsyncIOMotorClient
-from redis import Redis
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, Union
+from datetime import datetime
+import asyncio
+import copy
+import functools
+import time
+import weakref
 import logging
 
+from contextawarerag.core.cache import LRUCache, ResultCache
+from contextawarerag.core.data.bulk import BulkWriter
+from contextawarerag.core.data.indexes import INDEX_SPECS, QueryProfiler, reconcile_indexes
+from contextawarerag.core.data.loader import BatchLoader
+from contextawarerag.core.processing.chunking import Chunker
+from contextawarerag.core.processing.crawl_state import content_hash
+from contextawarerag.core.storage.base import StorageBackend, create_backend
+from contextawarerag.services.stats import CatalogStats, parse_price
+from contextawarerag.utils import metrics
+from contextawarerag.utils.metrics import timed, timer
+
 logger = logging.getLogger(__name__)
 
 class DataManagerError(Exception):
     pass
 
+
+def _utcnow() -> datetime:
+    """Naive UTC now, truncated to the millisecond precision BSON stores"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
 class DataManager:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
+        if 'metrics' in config:
+            metrics.configure(**config['metrics'])
         self.pg_pool = None
-        self.mongo_client = None
+        # Document store: motor unless config['storage'] selects another backend
+        self.storage: Optional[StorageBackend] = None
         self.redis_client = None
+        # Sampled explain() of reads is opt-in via the 'profiling' config section
+        self.profiler = QueryProfiler(**config['profiling']) if 'profiling' in config else None
         self.db = None
+        self._pg_lock: Optional[asyncio.Lock] = None
+        self.cache = ResultCache(**config.get('cache', {}))
+        self._content_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._product_loaders: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BatchLoader]' = \
+            weakref.WeakKeyDictionary()
+        # Catalog statistics are kept up to date on every write; a None
+        # 'stats' config section turns them off
+        stats = config.get('stats', {})
+        self.stats = CatalogStats(**stats) if stats is not None else None
+        # Chunking into rag_chunks is opt-in via the 'chunking' config section
+        self.chunker = Chunker(**config['chunking']) if 'chunking' in config else None
+        self._chunked_hashes = LRUCache(self.chunker.cache_size) if self.chunker else None
+
+    @property
+    def mongo_client(self) -> Any:
+        """The motor client, when the document store is MongoDB"""
+        return getattr(self.storage, 'client', None)
+
+    @property
+    def db(self) -> Any:
+        return self._db
+
+    @db.setter
+    def db(self, db: Any):
+        self._db = self.profiler.wrap(db) if db is not None and self.profiler is not None else db
 
     async def initialize(self):
+        """Open the backends listed in ``connections.eager`` concurrently.
+
+        Mongo and Redis are connected and pinged by default. Other backends,
+        and all of them when ``eager`` is empty, are opened on first use.
+        ``mongodb`` stands for the document store whichever storage backend
+        serves it. Once it is up, its indexes are reconciled unless
+        ``indexes.ensure`` is false.
+        """
+        settings = self.config.get('connections', {})
+        eager = settings.get('eager', ['mongodb', 'redis'])
+        # Client construction does not touch the network
+        self._create_storage()
+        self._create_redis_client()
+
+        checks = {'mongodb': self._ping_mongodb, 'redis': self._ping_redis, 'postgres': self.get_pg_pool}
+        names = [name for name in eager if name in checks and self._configured(name)]
+        results = await asyncio.gather(*(checks[name]() for name in names), return_exceptions=True)
+        failures = [f"{name}: {result}" for name, result in zip(names, results)
+                    if isinstance(result, BaseException)]
+        if failures:
+            logger.error(f"Failed to initialize connections: {failures}")
+            await self.close()
+            raise DataManagerError(f"Initialization failed: {'; '.join(failures)}")
+        if 'mongodb' in names and self.config.get('indexes', {}).get('ensure', True):
+            await self.ensure_indexes()
+
+    async def ensure_indexes(self) -> Dict[str, Dict[str, List[str]]]:
+        """Create the indexes in INDEX_SPECS that are missing; see reconcile_indexes"""
         try:
-            # MongoDB connection
-            self.mongo_client = AsyncIOMotorClient(
-                self.config['mongodb']['uri'],
-                serverSelectionTimeoutMS=5000
+            return await reconcile_indexes(
+                self.db, INDEX_SPECS, rebuild=self.config.get('indexes', {}).get('rebuild', False)
             )
-            self.db = self.mongo_client[self.config['mongodb']['database']]
-            await self.mongo_client.admin.command('ping')
-            
-            # Redis connection
+        except Exception as e:
+            logger.error(f"Index reconciliation failed: {e}")
+            return {}
+
+    def _configured(self, name: str) -> bool:
+        if name == 'mongodb':
+            return 'mongodb' in self.config or 'storage' in self.config
+        return name in self.config
+
+    def _create_storage(self):
+        if self.storage is None and self._configured('mongodb'):
+            self.storage = create_backend(self.config)
+            self.db = self.storage.database
+
+    def _create_redis_client(self):
+        if self.redis_client is None and 'redis' in self.config:
+            from redis.asyncio import Redis
+
             self.redis_client = Redis(
                 host=self.config['redis']['host'],
                 port=self.config['redis']['port'],
                 socket_timeout=5
             )
-            self.redis_client.ping()
-            
-            # PostgreSQL connection
-            self.pg_pool = await asyncpg.create_pool(
-                **self.config['postgres'],
-                min_size=5,
-                max_size=20
-            )
-            
-        except Exception as e:
-            logger.error(f"Failed to initialize connections: {e}")
-            raise DataManagerError(f"Initialization failed: {str(e)}")
+            self.cache.redis = self.redis_client
+
+    async def _ping_mongodb(self):
+        await self.storage.ping()
 
+    async def _ping_redis(self):
+        await self.redis_client.ping()
+
+    async def get_pg_pool(self):
+        """PostgreSQL pool, created on first use"""
+        if self.pg_pool is None:
+            if self._pg_lock is None:
+                self._pg_lock = asyncio.Lock()
+            async with self._pg_lock:
+                if self.pg_pool is None:
+                    import asyncpg
+
+                    settings = self.config.get('connections', {})
+                    self.pg_pool = await asyncpg.create_pool(
+                        **self.config['postgres'],
+                        min_size=settings.get('postgres_min_size', 1),
+                        max_size=settings.get('postgres_max_size', 20)
+                    )
+        return self.pg_pool
+
+    async def commission_engine(self, plan: Optional[Any] = None, **options: Any):
+        """CommissionEngine on the Postgres pool, with the plan from config['commission']"""
+        from contextawarerag.services.commission import CommissionEngine, CommissionPlan
+
+        settings = dict(self.config.get('commission', {}))
+        plan = plan or CommissionPlan.from_config(settings.pop('plan', {}))
+        return CommissionEngine(await self.get_pg_pool(), plan, **{**settings, **options})
+
+    async def health(self, timeout: float = 2.0) -> Dict[str, Dict[str, Any]]:
+        """Ping each configured backend concurrently.
+
+        Returns ``{backend: {"status", "latency_ms", "error"}}`` where status
+        is 'ok', 'error' or 'not_connected' (a lazy backend not opened yet).
+        """
+        async def ping_postgres():
+            async with self.pg_pool.acquire() as connection:
+                await connection.fetchval('SELECT 1')
+
+        backends = {
+            'mongodb': (self.storage, self._ping_mongodb),
+            'redis': (self.redis_client, self._ping_redis),
+            'postgres': (self.pg_pool, ping_postgres),
+        }
+
+        async def check(client, ping):
+            if client is None:
+                return {"status": "not_connected", "latency_ms": None, "error": None}
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(ping(), timeout)
+            except Exception as e:
+                return {"status": "error", "latency_ms": None, "error": str(e) or type(e).__name__}
+            return {"status": "ok", "latency_ms": (time.perf_counter() - start) * 1000, "error": None}
+
+        names = [name for name in backends if self._configured(name)]
+        results = await asyncio.gather(*(check(*backends[name]) for name in names))
+        return dict(zip(names, results))
+
+    async def close(self):
+        """Close every open backend connection"""
+        if self.pg_pool is not None:
+            await self.pg_pool.close()
+            self.pg_pool = None
+        if self.redis_client is not None:
+            close = getattr(self.redis_client, 'aclose', None) or self.redis_client.close
+            await close()
+            self.redis_client = None
+            self.cache.redis = None
+        if self.storage is not None:
+            await self.storage.close()
+            self.storage = None
+            self.db = None
+
+    async def __aenter__(self) -> 'DataManager':
+        await self.initialize()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @timed('store_rag_content')
     async def store_rag_content(
         self,
         content: str,
         content_type: str,
-        metadata: Dict[str, Any]
+        metadata: Dict[str, Any],
+        document_id: Optional[Any] = None
     ) -> str:
-        """Store content for RAG with metadata"""
+        """Store content for RAG with metadata, upserting when document_id is given.
+
+        Metadata is validated against the schema for ``content_type``; prices
+        are stored as numbers. Raises DataManagerError when it does not fit.
+        """
+        metadata = self._validate_metadata(content_type, metadata)
         document = {
             "content": content,
             "content_type": content_type,
-            "metadata": metadata
+            "metadata": metadata,
+            # Lets snapshot loads catch up on what changed since the export
+            "updated_at": _utcnow()
         }
-        result = await self.db.rag_content.insert_one(document)
-        return str(result.inserted_id)
+        previous = await self._previous_versions([document_id]) if document_id is not None else {}
+        with timer('mongodb.rag_content.write'):
+            if document_id is None:
+                result = await self.db.rag_content.insert_one(document)
+                document["_id"] = result.inserted_id
+            else:
+                document["_id"] = document_id
+                await self.db.rag_content.replace_one({"_id": document_id}, document, upsert=True)
+        await self._update_stats([document], previous)
+        await self._store_chunks([document])
+        self._notify_content_listeners(document)
+        await self._invalidate_categories([document], previous)
+        return str(document["_id"])
 
-    async def get_product_data(self, product_id: str) -> Dict:
-        """Get product data"""
-        product = await self.db.products.find_one(
-            {"product_id": product_id},
-            {'_id': 0}
+    def bulk_writer(
+        self,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_queue: Optional[int] = None,
+        on_written: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]] = None
+    ) -> BulkWriter:
+        """Create a writer that streams documents into rag_content in batches.
+
+        Documents are dicts with ``content``, ``content_type`` and ``metadata``
+        keys, plus an optional ``_id`` to upsert on. Documents with invalid
+        metadata get an error result and are not written; the rest are
+        stamped with ``updated_at``. ``on_written`` is awaited with each
+        batch's written documents, after stats, chunks and listeners.
+        """
+        # Versions the batch being flushed replaces, for stats and cache
+        # invalidation; a writer flushes one batch at a time
+        previous: Dict[Any, Dict[str, Any]] = {}
+        return BulkWriter(
+            self.db.rag_content,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            max_queue=max_queue,
+            on_written=functools.partial(self._on_bulk_written, previous, on_written),
+            before_write=functools.partial(self._before_bulk_write, previous),
+            prepare=self._prepare_document
         )
-        return product if product else {}
\ No newline at end of file
+
+    async def store_rag_content_many(
+        self,
+        documents: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_queue: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Store many documents with batched unordered writes.
+
+        Returns one ``{"id", "error", "skipped"}`` entry per document, in
+        input order; see BulkWriter.
+        """
+        async with self.bulk_writer(batch_size, flush_interval, max_queue) as writer:
+            if hasattr(documents, '__aiter__'):
+                async for document in documents:
+                    await writer.put(document)
+            else:
+                for document in documents:
+                    await writer.put(document)
+        return writer.results
+
+    def _validate_metadata(self, content_type: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        # Deferred so importing the package does not load pydantic
+        from contextawarerag.core.data.schema import validate_metadata
+
+        try:
+            return validate_metadata(content_type, metadata)
+        except ValueError as e:
+            raise DataManagerError(f"Invalid {content_type} metadata: {e}") from e
+
+    def _prepare_document(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        metadata = self._validate_metadata(document.get("content_type"), document.get("metadata") or {})
+        return {**document, "metadata": metadata, "updated_at": _utcnow()}
+
+    async def _previous_versions(self, ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Stored versions of documents about to be replaced, keyed by _id.
+
+        Stats subtract what a replaced document contributed; otherwise only
+        its category is needed, to invalidate cached results that hold it.
+        """
+        if self.stats is not None:
+            return await self.stats.previous(self.db, ids)
+        found = {}
+        async for doc in self.db.rag_content.find({"_id": {"$in": ids}}, {"metadata.category": 1}):
+            found[doc["_id"]] = doc
+        return found
+
+    async def _invalidate_categories(self, documents: List[Dict[str, Any]],
+                                     previous: Dict[Any, Dict[str, Any]]):
+        # A replacement that moves a document also stales its old category
+        categories = set()
+        for document in [*documents, *previous.values()]:
+            categories.add((document.get("metadata") or {}).get("category"))
+        for category in categories:
+            await self.cache.invalidate(category)
+
+    async def _before_bulk_write(self, pending: Dict[Any, Dict[str, Any]], documents: List[Dict[str, Any]]):
+        # Replaces what an earlier batch left, including one whose write failed
+        pending.clear()
+        pending.update(await self._previous_versions([document["_id"] for document in documents]))
+
+    async def _on_bulk_written(self, pending: Dict[Any, Dict[str, Any]],
+                               after: Optional[Callable[[List[Dict[str, Any]]], Awaitable[None]]],
+                               documents: List[Dict[str, Any]]):
+        previous = {document["_id"]: pending[document["_id"]] for document in documents
+                    if document["_id"] in pending}
+        pending.clear()
+        try:
+            await self._update_stats(documents, previous)
+            await self._store_chunks(documents)
+            for document in documents:
+                self._notify_content_listeners(document)
+            await self._invalidate_categories(documents, previous)
+        finally:
+            # The documents are written even if a derived update failed
+            if after is not None:
+                await after(documents)
+
+    async def _store_chunks(self, documents: List[Dict[str, Any]]):
+        """Upsert token-sized chunks of documents into rag_chunks.
+
+        Chunk ids are ``<parent_id>:<index>``, so re-ingesting a document
+        replaces its chunks in place; chunks beyond its new length are removed.
+        Documents whose content has not changed since they were last chunked
+        are skipped.
+        """
+        if self.chunker is None:
+            return
+        from pymongo import ReplaceOne
+
+        changed = []
+        for document in documents:
+            digest = content_hash(document.get("content", ""))
+            if self._chunked_hashes.get(document["_id"]) != digest:
+                changed.append((document, digest))
+        if not changed:
+            return
+
+        requests = []
+        chunk_ids = []
+        with timer('chunking'):
+            for chunk in self.chunker.chunk_documents(document for document, _ in changed):
+                requests.append(ReplaceOne({"_id": chunk["_id"]}, chunk, upsert=True))
+                chunk_ids.append(chunk["_id"])
+        with timer('mongodb.rag_chunks.write'):
+            await self.db.rag_chunks.bulk_write(requests, ordered=False)
+            await self.db.rag_chunks.delete_many({
+                "parent_id": {"$in": [document["_id"] for document, _ in changed]},
+                "_id": {"$nin": chunk_ids}
+            })
+        for document, digest in changed:
+            self._chunked_hashes.set(document["_id"], digest)
+
+    async def _update_stats(self, documents: List[Dict[str, Any]],
+                            previous: Optional[Dict[Any, Dict[str, Any]]] = None):
+        if self.stats is None:
+            return
+        try:
+            with timer('mongodb.catalog_stats.write'):
+                await self.stats.apply(self.db, documents, previous)
+        except Exception as e:
+            # The content is stored; rebuild_catalog_stats() repairs drift
+            logger.error(f"Error updating catalog stats: {e}")
+
+    async def get_catalog_stats(self) -> Dict[str, Any]:
+        """Per-category counts, price range and top ingredients, from the stats collection"""
+        return await (self.stats or CatalogStats()).summary(self.db)
+
+    async def rebuild_catalog_stats(self) -> int:
+        """Recompute the stats collection from rag_content; returns the documents scanned"""
+        return await (self.stats or CatalogStats()).rebuild(self.db)
+
+    async def migrate_prices(self, batch_size: int = 500) -> int:
+        """Rewrite prices stored as strings as numbers; returns the documents changed.
+
+        Documents stored before prices were validated may hold strings like
+        ``'$49.99'``, which price range filters and the (category, price)
+        index do not cover. Unparseable prices are removed, as validation
+        would have dropped them. Run once after upgrading.
+        """
+        from pymongo import UpdateOne
+
+        changed = 0
+        requests = []
+        async for doc in self.db.rag_content.find({"metadata.price": {"$type": "string"}}, {"metadata.price": 1}):
+            price = parse_price(doc["metadata"]["price"])
+            update = {"$set": {"updated_at": _utcnow()}}
+            if price is None:
+                update["$unset"] = {"metadata.price": ""}
+            else:
+                update["$set"]["metadata.price"] = price
+            requests.append(UpdateOne({"_id": doc["_id"]}, update))
+            if len(requests) >= batch_size:
+                await self.db.rag_content.bulk_write(requests, ordered=False)
+                changed += len(requests)
+                requests = []
+        if requests:
+            await self.db.rag_content.bulk_write(requests, ordered=False)
+            changed += len(requests)
+        if changed:
+            # Cached results hold the old values
+            await self.cache.invalidate()
+        return changed
+
+    async def get_chunks(self, parent_id: Any) -> List[Dict[str, Any]]:
+        """Chunks of a rag_content document, in order"""
+        chunks = await self.db.rag_chunks.find({"parent_id": parent_id}).to_list(None)
+        return sorted(chunks, key=lambda chunk: chunk["chunk_index"])
+
+    def add_content_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Register a callback invoked with each document written to rag_content"""
+        self._content_listeners.append(listener)
+
+    def remove_content_listener(self, listener: Callable[[Dict[str, Any]], None]):
+        """Unregister a callback added with add_content_listener"""
+        if listener in self._content_listeners:
+            self._content_listeners.remove(listener)
+
+    def _notify_content_listeners(self, document: Dict[str, Any]):
+        for listener in self._content_listeners:
+            try:
+                listener(document)
+            except Exception as e:
+                logger.error(f"Content listener failed: {e}")
+
+    @timed('get_product_data')
+    async def get_product_data(self, product_id: str) -> Dict:
+        """Get product data, batched with concurrent lookups on the same loop"""
+        product = await self._product_loader().load(product_id)
+        # The loader shares one cached dict between callers, nested values included
+        return copy.deepcopy(product)
+
+    async def get_products_many(
+        self,
+        product_ids: Iterable[str],
+        projection: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Dict]:
+        """Get many products in one query, keyed by product_id; missing ids are left out"""
+        ids = list(dict.fromkeys(product_ids))
+        if not ids:
+            return {}
+        projection = {'_id': 0, **(projection or {})}
+        if any(keep for field, keep in projection.items() if field != '_id'):
+            # Results are keyed by product_id, so an inclusion projection must keep it
+            projection['product_id'] = 1
+        products = {}
+        with timer('mongodb.products.find'):
+            async for product in self.db.products.find({"product_id": {"$in": ids}}, projection):
+                products[product["product_id"]] = product
+        return products
+
+    def _product_loader(self) -> BatchLoader:
+        loop = asyncio.get_running_loop()
+        loader = self._product_loaders.get(loop)
+        if loader is None:
+            loader = BatchLoader(self.get_products_many, default={},
+                                 **self.config.get('products', {}))
+            self._product_loaders[loop] = loader
+        return loader
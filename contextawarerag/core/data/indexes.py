@@ -0,0 +1,277 @@
+"""Index specs for the Mongo collections, and a sampling query profiler."""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+import asyncio
+import logging
+import random
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[str, Union[int, str]]
+
+
+class IndexSpec:
+    """One index a collection should have.
+
+    ``keys`` are ``(field, direction)`` pairs; direction ``'text'`` makes a
+    text index. Options compared when reconciling are ``unique``, ``sparse``
+    and ``partial_filter``.
+    """
+
+    def __init__(
+        self,
+        collection: str,
+        keys: Sequence[Key],
+        unique: bool = False,
+        sparse: bool = False,
+        partial_filter: Optional[Dict[str, Any]] = None,
+        name: Optional[str] = None
+    ):
+        self.collection = collection
+        self.keys = [tuple(key) for key in keys]
+        self.unique = unique
+        self.sparse = sparse
+        self.partial_filter = partial_filter
+        # Mongo's default index name
+        self.name = name or '_'.join(f"{field}_{direction}" for field, direction in self.keys)
+
+    def __repr__(self) -> str:
+        return f"IndexSpec({self.collection}.{self.name})"
+
+    @property
+    def is_text(self) -> bool:
+        return any(direction == 'text' for _, direction in self.keys)
+
+    def options(self) -> Dict[str, Any]:
+        options = {'name': self.name}
+        if self.unique:
+            options['unique'] = True
+        if self.sparse:
+            options['sparse'] = True
+        if self.partial_filter:
+            options['partialFilterExpression'] = self.partial_filter
+        return options
+
+    def model(self) -> Any:
+        from pymongo import IndexModel
+
+        return IndexModel(self.keys, **self.options())
+
+    def same_keys(self, info: Dict[str, Any]) -> bool:
+        """Whether an ``index_information()`` entry indexes the same keys"""
+        key = [tuple(k) for k in info.get('key', [])]
+        if self.is_text:
+            # Text indexes are stored as _fts/_ftsx plus per-field weights
+            fields = {field for field, direction in self.keys if direction == 'text'}
+            return ('_fts', 'text') in key and set(info.get('weights', {})) == fields
+        return key == self.keys
+
+    def same_options(self, info: Dict[str, Any]) -> bool:
+        return (bool(info.get('unique')) == self.unique
+                and bool(info.get('sparse')) == self.sparse
+                and info.get('partialFilterExpression') == self.partial_filter)
+
+
+# Indexes DataManager provisions at startup
+INDEX_SPECS: List[IndexSpec] = [
+    # _fetch_products and recommendation lookups
+    IndexSpec('rag_content', [('metadata.product_id', 1)]),
+    # Category-scoped reads; also serves category-only filters as a prefix
+    IndexSpec('rag_content', [('metadata.category', 1), ('metadata.product_id', 1)]),
+    # Price-range filters within a category
+    IndexSpec('rag_content', [('metadata.category', 1), ('metadata.price', 1)]),
+    IndexSpec('rag_content', [('content', 'text')]),
+    # Snapshot catch-up reads documents written since the export
+    IndexSpec('rag_content', [('updated_at', 1)]),
+    IndexSpec('rag_chunks', [('parent_id', 1), ('chunk_index', 1)]),
+    # get_product_data / get_products_many
+    IndexSpec('products', [('product_id', 1)], unique=True),
+]
+
+
+async def reconcile_indexes(
+    db: Any,
+    specs: Iterable[IndexSpec] = INDEX_SPECS,
+    rebuild: bool = False
+) -> Dict[str, Dict[str, List[str]]]:
+    """Create missing indexes; safe to run on every start.
+
+    An existing index with the same keys but different options is a
+    conflict: it is dropped and recreated when ``rebuild`` is set, and
+    reported otherwise. Indexes are created one at a time, so a spec the
+    server rejects (say, a second text index) is reported as a conflict
+    without blocking the others. Indexes not in ``specs`` are left alone. Returns
+    ``{collection: {"created", "existing", "rebuilt", "conflicts"}}`` of
+    index names.
+    """
+    from pymongo.errors import OperationFailure
+
+    by_collection: Dict[str, List[IndexSpec]] = {}
+    for spec in specs:
+        by_collection.setdefault(spec.collection, []).append(spec)
+
+    async def reconcile(name: str, collection_specs: List[IndexSpec]) -> Dict[str, List[str]]:
+        collection = db[name]
+        existing = await collection.index_information()
+        report = {"created": [], "existing": [], "rebuilt": [], "conflicts": []}
+        to_create = []
+        for spec in collection_specs:
+            match = next(((index_name, info) for index_name, info in existing.items()
+                          if spec.same_keys(info)), None)
+            if match is None:
+                to_create.append(spec)
+                report["created"].append(spec.name)
+            elif spec.same_options(match[1]):
+                report["existing"].append(match[0])
+            elif rebuild:
+                await collection.drop_index(match[0])
+                to_create.append(spec)
+                report["rebuilt"].append(spec.name)
+            else:
+                logger.warning(f"Index {name}.{match[0]} differs from its spec {spec.options()}")
+                report["conflicts"].append(match[0])
+        for spec in to_create:
+            try:
+                await collection.create_indexes([spec.model()])
+            except OperationFailure as e:
+                logger.warning(f"Could not create index {name}.{spec.name}: {e}")
+                for key in ("created", "rebuilt"):
+                    if spec.name in report[key]:
+                        report[key].remove(spec.name)
+                report["conflicts"].append(spec.name)
+        if report["created"] or report["rebuilt"]:
+            logger.info(f"Created indexes on {name}: {report['created'] + report['rebuilt']}")
+        return report
+
+    names = list(by_collection)
+    reports = await asyncio.gather(*(reconcile(name, by_collection[name]) for name in names))
+    return dict(zip(names, reports))
+
+
+def query_shape(query: Any) -> Any:
+    """A query with its values replaced by ``'?'``, keeping fields and operators"""
+    if isinstance(query, dict):
+        return {key: query_shape(value) if key.startswith('$') or isinstance(value, dict) else '?'
+                for key, value in sorted(query.items())}
+    if isinstance(query, (list, tuple)):
+        # Logical operators hold sub-queries; $in and friends hold values
+        shapes = [query_shape(item) for item in query if isinstance(item, dict)]
+        return shapes or '?'
+    return '?'
+
+
+def plan_stages(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Every stage of an explain plan, outermost first"""
+    stages = [plan]
+    for child in [plan.get('inputStage')] + list(plan.get('inputStages', [])):
+        if child:
+            stages.extend(plan_stages(child))
+    return stages
+
+
+class QueryProfiler:
+    """Explain a random sample of queries in the background and flag bad plans.
+
+    A plan is flagged when it scans the whole collection or takes longer
+    than ``slow_ms``. Findings are grouped by collection and query shape,
+    and each shape is logged once when first flagged.
+    """
+
+    def __init__(self, sample_rate: float = 0.01, slow_ms: float = 100.0):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.findings: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def wrap(self, db: Any) -> 'ProfiledDatabase':
+        return ProfiledDatabase(db, self)
+
+    def sample(self, collection: Any, name: str, query: Dict[str, Any]):
+        if random.random() >= self.sample_rate:
+            return
+        task = asyncio.ensure_future(self.profile(collection, name, query))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def profile(self, collection: Any, name: str, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Explain ``query`` and record a finding if its plan is flagged"""
+        try:
+            explained = await collection.find(query).explain()
+        except Exception as e:
+            logger.warning(f"explain() failed on {name}: {e}")
+            return None
+
+        winning = explained.get('queryPlanner', {}).get('winningPlan', {})
+        stats = explained.get('executionStats', {})
+        stages = [stage.get('stage') for stage in plan_stages(winning)]
+        millis = stats.get('executionTimeMillis', 0)
+        reasons = []
+        if 'COLLSCAN' in stages:
+            reasons.append('collection scan')
+        if millis >= self.slow_ms:
+            reasons.append(f'slow ({millis} ms)')
+        if not reasons:
+            return None
+
+        shape = repr(query_shape(query))
+        finding = self.findings.get((name, shape))
+        if finding is None:
+            finding = self.findings[(name, shape)] = {
+                "collection": name, "shape": shape, "reasons": reasons, "stages": stages,
+                "docs_examined": stats.get('totalDocsExamined'), "returned": stats.get('nReturned'),
+                "max_ms": millis, "count": 0,
+            }
+            logger.warning(f"Query on {name} flagged ({', '.join(reasons)}): {shape} plan {stages}")
+        finding["count"] += 1
+        finding["max_ms"] = max(finding["max_ms"], millis)
+        return finding
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Flagged query shapes, most frequent first"""
+        return sorted(self.findings.values(), key=lambda finding: -finding["count"])
+
+    async def drain(self):
+        """Wait for pending explains"""
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+
+class ProfiledDatabase:
+    """Database proxy whose collections feed sampled reads to a QueryProfiler"""
+
+    def __init__(self, db: Any, profiler: QueryProfiler):
+        self._db = db
+        self._profiler = profiler
+        self._collections: Dict[str, ProfiledCollection] = {}
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        # Database methods (command, list_collection_names, ...) pass
+        # through; any other name is a collection, as on the database
+        if hasattr(type(self._db), name):
+            return getattr(self._db, name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> 'ProfiledCollection':
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = ProfiledCollection(self._db[name], name, self._profiler)
+        return collection
+
+
+class ProfiledCollection:
+    def __init__(self, collection: Any, name: str, profiler: QueryProfiler):
+        self._collection = collection
+        self._name = name
+        self._profiler = profiler
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._collection, name)
+
+    def find(self, filter: Optional[Dict[str, Any]] = None, *args: Any, **kwargs: Any) -> Any:
+        self._profiler.sample(self._collection, self._name, filter or {})
+        return self._collection.find(filter, *args, **kwargs)
+
+    async def find_one(self, filter: Optional[Dict[str, Any]] = None, *args: Any, **kwargs: Any) -> Any:
+        self._profiler.sample(self._collection, self._name, filter or {})
+        return await self._collection.find_one(filter, *args, **kwargs)
@@ -0,0 +1,90 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+import asyncio
+import logging
+
+from contextawarerag.core.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class BatchLoader:
+    """Coalesce lookups made in the same event-loop tick into one batch call.
+
+    ``batch_fn`` takes a list of distinct keys and returns a dict of the
+    values found; keys it leaves out resolve to ``default``. Loaded values
+    are kept in a small TTL cache. A loader belongs to the event loop it is
+    first used on.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]],
+        max_batch_size: int = 500,
+        cache_ttl: float = 5.0,
+        cache_size: int = 10000,
+        default: Any = None
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.default = default
+        self.cache = LRUCache(cache_size, ttl=cache_ttl) if cache_ttl else None
+        self._pending: Dict[Hashable, asyncio.Future] = {}
+        self._scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: Hashable) -> Any:
+        if self.cache is not None:
+            value = self.cache.get(key, _MISSING)
+            if value is not _MISSING:
+                return value
+
+        future = self._pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._pending[key] = loop.create_future()
+            if not self._scheduled:
+                self._scheduled = True
+                loop.call_soon(self._dispatch)
+        # One caller giving up must not cancel the lookup for the others
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: List[Hashable]) -> List[Any]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def clear(self, key: Optional[Hashable] = None):
+        """Drop one cached key, or all of them"""
+        if self.cache is None:
+            return
+        if key is None:
+            self.cache.clear()
+        else:
+            self.cache.delete(key)
+
+    def _dispatch(self):
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        keys = list(pending)
+        for start in range(0, len(keys), self.max_batch_size):
+            batch = {key: pending[key] for key in keys[start:start + self.max_batch_size]}
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, batch: Dict[Hashable, asyncio.Future]):
+        try:
+            values = await self.batch_fn(list(batch))
+        except Exception as e:
+            logger.error(f"Batch load of {len(batch)} keys failed: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in batch.items():
+            value = values.get(key, self.default)
+            if self.cache is not None:
+                self.cache.set(key, value)
+            if not future.done():
+                future.set_result(value)
@@ -0,0 +1,58 @@
+"""Pydantic models for rag_content metadata.
+
+Importing pydantic is slow, so DataManager loads this module on the first
+write rather than at import time. The models are compiled once, when the
+module is first imported.
+"""
+from typing import Any, Dict, Optional, Type
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from contextawarerag.services.stats.catalog import UNKNOWN_CATEGORY, parse_price
+
+
+class ContentMetadata(BaseModel):
+    """Metadata any rag_content document may carry; unknown keys are kept"""
+
+    model_config = ConfigDict(extra='allow')
+
+    category: Optional[str] = None
+    product_id: Optional[str] = None
+    price: Optional[float] = Field(default=None, ge=0)
+    url: Optional[str] = None
+
+    @field_validator('category', 'product_id', 'url', mode='before')
+    @classmethod
+    def _number_to_str(cls, value: Any) -> Any:
+        # Numeric product ids from feeds are stored as strings. Done here
+        # rather than with coerce_numbers_to_str, which needs pydantic 2.6
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        return value
+
+    @field_validator('price', mode='before')
+    @classmethod
+    def _numeric_price(cls, value: Any) -> Any:
+        # '$1,049.99' -> 1049.99; missing or unparseable prices are dropped
+        return parse_price(value) if isinstance(value, str) else value
+
+
+class ProductMetadata(ContentMetadata):
+    """Metadata of a ``product`` document"""
+
+    category: str = UNKNOWN_CATEGORY
+
+
+METADATA_MODELS: Dict[str, Type[ContentMetadata]] = {
+    'product': ProductMetadata,
+}
+
+
+def validate_metadata(content_type: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Validated, normalized metadata for a document of ``content_type``.
+
+    Raises pydantic's ``ValidationError``, a ``ValueError``, when the
+    metadata does not fit the model.
+    """
+    model = METADATA_MODELS.get(content_type, ContentMetadata)
+    return model.model_validate(metadata).model_dump(exclude_none=True)
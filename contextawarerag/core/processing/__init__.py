@@ -0,0 +1,73 @@
+"""Data processing package."""
+from typing import TYPE_CHECKING
+
+from contextawarerag._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from contextawarerag.core.processing.chunking import (
+        Chunker,
+        TiktokenTokenizer,
+        WhitespaceTokenizer,
+        get_tokenizer,
+    )
+    from contextawarerag.core.processing.context import ContextPacker
+    from contextawarerag.core.processing.crawl_state import (
+        CrawlStateStore,
+        content_hash,
+        stable_document_id,
+    )
+    from contextawarerag.core.processing.executor import (
+        InlineExecutor,
+        ParseExecutor,
+        ProcessPoolParseExecutor,
+        create_executor,
+    )
+    from contextawarerag.core.processing.parsers import (
+        extract_product_urls,
+        fastest_backend,
+        parse_product_html,
+    )
+    from contextawarerag.core.processing.pipeline import CrawlPipeline
+    from contextawarerag.core.processing.rate_limit import HostRateLimiter, TokenBucket
+
+__all__ = [
+    'Chunker',
+    'ContextPacker',
+    'CrawlPipeline',
+    'CrawlStateStore',
+    'HostRateLimiter',
+    'InlineExecutor',
+    'ParseExecutor',
+    'ProcessPoolParseExecutor',
+    'TiktokenTokenizer',
+    'TokenBucket',
+    'WhitespaceTokenizer',
+    'content_hash',
+    'create_executor',
+    'extract_product_urls',
+    'fastest_backend',
+    'get_tokenizer',
+    'parse_product_html',
+    'stable_document_id',
+]
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'Chunker': 'contextawarerag.core.processing.chunking',
+    'TiktokenTokenizer': 'contextawarerag.core.processing.chunking',
+    'WhitespaceTokenizer': 'contextawarerag.core.processing.chunking',
+    'get_tokenizer': 'contextawarerag.core.processing.chunking',
+    'ContextPacker': 'contextawarerag.core.processing.context',
+    'CrawlStateStore': 'contextawarerag.core.processing.crawl_state',
+    'content_hash': 'contextawarerag.core.processing.crawl_state',
+    'stable_document_id': 'contextawarerag.core.processing.crawl_state',
+    'InlineExecutor': 'contextawarerag.core.processing.executor',
+    'ParseExecutor': 'contextawarerag.core.processing.executor',
+    'ProcessPoolParseExecutor': 'contextawarerag.core.processing.executor',
+    'create_executor': 'contextawarerag.core.processing.executor',
+    'extract_product_urls': 'contextawarerag.core.processing.parsers',
+    'fastest_backend': 'contextawarerag.core.processing.parsers',
+    'parse_product_html': 'contextawarerag.core.processing.parsers',
+    'CrawlPipeline': 'contextawarerag.core.processing.pipeline',
+    'HostRateLimiter': 'contextawarerag.core.processing.rate_limit',
+    'TokenBucket': 'contextawarerag.core.processing.rate_limit',
+})
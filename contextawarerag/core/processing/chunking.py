@@ -0,0 +1,119 @@
+from array import array
+from typing import Any, Dict, Iterable, Iterator, Optional
+import logging
+import re
+
+from contextawarerag.core.cache import LRUCache
+from contextawarerag.core.processing.crawl_state import content_hash
+
+logger = logging.getLogger(__name__)
+
+
+class WhitespaceTokenizer:
+    """Fast token estimator: words and individual punctuation marks.
+
+    Splitting punctuation off words tracks BPE token counts more closely
+    than a plain whitespace split, at a fraction of the cost.
+    """
+
+    name = 'whitespace'
+    _token_re = re.compile(r"\w+|[^\w\s]")
+
+    def offsets(self, text: str) -> array:
+        return array('I', (m.start() for m in self._token_re.finditer(text)))
+
+
+class TiktokenTokenizer:
+    """Exact token offsets from a tiktoken encoding"""
+
+    def __init__(self, encoding: str = 'cl100k_base'):
+        import tiktoken
+
+        self.name = f'tiktoken:{encoding}'
+        self._encoding = tiktoken.get_encoding(encoding)
+
+    def offsets(self, text: str) -> array:
+        tokens = self._encoding.encode(text, disallowed_special=())
+        _, offsets = self._encoding.decode_with_offsets(tokens)
+        return array('I', offsets)
+
+
+def get_tokenizer(encoding: Optional[str] = 'cl100k_base'):
+    """tiktoken when it is installed and an encoding is requested, else the estimator"""
+    if encoding:
+        try:
+            return TiktokenTokenizer(encoding)
+        except Exception as e:
+            logger.info(f"tiktoken unavailable ({e}); estimating tokens from whitespace")
+    return WhitespaceTokenizer()
+
+
+class Chunker:
+    """Split content into overlapping windows of at most ``max_tokens`` tokens.
+
+    Token offsets are cached by content hash, so re-chunking or counting an
+    unchanged document does not tokenize it again. Chunks are produced
+    lazily, so documents can be streamed through without materializing them.
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 256,
+        overlap: int = 32,
+        tokenizer: Any = None,
+        encoding: Optional[str] = 'cl100k_base',
+        cache_size: int = 4096
+    ):
+        if not 0 <= overlap < max_tokens:
+            raise ValueError("overlap must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.tokenizer = tokenizer or get_tokenizer(encoding)
+        self.cache_size = cache_size
+        self._offsets = LRUCache(cache_size)
+
+    def token_offsets(self, text: str, digest: Optional[str] = None) -> array:
+        """Character offset of every token in ``text``"""
+        key = digest or content_hash(text)
+        offsets = self._offsets.get(key)
+        if offsets is None:
+            offsets = self.tokenizer.offsets(text)
+            self._offsets.set(key, offsets)
+        return offsets
+
+    def count_tokens(self, text: str, digest: Optional[str] = None) -> int:
+        return len(self.token_offsets(text, digest))
+
+    def chunk(self, text: str) -> Iterator[Dict[str, Any]]:
+        """Yield ``{"index", "offset", "content", "token_count"}`` windows"""
+        offsets = self.token_offsets(text)
+        n_tokens = len(offsets)
+        step = self.max_tokens - self.overlap
+        for index, first in enumerate(range(0, max(n_tokens, 1), step)):
+            last = min(first + self.max_tokens, n_tokens)
+            start = offsets[first] if n_tokens else 0
+            end = offsets[last] if last < n_tokens else len(text)
+            yield {
+                "index": index,
+                "offset": start,
+                "content": text[start:end],
+                "token_count": last - first,
+            }
+            if last >= n_tokens:
+                break
+
+    def chunk_documents(self, documents: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Yield rag_chunks documents pointing back at their parent documents"""
+        for document in documents:
+            parent_id = document["_id"]
+            for chunk in self.chunk(document.get("content", "")):
+                yield {
+                    "_id": f"{parent_id}:{chunk['index']}",
+                    "parent_id": parent_id,
+                    "chunk_index": chunk["index"],
+                    "offset": chunk["offset"],
+                    "token_count": chunk["token_count"],
+                    "content": chunk["content"],
+                    "content_type": document.get("content_type"),
+                    "metadata": document.get("metadata", {}),
+                }
@@ -0,0 +1,128 @@
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+import itertools
+
+import numpy as np
+
+from contextawarerag.core.processing.chunking import Chunker
+
+
+class ContextPacker:
+    """Pick a diverse, relevant subset of retrieved content within a token budget.
+
+    Candidates are chosen greedily by Maximal Marginal Relevance: each step
+    takes the candidate maximizing ``lambda_mult * relevance - (1 -
+    lambda_mult) * max similarity to what is already picked``. Picks are
+    packed until the budget is spent; the last one is cut at a token
+    boundary if at least ``min_tokens`` still fit. Token counts come from
+    the chunker, which caches them per content hash.
+    """
+
+    def __init__(
+        self,
+        budget: int = 2000,
+        lambda_mult: float = 0.7,
+        max_candidates: int = 50,
+        min_tokens: int = 32,
+        separator: str = "\n\n",
+        embedder: Any = None,
+        chunker: Optional[Chunker] = None
+    ):
+        if embedder is None:
+            from contextawarerag.core.vectorstore import HashingEmbedder
+
+            embedder = HashingEmbedder()
+        self.budget = budget
+        self.lambda_mult = lambda_mult
+        self.max_candidates = max_candidates
+        self.min_tokens = min_tokens
+        self.separator = separator
+        self.embedder = embedder
+        self.chunker = chunker or Chunker()
+
+    def select(
+        self,
+        candidates: Sequence[Dict[str, Any]],
+        query: Optional[str] = None,
+        k: Optional[int] = None
+    ) -> List[int]:
+        """Indices of the first ``k`` candidates in MMR order"""
+        return list(itertools.islice(self.iter_mmr(candidates, query), k))
+
+    def iter_mmr(self, candidates: Sequence[Dict[str, Any]], query: Optional[str] = None) -> Iterator[int]:
+        """Yield candidate indices in MMR order, one vectorized step per pick.
+
+        Relevance is cosine similarity to ``query`` when given, else each
+        candidate's ``score`` scaled to [0, 1].
+        """
+        n = len(candidates)
+        if n == 0:
+            return
+
+        vectors = self._normalize(self.embedder.embed([c.get("content", "") for c in candidates]))
+        if query is not None:
+            relevance = vectors @ self._normalize(self.embedder.embed([query]))[0]
+        else:
+            scores = np.array([c.get("score", 0.0) for c in candidates], dtype=np.float32)
+            peak = scores.max()
+            relevance = scores / peak if peak > 0 else np.ones(n, dtype=np.float32)
+
+        # Highest similarity of each candidate to any pick so far
+        redundancy = np.zeros(n, dtype=np.float32)
+        available = np.ones(n, dtype=bool)
+        for _ in range(n):
+            mmr = self.lambda_mult * relevance - (1 - self.lambda_mult) * redundancy
+            mmr[~available] = -np.inf
+            best = int(np.argmax(mmr))
+            available[best] = False
+            np.maximum(redundancy, vectors @ vectors[best], out=redundancy)
+            yield best
+
+    def pack(
+        self,
+        candidates: Sequence[Dict[str, Any]],
+        query: Optional[str] = None,
+        budget: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Pack candidates into ``{"text", "tokens", "items"}`` within the budget.
+
+        ``items`` holds the chosen candidates in packing order, each with
+        ``token_count`` and ``truncated`` added.
+        """
+        budget = self.budget if budget is None else budget
+        candidates = list(candidates)[:self.max_candidates]
+        separator_tokens = self.chunker.count_tokens(self.separator) if self.separator else 0
+
+        parts, items, used = [], [], 0
+        for index in self.iter_mmr(candidates, query):
+            candidate = candidates[index]
+            content = candidate.get("content", "")
+            cost = separator_tokens if parts else 0
+            remaining = budget - used - cost
+            if remaining <= 0:
+                break
+
+            offsets = self.chunker.token_offsets(content)
+            tokens = len(offsets)
+            truncated = tokens > remaining
+            if truncated:
+                if remaining < self.min_tokens:
+                    continue
+                cut = remaining
+                # Re-tokenizing a prefix can merge differently; trim until it fits
+                while True:
+                    content = content[:offsets[cut]].rstrip()
+                    tokens = self.chunker.count_tokens(content)
+                    if tokens <= remaining or cut == 0:
+                        break
+                    cut -= 1
+
+            parts.append(content)
+            items.append({**candidate, "token_count": tokens, "truncated": truncated})
+            used += cost + tokens
+
+        return {"text": self.separator.join(parts), "tokens": used, "items": items}
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
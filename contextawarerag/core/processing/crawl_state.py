@@ -0,0 +1,81 @@
+from datetime import datetime, timezone
+from hashlib import sha1
+from typing import Any, Dict, Iterable, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """Stable fingerprint of fetched page content"""
+    return sha1(text.encode('utf-8')).hexdigest()
+
+
+def stable_document_id(sku: Optional[str] = None, url: Optional[str] = None) -> str:
+    """Deterministic rag_content _id for a product, from its SKU or else its URL"""
+    if sku:
+        return f"sku:{sha1(sku.encode('utf-8')).hexdigest()}"
+    if url:
+        return f"url:{sha1(url.encode('utf-8')).hexdigest()}"
+    raise ValueError("A SKU or URL is required for a stable document id")
+
+
+class CrawlStateStore:
+    """Per-URL HTTP validators and content hashes from previous crawls.
+
+    State is loaded into memory once per run and written back in bulk, so
+    consulting it adds no round-trips to the fetch path. Without a collection
+    the store only lives for the process.
+    """
+
+    def __init__(self, collection: Any = None):
+        self.collection = collection
+        self._states: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    async def load(self):
+        """Load all recorded state from the collection"""
+        if self.collection is None:
+            return
+        async for doc in self.collection.find({}):
+            self._states[doc["_id"]] = doc
+        logger.info(f"Loaded crawl state for {len(self._states)} URLs")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        return self._states.get(url)
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for a previously seen URL"""
+        state = self._states.get(url) or {}
+        headers = {}
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+        return headers
+
+    def is_unchanged(self, url: str, digest: str) -> bool:
+        state = self._states.get(url)
+        return state is not None and state.get("content_hash") == digest
+
+    async def record_many(self, states: Iterable[Dict[str, Any]]):
+        """Record state for URLs whose content has been stored.
+
+        Each state is a dict with ``url`` and any of ``etag``,
+        ``last_modified`` and ``content_hash``.
+        """
+        from pymongo import UpdateOne
+
+        now = datetime.now(timezone.utc)
+        requests = []
+        for state in states:
+            url = state["url"]
+            fields = {key: state.get(key) for key in ("etag", "last_modified", "content_hash")}
+            fields["fetched_at"] = now
+            self._states[url] = {"_id": url, **fields}
+            requests.append(UpdateOne({"_id": url}, {"$set": fields}, upsert=True))
+
+        if requests and self.collection is not None:
+            await self.collection.bulk_write(requests, ordered=False)
@@ -0,0 +1,68 @@
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+import asyncio
+import os
+
+
+class ParseExecutor:
+    """Runs CPU-bound work such as HTML parsing off the event loop.
+
+    Functions and their arguments must be picklable for the process
+    backend: module-level functions exchanging plain dicts, lists and strings.
+    """
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        raise NotImplementedError
+
+    def shutdown(self, wait: bool = True):
+        pass
+
+    async def __aenter__(self) -> 'ParseExecutor':
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.shutdown()
+
+
+class InlineExecutor(ParseExecutor):
+    """Runs work directly on the event loop; for tests and tiny workloads"""
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return fn(*args, **kwargs)
+
+
+class PoolExecutor(ParseExecutor):
+    """Runs work on a ``concurrent.futures`` executor, created on first use"""
+
+    def __init__(self, factory: Callable[[], Executor]):
+        self._factory = factory
+        self._pool: Optional[Executor] = None
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if self._pool is None:
+            self._pool = self._factory()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, partial(fn, *args, **kwargs))
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+class ProcessPoolParseExecutor(PoolExecutor):
+    """Process-pool backend, sized to the machine's cores by default"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        super().__init__(partial(ProcessPoolExecutor, max_workers=self.max_workers))
+
+
+def create_executor(kind: str = 'process', max_workers: Optional[int] = None) -> ParseExecutor:
+    """Build a parse executor: 'process' or 'inline'"""
+    if kind == 'process':
+        return ProcessPoolParseExecutor(max_workers)
+    if kind == 'inline':
+        return InlineExecutor()
+    raise ValueError(f"Unknown executor kind: {kind}")
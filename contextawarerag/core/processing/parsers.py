@@ -0,0 +1,103 @@
+"""HTML parsers for scraped catalog pages.
+
+These run in worker processes, so they are plain module-level functions
+that take and return only strings, dicts and lists.
+"""
+from typing import Any, Dict, List, Optional
+import logging
+
+from bs4 import BeautifulSoup
+
+from contextawarerag.core.processing.crawl_state import content_hash
+from contextawarerag.services.stats.catalog import parse_price
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'html.parser'
+
+PRODUCT_LINK_SELECTORS = [
+    '.product-tile a[href*="/product/"]',
+    '.product-grid a[href*="/product/"]',
+    '.product-list a[href*="/product/"]',
+    'a[href*="/product/"]'
+]
+
+
+def fastest_backend() -> str:
+    """Return 'lxml' when it is installed, else the stdlib parser"""
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        return DEFAULT_BACKEND
+    return 'lxml'
+
+
+def parse_product_html(
+    html: str,
+    category: str,
+    backend: str = DEFAULT_BACKEND,
+    url: Optional[str] = None
+) -> Dict[str, Any]:
+    """Parse product details from HTML"""
+    soup = BeautifulSoup(html, backend)
+    product = {}
+
+    try:
+        # Product name
+        name_elem = soup.select_one('.product-name, .product-title, h1')
+        if name_elem:
+            product['name'] = name_elem.text.strip()
+
+        # Price
+        price_elem = soup.select_one('.product-price, .price-sales, .price')
+        if price_elem:
+            price = parse_price(price_elem.text)
+            if price is not None:
+                product['price'] = price
+
+        # Description
+        desc_elem = soup.select_one('.product-description, .description, .product-details')
+        if desc_elem:
+            product['description'] = desc_elem.text.strip()
+
+        # Benefits
+        benefit_elems = soup.select('.benefits li, .product-benefits li, .key-benefits li')
+        product['benefits'] = [elem.text.strip() for elem in benefit_elems]
+
+        # Ingredients
+        ingr_elem = soup.select_one('.ingredients, .ingredient-list')
+        if ingr_elem:
+            product['ingredients'] = ingr_elem.text.strip()
+
+        # Product ID/SKU
+        sku_elem = soup.select_one('[data-product-id], [data-sku]')
+        if sku_elem:
+            product['id'] = sku_elem.get('data-product-id') or sku_elem.get('data-sku')
+        else:
+            # Derive the fallback id from the page so re-crawls keep it stable
+            product['id'] = f"NSK-{content_hash(url or product.get('name') or html)[:10]}"
+
+        product['category'] = category
+        return product
+
+    except Exception as e:
+        logger.error(f"Error parsing product: {e}")
+        return {}
+
+
+def extract_product_urls(html: str, base_url: str, backend: str = DEFAULT_BACKEND) -> List[str]:
+    """Extract product URLs from category page"""
+    soup = BeautifulSoup(html, backend)
+    urls = []
+
+    # Use the first selector that matches anything
+    for selector in PRODUCT_LINK_SELECTORS:
+        links = soup.select(selector)
+        if links:
+            for link in links:
+                href = link.get('href')
+                if href and '/product/' in href:
+                    urls.append(href if href.startswith('http') else f"{base_url}{href}")
+            break
+
+    return urls
@@ -0,0 +1,117 @@
+from collections import Counter
+from typing import Any, AsyncIterable, Awaitable, Callable, List, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+Stage = Callable[[Any], Awaitable[Any]]
+
+
+class CrawlPipeline:
+    """Staged async pipeline: discover -> fetch -> parse -> store.
+
+    Stages are joined by bounded queues, so a slow stage backs up the ones
+    before it instead of buffering without limit, and each stage runs its own
+    pool of workers. A stage returning ``None`` drops the item; exceptions are
+    logged and counted without stopping the run. Once ``limit`` items have
+    been stored the remaining work is cancelled.
+    """
+
+    def __init__(
+        self,
+        discover: Callable[[], AsyncIterable[Any]],
+        fetch: Stage,
+        parse: Stage,
+        store: Stage,
+        fetch_workers: int = 8,
+        parse_workers: int = 2,
+        store_workers: int = 2,
+        queue_size: int = 100,
+        limit: Optional[int] = None
+    ):
+        self.discover = discover
+        # (stage name, counter for items it passes on, function, workers)
+        self.stages = [
+            ('fetch', 'fetched', fetch, fetch_workers),
+            ('parse', 'parsed', parse, parse_workers),
+            ('store', 'stored', store, store_workers),
+        ]
+        self.queue_size = queue_size
+        self.limit = limit
+        self.stats: Counter = Counter()
+        self._claimed = 0
+        self._done: Optional[asyncio.Event] = None
+
+    async def _discover(self, queue: asyncio.Queue):
+        try:
+            async for item in self.discover():
+                if self._done.is_set():
+                    break
+                self.stats['discovered'] += 1
+                await queue.put(item)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.error(f"Pipeline discovery failed: {e}")
+
+    async def _worker(self, name: str, counter: str, fn: Stage, inbox: asyncio.Queue,
+                      outbox: Optional[asyncio.Queue]):
+        while True:
+            item = await inbox.get()
+            try:
+                if outbox is None:
+                    await self._store(fn, item)
+                    continue
+                result = await fn(item)
+                if result is not None:
+                    self.stats[counter] += 1
+                    await outbox.put(result)
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"Pipeline stage {name} failed: {e}")
+            finally:
+                inbox.task_done()
+
+    async def _store(self, fn: Stage, item: Any):
+        # Claim a slot before storing so concurrent workers never overshoot
+        if self.limit is not None and self._claimed >= self.limit:
+            return
+        self._claimed += 1
+        try:
+            await fn(item)
+        except BaseException:
+            self._claimed -= 1
+            raise
+        self.stats['stored'] += 1
+        if self.limit is not None and self.stats['stored'] >= self.limit:
+            self._done.set()
+
+    async def _drain(self, discoverer: asyncio.Task, queues: List[asyncio.Queue]):
+        await discoverer
+        for queue in queues:
+            await queue.join()
+        self._done.set()
+
+    async def run(self) -> Counter:
+        """Run until discovery is exhausted and drained, or ``limit`` is reached"""
+        self._done = asyncio.Event()
+        queues = [asyncio.Queue(self.queue_size) for _ in self.stages]
+        tasks = [asyncio.ensure_future(self._discover(queues[0]))]
+        for i, (name, counter, fn, workers) in enumerate(self.stages):
+            outbox = queues[i + 1] if i + 1 < len(queues) else None
+            tasks.extend(
+                asyncio.ensure_future(self._worker(name, counter, fn, queues[i], outbox))
+                for _ in range(workers)
+            )
+        drain = asyncio.ensure_future(self._drain(tasks[0], queues))
+
+        try:
+            await self._done.wait()
+        finally:
+            for task in tasks + [drain]:
+                task.cancel()
+            results = await asyncio.gather(*tasks, drain, return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception) and not isinstance(result, asyncio.CancelledError):
+                    logger.error(f"Pipeline task failed: {result}")
+        return self.stats
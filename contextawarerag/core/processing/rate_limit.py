@@ -0,0 +1,56 @@
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import asyncio
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursts up to ``capacity``"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _refill(self, now: float):
+        if self._updated is not None:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until ``tokens`` are available and take them"""
+        loop = asyncio.get_running_loop()
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # The lock serves waiters in arrival order
+        async with self._lock:
+            self._refill(loop.time())
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill(loop.time())
+            self._tokens -= tokens
+
+
+class HostRateLimiter:
+    """One token bucket per URL host, with optional per-host rate overrides"""
+
+    def __init__(self, rate: float = 1.0, capacity: float = 1.0,
+                 overrides: Optional[Dict[str, float]] = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.overrides = overrides or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc.lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(
+                self.overrides.get(host, self.rate), self.capacity
+            )
+        return bucket
+
+    async def acquire(self, url: str):
+        """Wait for a request slot on the URL's host"""
+        await self.bucket(url).acquire()
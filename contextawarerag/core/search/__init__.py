@@ -0,0 +1,4 @@
+"""Lexical search package."""
+from contextawarerag.core.search.bm25 import BM25Index, tokenize
+
+__all__ = ['BM25Index', 'tokenize']
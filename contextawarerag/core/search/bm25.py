@@ -0,0 +1,310 @@
+from array import array
+from collections import Counter
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+import re
+
+import numpy as np
+
+from contextawarerag.services.stats.catalog import parse_price
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in',
+    'is', 'it', 'of', 'on', 'or', 'that', 'the', 'to', 'with'
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into alphanumeric terms, dropping stopwords"""
+    return [term for term in _TOKEN_RE.findall(text.lower()) if term not in STOPWORDS]
+
+
+def _view(buffer, dtype) -> np.ndarray:
+    # Zero-copy view over an array.array; must not outlive the current call,
+    # since the underlying array cannot grow while a view is exported.
+    return np.frombuffer(buffer, dtype=dtype) if len(buffer) else np.empty(0, dtype=dtype)
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 ranking.
+
+    Postings are kept in append-only ``array.array`` buffers, so adding a
+    document is cheap, and are scored as NumPy views at query time. Removed
+    documents are tombstoned and reclaimed by ``compact``. An index restored
+    with ``from_state`` reads postings straight from the given arrays, and
+    copies a term's postings out only when a document adds to them.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, compact_ratio: float = 0.25):
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+        # term -> (slots, term frequencies)
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        # Read-only postings from from_state: (term -> row, offsets, slots, tfs)
+        self._base: Optional[Tuple[Dict[str, int], np.ndarray, np.ndarray, np.ndarray]] = None
+        self._doc_ids: List[Hashable] = []
+        self._doc_len = array('I')
+        self._category_codes = array('i')
+        # NaN where a document has no numeric price
+        self._prices = array('d')
+        self._categories: Dict[Optional[str], int] = {None: 0}
+        self._live = bytearray()
+        self._slots: Dict[Hashable, int] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._slots
+
+    def add(self, doc_id: Hashable, text: str, category: Optional[str] = None, price: Optional[float] = None):
+        """Index a document, replacing any previous version with the same id"""
+        if doc_id in self._slots:
+            self.remove(doc_id)
+
+        slot = len(self._doc_ids)
+        terms = tokenize(text)
+        for term, tf in Counter(terms).items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = self._copy_base(term)
+            postings[0].append(slot)
+            postings[1].append(tf)
+
+        self._doc_ids.append(doc_id)
+        self._doc_len.append(len(terms))
+        self._category_codes.append(self._categories.setdefault(category, len(self._categories)))
+        self._prices.append(np.nan if price is None else price)
+        self._live.append(1)
+        self._slots[doc_id] = slot
+        self._total_len += len(terms)
+
+    def add_document(self, document: Dict[str, Any]):
+        """Index a ``rag_content`` document"""
+        metadata = document.get("metadata") or {}
+        # Documents stored before prices were numeric may still hold strings
+        self.add(document["_id"], document.get("content", ""), metadata.get("category"),
+                 parse_price(metadata.get("price")))
+
+    def remove(self, doc_id: Hashable) -> bool:
+        """Tombstone a document; returns False if it was not indexed"""
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return False
+        self._live[slot] = 0
+        self._total_len -= self._doc_len[slot]
+
+        dead = len(self._doc_ids) - len(self._slots)
+        if dead > self.compact_ratio * len(self._doc_ids):
+            self.compact()
+        return True
+
+    def _copy_base(self, term: str) -> Tuple[array, array]:
+        """Appendable postings for a term, starting from the base arrays"""
+        slots, tfs = array('I'), array('I')
+        if self._base is not None:
+            rows, offsets, base_slots, base_tfs = self._base
+            row = rows.get(term)
+            if row is not None:
+                start, stop = offsets[row], offsets[row + 1]
+                slots.frombytes(base_slots[start:stop].tobytes())
+                tfs.frombytes(base_tfs[start:stop].tobytes())
+        return slots, tfs
+
+    def _term_postings(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        postings = self._postings.get(term)
+        if postings is not None:
+            return _view(postings[0], np.uint32), _view(postings[1], np.uint32)
+        if self._base is not None:
+            rows, offsets, base_slots, base_tfs = self._base
+            row = rows.get(term)
+            if row is not None:
+                start, stop = offsets[row], offsets[row + 1]
+                return base_slots[start:stop], base_tfs[start:stop]
+        return None
+
+    def _materialize(self):
+        if self._base is not None:
+            for term in self._base[0]:
+                if term not in self._postings:
+                    self._postings[term] = self._copy_base(term)
+            self._base = None
+
+    def compact(self):
+        """Drop tombstoned slots and renumber the remaining documents"""
+        self._materialize()
+        live = _view(self._live, np.uint8).astype(bool)
+        remap = np.cumsum(live, dtype=np.int64) - 1
+
+        postings = {}
+        for term, (slots, tfs) in self._postings.items():
+            slot_view = _view(slots, np.uint32)
+            keep = live[slot_view]
+            if not keep.any():
+                continue
+            new_slots, new_tfs = array('I'), array('I')
+            new_slots.frombytes(remap[slot_view[keep]].astype(np.uint32).tobytes())
+            new_tfs.frombytes(_view(tfs, np.uint32)[keep].tobytes())
+            postings[term] = (new_slots, new_tfs)
+
+        doc_len, codes = array('I'), array('i')
+        doc_len.frombytes(_view(self._doc_len, np.uint32)[live].tobytes())
+        codes.frombytes(_view(self._category_codes, np.int32)[live].tobytes())
+        prices = array('d')
+        prices.frombytes(_view(self._prices, np.float64)[live].tobytes())
+
+        self._postings = postings
+        self._doc_ids = [doc_id for doc_id, alive in zip(self._doc_ids, live) if alive]
+        self._doc_len = doc_len
+        self._category_codes = codes
+        self._prices = prices
+        self._live = bytearray(b'\x01') * len(self._doc_ids)
+        self._slots = {doc_id: slot for slot, doc_id in enumerate(self._doc_ids)}
+
+    @property
+    def doc_ids(self) -> List[Hashable]:
+        """Indexed ids by slot, including tombstoned ones"""
+        return list(self._doc_ids)
+
+    def state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """The index as arrays plus JSON-serializable metadata, for ``from_state``.
+
+        Compacts first, so slot ``i`` of the arrays is ``doc_ids[i]``.
+        """
+        if len(self._slots) < len(self._doc_ids):
+            self.compact()
+        self._materialize()
+        terms = list(self._postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(self._postings[term][0]) for term in terms], out=offsets[1:])
+        arrays = {
+            'postings_offsets': offsets,
+            'slots': np.concatenate([_view(self._postings[t][0], np.uint32) for t in terms] or
+                                    [np.empty(0, dtype=np.uint32)]),
+            'tfs': np.concatenate([_view(self._postings[t][1], np.uint32) for t in terms] or
+                                  [np.empty(0, dtype=np.uint32)]),
+            'doc_len': _view(self._doc_len, np.uint32).copy(),
+            'category_codes': _view(self._category_codes, np.int32).copy(),
+            'prices': _view(self._prices, np.float64).copy(),
+        }
+        meta = {
+            'terms': terms,
+            'categories': [c for c, _ in sorted(self._categories.items(), key=lambda item: item[1])],
+            'k1': self.k1,
+            'b': self.b,
+        }
+        return arrays, meta
+
+    @classmethod
+    def from_state(
+        cls,
+        doc_ids: Sequence[Hashable],
+        arrays: Dict[str, np.ndarray],
+        meta: Dict[str, Any],
+        **params: float
+    ) -> 'BM25Index':
+        """Restore an index from ``state``; the arrays may be memory-mapped.
+
+        ``params`` override the saved ``k1`` and ``b``, which only apply at
+        query time.
+        """
+        index = cls(**{'k1': meta['k1'], 'b': meta['b'], **params})
+        index._base = ({term: row for row, term in enumerate(meta['terms'])},
+                       arrays['postings_offsets'], arrays['slots'], arrays['tfs'])
+        index._doc_ids = list(doc_ids)
+        index._doc_len.frombytes(np.ascontiguousarray(arrays['doc_len'], dtype=np.uint32).tobytes())
+        index._category_codes.frombytes(
+            np.ascontiguousarray(arrays['category_codes'], dtype=np.int32).tobytes())
+        index._prices.frombytes(np.ascontiguousarray(arrays['prices'], dtype=np.float64).tobytes())
+        index._categories = {c: code for code, c in enumerate(meta['categories'])}
+        index._live = bytearray(b'\x01') * len(index._doc_ids)
+        index._slots = {doc_id: slot for slot, doc_id in enumerate(index._doc_ids)}
+        index._total_len = int(np.sum(arrays['doc_len'], dtype=np.int64))
+        return index
+
+    def search(
+        self,
+        query: str,
+        k: int = 5,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """Return the top ``k`` (doc_id, score) pairs for a query, best first.
+
+        ``min_price`` and ``max_price`` are inclusive bounds; documents
+        without a numeric price are excluded once either is given.
+        """
+        n_docs = len(self._slots)
+        if not n_docs or k <= 0:
+            return []
+        code = None
+        # An empty category, as handlers send when none is chosen, means no filter
+        if category:
+            code = self._categories.get(category)
+            if code is None:
+                return []
+
+        k1, b = self.k1, self.b
+        avgdl = self._total_len / n_docs or 1.0
+        live = _view(self._live, np.uint8)
+        doc_len = _view(self._doc_len, np.uint32)
+        codes = _view(self._category_codes, np.int32)
+        prices = _view(self._prices, np.float64)
+
+        parts = []
+        for term in set(tokenize(query)):
+            postings = self._term_postings(term)
+            if postings is None:
+                continue
+            slots, tfs = postings
+            df = len(slots)
+            idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+            keep = live[slots].astype(bool)
+            if code is not None:
+                keep &= codes[slots] == code
+            if min_price is not None:
+                keep &= prices[slots] >= min_price
+            if max_price is not None:
+                keep &= prices[slots] <= max_price
+            slots, tfs = slots[keep], tfs[keep]
+            if len(slots):
+                norm = k1 * (1.0 - b + b * doc_len[slots] / avgdl)
+                parts.append((slots, idf * tfs * (k1 + 1) / (tfs + norm)))
+        if not parts:
+            return []
+
+        if len(parts) == 1:
+            candidates, scores = parts[0]
+        elif sum(len(slots) for slots, _ in parts) * 16 < len(self._doc_ids):
+            # Few postings: sum contributions sparsely instead of over every slot
+            all_slots = np.concatenate([slots for slots, _ in parts])
+            candidates, inverse = np.unique(all_slots, return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate([c for _, c in parts]))
+        else:
+            dense = np.zeros(len(self._doc_ids), dtype=np.float64)
+            for slots, contribution in parts:
+                # A term occurs at most once per document, so fancy-index += is safe
+                dense[slots] += contribution
+            candidates = np.concatenate([slots for slots, _ in parts])
+            scores = dense[candidates]
+            # Each document appears once per matching term; over-select, then dedupe
+            top = _top_indices(scores, k * len(parts))
+            candidates, first = np.unique(candidates[top], return_index=True)
+            scores = scores[top][first]
+
+        top = _top_indices(scores, k)
+        return [(self._doc_ids[candidates[i]], float(scores[i])) for i in top]
+
+
+def _top_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest scores, best first"""
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind='stable')]
@@ -0,0 +1,14 @@
+"""Snapshots of rag_content and its search indexes for fast warm starts."""
+from typing import TYPE_CHECKING
+
+from contextawarerag._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from contextawarerag.core.snapshot.snapshot import Snapshot, SnapshotWriter
+
+__all__ = ['Snapshot', 'SnapshotWriter']
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'Snapshot': 'contextawarerag.core.snapshot.snapshot',
+    'SnapshotWriter': 'contextawarerag.core.snapshot.snapshot',
+})
@@ -0,0 +1,416 @@
+"""Compact on-disk snapshots of rag_content and its search indexes.
+
+A snapshot is a directory of flat files, so a replica can map it and serve
+searches without scanning the database or re-tokenizing the corpus:
+
+- ``ids``, ``content`` and ``extra`` are packed blobs (``.bin``) with an
+  ``.offsets.npy`` array of row boundaries; ``extra`` holds each document's
+  remaining fields and metadata as BSON.
+- ``category``, ``content_type``, ``price`` and ``updated_at`` are one
+  ``.npy`` column each; the string columns are codes into a vocabulary
+  kept in the manifest, with None at code 0.
+- ``bm25.*`` is the BM25Index state, aligned with the rows.
+- ``embeddings.npy``, when present, holds one float32 vector per row.
+- ``manifest.json`` records the format version, the row count and the
+  watermark: every write before it is in the snapshot, so a loader only
+  needs documents updated at or after it.
+
+The directory is written under a temporary name, synced and swapped into
+place, so readers never see a partial snapshot.
+"""
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Dict, Hashable, Iterator, List, Optional, Tuple
+import json
+import math
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+
+import bson
+import numpy as np
+from bson import ObjectId
+
+from contextawarerag.core.search import BM25Index
+
+if TYPE_CHECKING:
+    from contextawarerag.core.vectorstore import VectorIndex
+
+VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+# Encodings of an _id in the ids blob
+ID_STR, ID_OBJECTID, ID_INT, ID_BSON = 0, 1, 2, 3
+
+EPOCH = datetime(1970, 1, 1)
+MISSING_TIME = np.iinfo(np.int64).min
+
+BM25_ARRAYS = ('postings_offsets', 'slots', 'tfs', 'doc_len', 'category_codes', 'prices')
+
+# Bytes reserved at the start of a streamed .npy file for its header
+NPY_HEADER_SIZE = 128
+
+
+def _utc(moment: datetime) -> datetime:
+    """Naive UTC, as BSON dates are returned by default"""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def _encode_id(doc_id: Hashable) -> Tuple[int, bytes]:
+    if isinstance(doc_id, str):
+        return ID_STR, doc_id.encode('utf-8')
+    if isinstance(doc_id, ObjectId):
+        return ID_OBJECTID, doc_id.binary
+    if isinstance(doc_id, int) and not isinstance(doc_id, bool) and -2 ** 63 <= doc_id < 2 ** 63:
+        return ID_INT, doc_id.to_bytes(8, 'little', signed=True)
+    return ID_BSON, bson.encode({'_id': doc_id})
+
+
+def _decode_id(kind: int, data: bytes) -> Hashable:
+    if kind == ID_STR:
+        return data.decode('utf-8')
+    if kind == ID_OBJECTID:
+        return ObjectId(data)
+    if kind == ID_INT:
+        return int.from_bytes(data, 'little', signed=True)
+    return bson.decode(data)['_id']
+
+
+def _fsync_dir(path: str):
+    # Makes renames within the directory durable; not possible on Windows
+    if hasattr(os, 'O_DIRECTORY'):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class _BlobWriter:
+    """Variable-length values appended to one file, with their boundaries"""
+
+    def __init__(self, directory: str, name: str):
+        self._directory = directory
+        self._name = name
+        self._file = open(os.path.join(directory, f"{name}.bin"), 'wb')
+        self._offsets = array('q', [0])
+
+    def append(self, data: bytes):
+        self._file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+    def close(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        _save(self._directory, f"{self._name}.offsets", np.frombuffer(self._offsets, dtype=np.int64))
+
+
+class _RowWriter:
+    """Float32 rows of ``dim`` values appended to an .npy file as they arrive.
+
+    The row count is only known at the end, so room for the header is
+    reserved up front and the header written over it on close.
+    """
+
+    def __init__(self, directory: str, name: str, dim: int):
+        self.dim = dim
+        self.rows = 0
+        self._file = open(os.path.join(directory, f"{name}.npy"), 'wb')
+        self._file.write(bytes(NPY_HEADER_SIZE))
+
+    def append(self, row: np.ndarray):
+        self._file.write(np.ascontiguousarray(row, dtype='<f4').tobytes())
+        self.rows += 1
+
+    def close(self):
+        header = repr({'descr': '<f4', 'fortran_order': False, 'shape': (self.rows, self.dim)}).encode('latin1')
+        magic = np.lib.format.magic(1, 0)
+        # Format 1.0: magic, header length, then the header padded with
+        # spaces and ending in a newline
+        length = NPY_HEADER_SIZE - len(magic) - 2
+        self._file.seek(0)
+        self._file.write(magic + struct.pack('<H', length) + header.ljust(length - 1) + b'\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+
+
+class _Blob:
+    """Read side of ``_BlobWriter``, memory-mapped"""
+
+    def __init__(self, directory: str, name: str):
+        self.offsets = np.load(os.path.join(directory, f"{name}.offsets.npy"), mmap_mode='r')
+        path = os.path.join(directory, f"{name}.bin")
+        self._map = None
+        if os.path.getsize(path):
+            with open(path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __getitem__(self, row: int) -> bytes:
+        if self._map is None:
+            return b''
+        return self._map[int(self.offsets[row]):int(self.offsets[row + 1])]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+def _save(directory: str, name: str, values: np.ndarray):
+    with open(os.path.join(directory, f"{name}.npy"), 'wb') as f:
+        np.save(f, values)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _load(directory: str, name: str, mmap_mode: Optional[str] = 'r') -> np.ndarray:
+    return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+
+
+class _Vocabulary:
+    def __init__(self):
+        self.codes: Dict[Optional[str], int] = {None: 0}
+
+    def code(self, value: Optional[str]) -> int:
+        return self.codes.setdefault(value, len(self.codes))
+
+    def values(self) -> List[Optional[str]]:
+        return list(self.codes)
+
+
+class SnapshotWriter:
+    """Stream documents into a new snapshot at ``path``.
+
+    ``watermark`` must not be later than the start of the scan feeding the
+    writer; it defaults to now. Pass ``dim`` to store one vector per
+    document, and ``search`` for the BM25Index parameters. Use as a context
+    manager, or call ``commit``; leaving the block on an exception discards
+    the partial snapshot and keeps any previous one.
+    """
+
+    def __init__(self, path: str, watermark: Optional[datetime] = None, dim: Optional[int] = None,
+                 search: Optional[Dict[str, Any]] = None):
+        self.path = path
+        watermark = _utc(watermark or datetime.now(timezone.utc))
+        # Floored to the millisecond precision of the stored updated_at
+        self.watermark = watermark.replace(microsecond=watermark.microsecond // 1000 * 1000)
+        self.dim = dim
+        self._parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(self._parent, exist_ok=True)
+        self._tmp = tempfile.mkdtemp(prefix='.snapshot-', dir=self._parent)
+        self._ids = _BlobWriter(self._tmp, 'ids')
+        self._id_kinds = array('b')
+        self._content = _BlobWriter(self._tmp, 'content')
+        self._extra = _BlobWriter(self._tmp, 'extra')
+        self._categories = _Vocabulary()
+        self._content_types = _Vocabulary()
+        self._category_codes = array('i')
+        self._content_type_codes = array('i')
+        self._prices = array('d')
+        self._updated_at = array('q')
+        # Written as they arrive, so export never holds every vector
+        self._vectors = _RowWriter(self._tmp, 'embeddings', dim) if dim is not None else None
+        self._index = BM25Index(**(search or {}))
+
+    def __len__(self) -> int:
+        return len(self._id_kinds)
+
+    def add(self, document: Dict[str, Any], vector: Optional[np.ndarray] = None):
+        """Append a rag_content document, with its vector when ``dim`` is set"""
+        doc_id = document['_id']
+        if doc_id in self._index:
+            raise ValueError(f"Duplicate document id in snapshot: {doc_id!r}")
+        if self.dim is not None:
+            if vector is None:
+                raise ValueError(f"Document {doc_id!r} has no vector")
+            vector = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+            norm = np.linalg.norm(vector)
+            # VectorIndex maps the rows as they are, so they are stored normalized
+            self._vectors.append(vector / norm if norm > 0 else vector)
+
+        kind, data = _encode_id(doc_id)
+        self._id_kinds.append(kind)
+        self._ids.append(data)
+        self._content.append((document.get('content') or '').encode('utf-8'))
+
+        metadata = dict(document.get('metadata') or {})
+        self._category_codes.append(self._categories.code(metadata.pop('category', None)))
+        price = metadata.get('price')
+        if isinstance(price, (int, float)) and not isinstance(price, bool):
+            self._prices.append(float(metadata.pop('price')))
+        else:
+            # Missing, or a legacy non-numeric value kept with the rest
+            self._prices.append(math.nan)
+        self._content_type_codes.append(self._content_types.code(document.get('content_type')))
+        updated_at = document.get('updated_at')
+        if isinstance(updated_at, datetime):
+            self._updated_at.append((_utc(updated_at) - EPOCH) // timedelta(milliseconds=1))
+        else:
+            self._updated_at.append(MISSING_TIME)
+
+        extra = {key: value for key, value in document.items()
+                 if key not in ('_id', 'content', 'content_type', 'metadata', 'updated_at')}
+        if metadata:
+            extra['metadata'] = metadata
+        self._extra.append(bson.encode(extra) if extra else b'')
+        self._index.add_document(document)
+
+    def commit(self) -> Dict[str, Any]:
+        """Write the columns and indexes, then swap the snapshot into place"""
+        tmp = self._tmp
+        for blob in self._files():
+            blob.close()
+        _save(tmp, 'ids.kinds', np.frombuffer(self._id_kinds, dtype=np.int8))
+        _save(tmp, 'category', np.frombuffer(self._category_codes, dtype=np.int32))
+        _save(tmp, 'content_type', np.frombuffer(self._content_type_codes, dtype=np.int32))
+        _save(tmp, 'price', np.frombuffer(self._prices, dtype=np.float64))
+        _save(tmp, 'updated_at', np.frombuffer(self._updated_at, dtype=np.int64))
+
+        arrays, bm25 = self._index.state()
+        for name in BM25_ARRAYS:
+            _save(tmp, f"bm25.{name}", arrays[name])
+        terms = _BlobWriter(tmp, 'bm25.terms')
+        for term in bm25.pop('terms'):
+            terms.append(term.encode('utf-8'))
+        terms.close()
+
+        manifest = {
+            'version': VERSION,
+            'watermark': self.watermark.isoformat(),
+            'count': len(self),
+            'categories': self._categories.values(),
+            'content_types': self._content_types.values(),
+            'bm25': bm25,
+            'dim': self.dim,
+        }
+        with open(os.path.join(tmp, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        _fsync_dir(tmp)
+
+        # Directories cannot be replaced over a non-empty target, so move the
+        # old copy aside first; readers only ever see a complete directory.
+        old = None
+        if os.path.isdir(self.path):
+            old = tempfile.mkdtemp(prefix='.snapshot-old-', dir=self._parent)
+            os.replace(self.path, os.path.join(old, 'snapshot'))
+        os.replace(tmp, self.path)
+        _fsync_dir(self._parent)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+        self._tmp = None
+        return manifest
+
+    def _files(self) -> List[Any]:
+        return [self._ids, self._content, self._extra] + ([self._vectors] if self._vectors is not None else [])
+
+    def abort(self):
+        """Discard the partial snapshot"""
+        if self._tmp is not None:
+            for blob in self._files():
+                blob._file.close()
+            shutil.rmtree(self._tmp, ignore_errors=True)
+            self._tmp = None
+
+    def __enter__(self) -> 'SnapshotWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+class Snapshot:
+    """A snapshot written by SnapshotWriter, opened read-only.
+
+    Columns and index arrays are memory-mapped, so opening costs the
+    manifest, the ids and the term dictionary; document bodies are only
+    read by ``document``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('version') != VERSION:
+            raise ValueError(f"Unsupported snapshot version {self.manifest.get('version')} at {path}")
+        self.watermark = datetime.fromisoformat(self.manifest['watermark'])
+        self.dim: Optional[int] = self.manifest['dim']
+
+        ids = _Blob(path, 'ids')
+        kinds = _load(path, 'ids.kinds', None)
+        self.ids: List[Hashable] = [_decode_id(int(kind), ids[row]) for row, kind in enumerate(kinds)]
+        ids.close()
+        self._content = _Blob(path, 'content')
+        self._extra = _Blob(path, 'extra')
+        self.categories = _load(path, 'category')
+        self.content_types = _load(path, 'content_type')
+        self.prices = _load(path, 'price')
+        self.updated_at = _load(path, 'updated_at')
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def document(self, row: int) -> Dict[str, Any]:
+        """Rebuild the document stored at ``row``"""
+        extra = self._extra[row]
+        document = bson.decode(extra) if extra else {}
+        metadata = document.pop('metadata', {})
+        category = self.manifest['categories'][self.categories[row]]
+        if category is not None:
+            metadata['category'] = category
+        price = float(self.prices[row])
+        if not math.isnan(price):
+            metadata['price'] = price
+        document.update({
+            '_id': self.ids[row],
+            'content': self._content[row].decode('utf-8'),
+            'metadata': metadata,
+        })
+        content_type = self.manifest['content_types'][self.content_types[row]]
+        if content_type is not None:
+            document['content_type'] = content_type
+        if self.updated_at[row] != MISSING_TIME:
+            document['updated_at'] = EPOCH + timedelta(milliseconds=int(self.updated_at[row]))
+        return document
+
+    def documents(self) -> Iterator[Dict[str, Any]]:
+        for row in range(len(self)):
+            yield self.document(row)
+
+    def search_index(self, **params: float) -> BM25Index:
+        """The BM25 index over the snapshot, reading postings from the mapped arrays"""
+        arrays = {name: _load(self.path, f"bm25.{name}") for name in BM25_ARRAYS}
+        terms = _Blob(self.path, 'bm25.terms')
+        meta = dict(self.manifest['bm25'],
+                    terms=[terms[row].decode('utf-8') for row in range(len(terms.offsets) - 1)])
+        terms.close()
+        return BM25Index.from_state(self.ids, arrays, meta, **params)
+
+    def vector_index(self, block_size: int = 65536) -> 'VectorIndex':
+        """The vector index over the stored embeddings, mapped read-only"""
+        from contextawarerag.core.vectorstore import VectorIndex
+
+        if self.dim is None:
+            raise ValueError(f"Snapshot at {self.path} has no embeddings")
+        return VectorIndex.from_arrays(self.ids, _load(self.path, 'embeddings'), np.ones(len(self), dtype=bool),
+                                       self.categories, self.manifest['categories'], block_size=block_size)
+
+    def close(self):
+        self._content.close()
+        self._extra.close()
+
+    def __enter__(self) -> 'Snapshot':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,18 @@
+"""Storage backends behind DataManager's document collections."""
+from typing import TYPE_CHECKING
+
+from contextawarerag._lazy import lazy_exports
+
+if TYPE_CHECKING:
+    from contextawarerag.core.storage.base import StorageBackend, create_backend
+    from contextawarerag.core.storage.embedded import EmbeddedBackend
+    from contextawarerag.core.storage.mongo import MotorBackend
+
+__all__ = ['EmbeddedBackend', 'MotorBackend', 'StorageBackend', 'create_backend']
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'EmbeddedBackend': 'contextawarerag.core.storage.embedded',
+    'MotorBackend': 'contextawarerag.core.storage.mongo',
+    'StorageBackend': 'contextawarerag.core.storage.base',
+    'create_backend': 'contextawarerag.core.storage.base',
+})
@@ -0,0 +1,40 @@
+from typing import Any, Dict
+
+
+class StorageBackend:
+    """Where DataManager keeps its document collections.
+
+    ``database`` exposes collections by attribute or item with the subset
+    of motor's API the package uses, so callers are the same whichever
+    backend is configured.
+    """
+
+    name = 'storage'
+    database: Any = None
+
+    async def ping(self):
+        """Raise if the backend is unreachable"""
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+
+def create_backend(config: Dict[str, Any]) -> StorageBackend:
+    """The backend selected by ``config['storage']['backend']``.
+
+    ``'mongodb'``, the default, connects with motor using the ``mongodb``
+    section; ``'embedded'`` passes the rest of the ``storage`` section to
+    EmbeddedBackend.
+    """
+    settings = dict(config.get('storage', {}))
+    backend = settings.pop('backend', 'mongodb')
+    if backend == 'mongodb':
+        from contextawarerag.core.storage.mongo import MotorBackend
+
+        return MotorBackend(config['mongodb']['uri'], config['mongodb']['database'], **settings)
+    if backend == 'embedded':
+        from contextawarerag.core.storage.embedded import EmbeddedBackend
+
+        return EmbeddedBackend(**settings)
+    raise ValueError(f"Unknown storage backend: {backend}")
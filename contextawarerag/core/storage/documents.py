@@ -0,0 +1,603 @@
+"""A small document query engine shared by the local storage backends.
+
+``DocumentCollection`` implements the subset of motor's collection API the
+package uses: equality, ``$eq``/``$ne``, ``$in``/``$nin``, range,
+``$regex``, ``$exists``, ``$size`` and ``$type`` filters, ``$and``/``$or``,
+inclusion projections, ``$set``/``$unset``/``$inc``/``$min``/``$max``
+updates and bulk writes. A condition on an array field matches when the array or any of its
+elements does, as in Mongo. Other operators raise NotImplementedError rather
+than being ignored. Subclasses only decide where documents live. Lookups by
+``_id``, and equality or ``$in`` lookups on the first field of an index, go
+through hash indexes; anything else scans. Single-field unique indexes are
+enforced; unique indexes this engine cannot enforce are refused.
+"""
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Set, Tuple
+import copy
+import itertools
+import re
+from types import SimpleNamespace
+
+import pymongo
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+_RANGE_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    '$gt': lambda value, arg: value > arg,
+    '$gte': lambda value, arg: value >= arg,
+    '$lt': lambda value, arg: value < arg,
+    '$lte': lambda value, arg: value <= arg,
+}
+
+# $type aliases, for the types a BSON value decodes to
+_TYPES: Dict[str, type] = {
+    'string': str,
+    'double': float,
+    'int': int,
+    'long': int,
+    'bool': bool,
+    'object': dict,
+    'array': list,
+    'null': type(None),
+}
+
+# Documents a cursor reads per call to DocumentCollection._run
+CURSOR_BATCH_SIZE = 100
+
+# Stands in for a field the document does not have
+MISSING = object()
+
+
+def get_path(doc: Any, path: str, default: Any = None) -> Any:
+    """Value at a dotted path, or ``default`` when any part is missing"""
+    value = doc
+    for part in path.split('.'):
+        if not isinstance(value, dict) or part not in value:
+            return default
+        value = value[part]
+    return value
+
+
+def _elements(value: Any) -> List[Any]:
+    # What a condition is tested against: an array itself and each element
+    if isinstance(value, list):
+        return [value, *value]
+    return [value]
+
+
+def _equals(value: Any, arg: Any) -> bool:
+    if value is MISSING:
+        # {field: None} also matches documents without the field
+        return arg is None
+    return any(candidate == arg for candidate in _elements(value))
+
+
+def _compare(op: str, value: Any, arg: Any) -> bool:
+    if value is MISSING:
+        return False
+    for candidate in _elements(value):
+        try:
+            if candidate is not None and _RANGE_OPS[op](candidate, arg):
+                return True
+        except TypeError:
+            # Mongo only compares values of the same type
+            pass
+    return False
+
+
+def _type(value: Any, alias: Any) -> bool:
+    if alias not in _TYPES:
+        raise NotImplementedError(f"Unsupported $type: {alias!r}")
+    kind = _TYPES[alias]
+    if value is MISSING:
+        return False
+    return any(isinstance(candidate, kind) and (kind is bool or not isinstance(candidate, bool))
+               for candidate in _elements(value))
+
+
+def _regex(value: Any, pattern: Any, options: str) -> bool:
+    if value is MISSING:
+        return False
+    flags = re.I if 'i' in options else 0
+    return any(isinstance(candidate, str) and re.search(pattern, candidate, flags)
+               for candidate in _elements(value))
+
+
+def _match_operator(value: Any, op: str, arg: Any, condition: Dict[str, Any]) -> bool:
+    if op == '$eq':
+        return _equals(value, arg)
+    if op == '$ne':
+        return not _equals(value, arg)
+    if op == '$in':
+        return any(_equals(value, item) for item in arg)
+    if op == '$nin':
+        return not any(_equals(value, item) for item in arg)
+    if op in _RANGE_OPS:
+        return _compare(op, value, arg)
+    if op == '$regex':
+        return _regex(value, arg, condition.get('$options', ''))
+    if op == '$options':
+        return True
+    if op == '$exists':
+        return (value is not MISSING) == bool(arg)
+    if op == '$size':
+        return isinstance(value, list) and len(value) == arg
+    if op == '$type':
+        return _type(value, arg)
+    raise NotImplementedError(f"Unsupported query operator: {op}")
+
+
+def _match_value(value: Any, condition: Any) -> bool:
+    if isinstance(condition, dict) and any(key.startswith('$') for key in condition):
+        return all(_match_operator(value, op, arg, condition) for op, arg in condition.items())
+    return _equals(value, condition)
+
+
+def matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in query.items():
+        if key == '$or':
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == '$and':
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif key.startswith('$'):
+            raise NotImplementedError(f"Unsupported query operator: {key}")
+        elif not _match_value(get_path(doc, key, MISSING), condition):
+            return False
+    return True
+
+
+def _parent(doc: Dict[str, Any], path: str):
+    """The dict holding the last part of a dotted path, created as needed"""
+    *parents, leaf = path.split('.')
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    return doc, leaf
+
+
+def upsert_seed(query: Dict[str, Any]) -> Dict[str, Any]:
+    """The document an upsert starts from: the filter's equality conditions"""
+    seed: Dict[str, Any] = {}
+    for path, condition in query.items():
+        if path.startswith('$') or (isinstance(condition, dict) and any(k.startswith('$') for k in condition)):
+            continue
+        parent, leaf = _parent(seed, path)
+        parent[leaf] = copy.deepcopy(condition)
+    return seed
+
+
+def apply_update(doc: Dict[str, Any], update: Dict[str, Any]):
+    """Apply the ``$set``, ``$unset``, ``$inc``, ``$min`` and ``$max`` operators"""
+    for path, value in update.get('$set', {}).items():
+        parent, leaf = _parent(doc, path)
+        parent[leaf] = copy.deepcopy(value)
+    for path in update.get('$unset', {}):
+        parent, leaf = _parent(doc, path)
+        parent.pop(leaf, None)
+    for path, amount in update.get('$inc', {}).items():
+        parent, leaf = _parent(doc, path)
+        parent[leaf] = parent.get(leaf, 0) + amount
+    for op, pick in (('$min', min), ('$max', max)):
+        for path, value in update.get(op, {}).items():
+            parent, leaf = _parent(doc, path)
+            parent[leaf] = pick(parent[leaf], value) if leaf in parent else value
+
+
+def lookup_values(condition: Any) -> Optional[List[Any]]:
+    """Values an equality or ``$in`` condition selects, or None for other operators"""
+    if isinstance(condition, dict):
+        if set(condition) != {'$in'}:
+            return None
+        values = list(condition['$in'])
+    else:
+        values = [condition]
+    return values if all(isinstance(v, Hashable) for v in values) else None
+
+
+def project(doc: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply an inclusion projection, or a top-level exclusion one"""
+    if not projection:
+        return doc
+    included = [path for path, keep in projection.items() if keep and path != '_id']
+    if not included:
+        return {key: value for key, value in doc.items() if projection.get(key, 1)}
+    result = {}
+    if projection.get('_id', 1) and '_id' in doc:
+        result['_id'] = doc['_id']
+    for path in included:
+        *parents, leaf = path.split('.')
+        source, target = doc, result
+        for part in parents:
+            source = source.get(part) if isinstance(source, dict) else None
+            target = target.setdefault(part, {})
+        if isinstance(source, dict) and leaf in source:
+            target[leaf] = source[leaf]
+    return result
+
+
+# pymongo has no public accessors for a write model's contents, so they are
+# read from attributes that have been stable throughout pymongo 4
+_BULK_FIELDS = {
+    InsertOne: ('doc',),
+    ReplaceOne: ('filter', 'doc', 'upsert'),
+    UpdateOne: ('filter', 'doc', 'upsert'),
+    UpdateMany: ('filter', 'doc', 'upsert'),
+    DeleteOne: ('filter',),
+    DeleteMany: ('filter',),
+}
+
+
+def _bulk_request(request: Any) -> Tuple[type, Dict[str, Any]]:
+    """``(model type, fields)`` for a pymongo write model"""
+    kind = type(request)
+    names = _BULK_FIELDS.get(kind)
+    if names is None:
+        raise NotImplementedError(f"Unsupported bulk write request: {kind.__name__}")
+    if pymongo.version_tuple[0] != 4:
+        raise NotImplementedError(f"Bulk writes are not supported with pymongo {pymongo.version}")
+    try:
+        return kind, {name: getattr(request, f"_{name}") for name in names}
+    except AttributeError as e:
+        raise NotImplementedError(f"Cannot read {kind.__name__} from pymongo {pymongo.version}") from e
+
+
+class DocumentCursor:
+    """Lazily evaluated query results, supporting ``limit``, ``to_list`` and ``explain``"""
+
+    def __init__(self, collection: 'DocumentCollection', query: Dict[str, Any],
+                 projection: Optional[Dict[str, Any]] = None):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._limit = 0
+
+    def limit(self, n: int) -> 'DocumentCursor':
+        self._limit = n
+        return self
+
+    def _results(self) -> Iterator[Dict[str, Any]]:
+        found = (doc for doc in self._collection._candidates(self._query) if matches(doc, self._query))
+        if self._limit:
+            found = itertools.islice(found, self._limit)
+        for doc in found:
+            yield self._collection._export(project(doc, self._projection))
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        results = self._results()
+        while True:
+            batch = await self._collection._run(lambda: list(itertools.islice(results, CURSOR_BATCH_SIZE)))
+            if not batch:
+                return
+            for doc in batch:
+                yield doc
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        results = self._results()
+        return await self._collection._run(lambda: list(itertools.islice(results, length) if length else results))
+
+    async def explain(self) -> Dict[str, Any]:
+        """A minimal explain document: the winning plan and execution stats"""
+        return await self._collection._run(self._explain)
+
+    def _explain(self) -> Dict[str, Any]:
+        field = self._collection._index_field(self._query)
+        examined = self._collection._candidate_ids(self._query)
+        returned = sum(1 for doc_id in examined if matches(self._collection._load(doc_id), self._query))
+        plan = ({'stage': 'FETCH', 'inputStage': {'stage': 'IXSCAN', 'keyPattern': {field: 1}}}
+                if field else {'stage': 'COLLSCAN'})
+        return {
+            'queryPlanner': {'winningPlan': plan},
+            'executionStats': {
+                'executionTimeMillis': 0,
+                'nReturned': min(returned, self._limit) if self._limit else returned,
+                'totalDocsExamined': len(examined),
+            },
+        }
+
+
+class DocumentCollection:
+    """Query, update and index logic over an abstract document store.
+
+    Subclasses provide ``_ids``, ``_contains``, ``_load``, ``_store``,
+    ``_delete`` and ``_position``. Documents from ``_load`` are read-only;
+    ``_export`` turns one into a copy the caller may keep. ``_commit`` runs
+    after every write operation. Every operation runs through ``_run``,
+    which subclasses doing blocking I/O override to leave the event loop.
+    Unique indexes are enforced, raising DuplicateKeyError; other index
+    options are recorded for ``index_information`` only.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[str, Dict[Any, Set[Any]]] = {}
+        self._index_info: Dict[str, Dict[str, Any]] = {'_id_': {'key': [('_id', 1)], 'v': 2}}
+
+    # Storage primitives
+
+    def _ids(self) -> Iterable[Any]:
+        """Every stored _id, in natural order"""
+        raise NotImplementedError
+
+    def _contains(self, doc_id: Any) -> bool:
+        raise NotImplementedError
+
+    def _load(self, doc_id: Any) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def _store(self, document: Dict[str, Any]):
+        raise NotImplementedError
+
+    def _delete(self, doc_id: Any):
+        raise NotImplementedError
+
+    def _position(self, doc_id: Any) -> Any:
+        """Sort key giving an _id's place in natural order"""
+        raise NotImplementedError
+
+    def _export(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        return document
+
+    def _commit(self):
+        pass
+
+    def _indexes_changed(self):
+        pass
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a synchronous operation on the collection; calls never overlap"""
+        return fn(*args)
+
+    # Indexes
+
+    async def create_index(self, keys: Any, **kwargs: Any) -> str:
+        """Hash-index the first field of ``keys``"""
+        return await self._run(self._create_index, keys, kwargs)
+
+    def _create_index(self, keys: Any, options: Dict[str, Any]) -> str:
+        keys = [(keys, 1)] if isinstance(keys, str) else [tuple(key) for key in keys]
+        options = dict(options)
+        name = options.pop('name', None) or '_'.join(f"{f}_{d}" for f, d in keys)
+        if any(direction == 'text' for _, direction in keys):
+            info = {'key': [('_fts', 'text'), ('_ftsx', 1)],
+                    'weights': {f: 1 for f, d in keys if d == 'text'}}
+        else:
+            info = {'key': keys}
+        info = {**info, 'v': 2, **options}
+        if info.get('unique'):
+            if len(keys) > 1 or 'weights' in info or 'partialFilterExpression' in info:
+                raise NotImplementedError(f"Unsupported unique index: {name}")
+            self._check_existing_unique(keys[0][0], info.get('sparse', False))
+        if 'weights' not in info:
+            self._build_index(keys[0][0])
+        self._index_info[name] = info
+        self._indexes_changed()
+        return name
+
+    async def create_indexes(self, models: Iterable[Any]) -> List[str]:
+        return [await self.create_index(list(model.document['key'].items()),
+                                        **{k: v for k, v in model.document.items() if k != 'key'})
+                for model in models]
+
+    async def index_information(self) -> Dict[str, Dict[str, Any]]:
+        return copy.deepcopy(self._index_info)
+
+    async def drop_index(self, name: str):
+        await self._run(self._drop_index, name)
+
+    def _drop_index(self, name: str):
+        info = self._index_info.pop(name)
+        field = info['key'][0][0]
+        if not any(other['key'][0][0] == field for other in self._index_info.values()):
+            self._indexes.pop(field, None)
+        self._indexes_changed()
+
+    def _build_index(self, field: str):
+        if field == '_id' or field == '_fts' or field in self._indexes:
+            return
+        index = self._indexes[field] = {}
+        for doc_id in self._ids():
+            self._index_add(index, field, doc_id, self._load(doc_id))
+
+    @staticmethod
+    def _index_keys(doc: Dict[str, Any], field: str) -> List[Any]:
+        # Arrays are indexed by element, like a multikey index
+        return [key for key in _elements(get_path(doc, field)) if isinstance(key, Hashable)]
+
+    @classmethod
+    def _index_add(cls, index: Dict[Any, Set[Any]], field: str, doc_id: Any, doc: Dict[str, Any]):
+        for key in cls._index_keys(doc, field):
+            index.setdefault(key, set()).add(doc_id)
+
+    @classmethod
+    def _index_discard(cls, index: Dict[Any, Set[Any]], field: str, doc_id: Any, doc: Dict[str, Any]):
+        for key in cls._index_keys(doc, field):
+            if key in index:
+                index[key].discard(doc_id)
+                if not index[key]:
+                    del index[key]
+
+    def _unique_fields(self) -> Dict[str, bool]:
+        """Fields with a unique index, mapped to whether the index is sparse"""
+        return {info['key'][0][0]: bool(info.get('sparse'))
+                for info in self._index_info.values() if info.get('unique') and info['key'][0][0] != '_id'}
+
+    def _unique_keys(self, document: Dict[str, Any], field: str, sparse: bool) -> List[Any]:
+        if sparse and get_path(document, field, MISSING) is MISSING:
+            return []
+        return self._index_keys(document, field)
+
+    def _check_existing_unique(self, field: str, sparse: bool):
+        seen: Dict[Any, Any] = {}
+        for doc_id in self._ids():
+            for key in self._unique_keys(self._load(doc_id), field, sparse):
+                if seen.setdefault(key, doc_id) != doc_id:
+                    raise DuplicateKeyError(f"E11000 duplicate key error index: {field} dup key: {key!r}")
+
+    def _check_unique(self, document: Dict[str, Any]):
+        for field, sparse in self._unique_fields().items():
+            index = self._indexes[field]
+            for key in self._unique_keys(document, field, sparse):
+                if index.get(key, set()) - {document['_id']}:
+                    raise DuplicateKeyError(f"E11000 duplicate key error index: {field} dup key: {key!r}")
+
+    def _put(self, document: Dict[str, Any]):
+        doc_id = document['_id']
+        self._check_unique(document)
+        if self._indexes:
+            previous = self._load(doc_id) if self._contains(doc_id) else None
+            for field, index in self._indexes.items():
+                if previous is not None:
+                    self._index_discard(index, field, doc_id, previous)
+                self._index_add(index, field, doc_id, document)
+        self._store(document)
+
+    def _remove(self, doc_id: Any):
+        if self._indexes:
+            document = self._load(doc_id)
+            for field, index in self._indexes.items():
+                self._index_discard(index, field, doc_id, document)
+        self._delete(doc_id)
+
+    def _index_field(self, query: Dict[str, Any]) -> Optional[str]:
+        """The field whose index narrows ``query``, if any"""
+        for field, condition in query.items():
+            if (field == '_id' or field in self._indexes) and lookup_values(condition) is not None:
+                return field
+        return None
+
+    def _candidate_ids(self, query: Dict[str, Any]) -> List[Any]:
+        """Ids of documents that may match, narrowed by an index when the query allows it"""
+        field = self._index_field(query)
+        if field is None:
+            return list(self._ids())
+        values = lookup_values(query[field])
+        if field == '_id':
+            ids = {v for v in values if self._contains(v)}
+        else:
+            index = self._indexes[field]
+            ids = set(itertools.chain.from_iterable(index.get(v, ()) for v in values))
+        # Keep natural order, like a scan would
+        return sorted(ids, key=self._position)
+
+    def _candidates(self, query: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        # Loaded one at a time, so skip documents deleted while a cursor is open
+        return (self._load(doc_id) for doc_id in self._candidate_ids(query) if self._contains(doc_id))
+
+    def _matching(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return [doc for doc in self._candidates(query) if matches(doc, query)]
+
+    def _first(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        return next((doc for doc in self._candidates(query) if matches(doc, query)), None)
+
+    # Reads
+
+    async def find_one(self, query: Optional[Dict[str, Any]] = None,
+                       projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return await self._run(self._find_one, query or {}, projection)
+
+    def _find_one(self, query: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        doc = self._first(query)
+        return None if doc is None else self._export(project(doc, projection))
+
+    def find(self, query: Optional[Dict[str, Any]] = None,
+             projection: Optional[Dict[str, Any]] = None) -> DocumentCursor:
+        return DocumentCursor(self, query or {}, projection)
+
+    async def count_documents(self, query: Dict[str, Any]) -> int:
+        return await self._run(lambda: len(self._matching(query)))
+
+    # Writes
+
+    def _insert(self, document: Dict[str, Any]):
+        document.setdefault('_id', ObjectId())
+        if self._contains(document['_id']):
+            raise DuplicateKeyError(f"E11000 duplicate key error index: _id_ dup key: {document['_id']!r}")
+        self._put(copy.deepcopy(document))
+
+    def _replace(self, query: Dict[str, Any], document: Dict[str, Any], upsert: bool) -> int:
+        """Replace the first match; returns the number matched"""
+        target = self._first(query)
+        if target is None:
+            if upsert:
+                replacement = {**upsert_seed(query), **copy.deepcopy(document)}
+                replacement.setdefault('_id', ObjectId())
+                self._put(replacement)
+            return 0
+        replacement = copy.deepcopy(document)
+        if replacement.setdefault('_id', target['_id']) != target['_id']:
+            raise ValueError("The replacement document may not change _id")
+        self._put(replacement)
+        return 1
+
+    def _update(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool, multi: bool = False) -> int:
+        """Update the first match, or every match with ``multi``; returns the number matched"""
+        targets = self._matching(query) if multi else [doc for doc in [self._first(query)] if doc is not None]
+        if not targets:
+            if upsert:
+                target = upsert_seed(query)
+                target.setdefault('_id', ObjectId())
+                apply_update(target, update)
+                self._put(target)
+            return 0
+        for target in targets:
+            target = copy.deepcopy(target)
+            apply_update(target, update)
+            self._put(target)
+        return len(targets)
+
+    def _delete_matching(self, query: Dict[str, Any], multi: bool) -> int:
+        targets = self._matching(query) if multi else [doc for doc in [self._first(query)] if doc is not None]
+        for doc in targets:
+            self._remove(doc['_id'])
+        return len(targets)
+
+    def _write(self, fn: Callable[..., Any], *args: Any) -> Any:
+        try:
+            return fn(*args)
+        finally:
+            self._commit()
+
+    async def insert_one(self, document: Dict[str, Any]) -> Any:
+        await self._run(self._write, self._insert, document)
+        return SimpleNamespace(inserted_id=document['_id'])
+
+    async def bulk_write(self, requests: List[Any], ordered: bool = True) -> Any:
+        """Apply pymongo write models; unsupported request types raise before any is applied"""
+        requests = [_bulk_request(request) for request in requests]
+        errors = await self._run(self._write, self._bulk_write, requests, ordered)
+        if errors:
+            raise BulkWriteError({'writeErrors': errors})
+        return SimpleNamespace(acknowledged=True)
+
+    def _bulk_write(self, requests: List[Tuple[type, Dict[str, Any]]], ordered: bool) -> List[Dict[str, Any]]:
+        errors = []
+        for index, (kind, fields) in enumerate(requests):
+            try:
+                if kind is InsertOne:
+                    self._insert(fields['doc'])
+                elif kind is ReplaceOne:
+                    self._replace(fields['filter'], fields['doc'], fields['upsert'])
+                elif kind in (UpdateOne, UpdateMany):
+                    self._update(fields['filter'], fields['doc'], fields['upsert'], multi=kind is UpdateMany)
+                else:
+                    self._delete_matching(fields['filter'], multi=kind is DeleteMany)
+            except DuplicateKeyError as e:
+                errors.append({'index': index, 'code': 11000, 'errmsg': str(e)})
+                if ordered:
+                    break
+        return errors
+
+    async def replace_one(self, query: Dict[str, Any], document: Dict[str, Any], upsert: bool = False) -> Any:
+        matched = await self._run(self._write, self._replace, query, document, upsert)
+        return SimpleNamespace(matched_count=matched)
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False) -> Any:
+        matched = await self._run(self._write, self._update, query, update, upsert)
+        return SimpleNamespace(matched_count=matched)
+
+    async def delete_many(self, query: Dict[str, Any]) -> Any:
+        deleted = await self._run(self._write, self._delete_matching, query, True)
+        return SimpleNamespace(deleted_count=deleted)
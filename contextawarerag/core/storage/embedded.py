@@ -0,0 +1,364 @@
+"""Embedded document storage in append-only segment files, read through mmap.
+
+Each collection is a directory of numbered segment files. A write appends
+a record, a one-byte op followed by the BSON document, to the newest
+segment; a delete appends a tombstone holding only the ``_id``. Opening a
+collection replays its segments to rebuild the in-memory ``_id`` index,
+which maps each live document to its record, and the hash indexes created
+with ``create_index``, whose specs are kept in ``indexes.json``. Reads
+decode records straight out of memory-mapped segments, so lookups do no
+network I/O and no read syscalls.
+
+A torn record at the end of a segment, left by a crash mid-write, is
+truncated away on open. One process may open a store at a time. Since
+appends, fsyncs and compaction block, operations from the event loop run
+on one storage thread per database, which also keeps them from
+overlapping.
+"""
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import mmap
+import os
+
+import bson
+
+from contextawarerag.core.storage.base import StorageBackend
+from contextawarerag.core.storage.documents import DocumentCollection
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+PUT = 0x50  # b'P'
+DELETE = 0x44  # b'D'
+
+SEGMENT_SUFFIX = '.seg'
+INDEX_FILE = 'indexes.json'
+LOCK_FILE = 'LOCK'
+
+# (segment number, offset of the BSON document, its length)
+Location = Tuple[int, int, int]
+
+
+class _Segment:
+    """One segment file: appended to through a file handle, read through mmap"""
+
+    def __init__(self, directory: str, number: int):
+        self.number = number
+        self.path = os.path.join(directory, f"{number:08d}{SEGMENT_SUFFIX}")
+        self.size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._dirty = False
+
+    def append(self, record: bytes) -> int:
+        """Write a record; returns its offset"""
+        if self._file is None:
+            self._file = open(self.path, 'ab')
+        offset = self.size
+        self._file.write(record)
+        self.size += len(record)
+        self._dirty = True
+        return offset
+
+    def seal(self, fsync: bool = False):
+        """Close the append handle once a newer segment takes the writes"""
+        if self._file is not None:
+            self.flush(fsync)
+            self._file.close()
+            self._file = None
+
+    def flush(self, fsync: bool = False):
+        if self._dirty:
+            self._file.flush()
+            if fsync:
+                os.fsync(self._file.fileno())
+            self._dirty = False
+
+    def _view(self) -> mmap.mmap:
+        self.flush()
+        if self._map is None or len(self._map) < self.size:
+            # The active segment grew since it was mapped
+            if self._map is not None:
+                self._map.close()
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def read(self, offset: int, length: int) -> bytes:
+        return self._view()[offset:offset + length]
+
+    def records(self) -> Iterator[Tuple[int, int, bytes]]:
+        """``(offset, op, document bytes)`` for each intact record, in order.
+
+        Stops at the first torn or unreadable record and truncates the
+        file there.
+        """
+        if not self.size:
+            return
+        data = self._view()
+        offset = 0
+        while offset < self.size:
+            op = data[offset]
+            length = int.from_bytes(data[offset + 1:offset + 5], 'little')
+            end = offset + 1 + length
+            if op not in (PUT, DELETE) or length < 5 or end > self.size:
+                break
+            yield offset + 1, op, data[offset + 1:end]
+            offset = end
+        if offset < self.size:
+            logger.warning(f"Truncating {self.size - offset} bytes of torn records from {self.path}")
+            self.truncate(offset)
+
+    def truncate(self, size: int):
+        self.close()
+        with open(self.path, 'r+b') as f:
+            f.truncate(size)
+        self.size = size
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+def _storage_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix='embedded-storage')
+
+
+class EmbeddedCollection(DocumentCollection):
+    """A collection stored in one directory of segment files.
+
+    Async operations run on ``executor``, which must have a single worker;
+    by default the collection starts its own.
+    """
+
+    def __init__(self, path: str, segment_bytes: int = 64 * 1024 * 1024, fsync: bool = False,
+                 compact_ratio: float = 0.5, executor: Optional[Executor] = None):
+        super().__init__()
+        self.path = path
+        self._owns_executor = executor is None
+        self._executor = executor or _storage_executor()
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self.compact_ratio = compact_ratio
+        self._locations: Dict[Any, Location] = {}
+        self._segments: Dict[int, _Segment] = {}
+        self._dead_bytes = 0
+        os.makedirs(path, exist_ok=True)
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def _open(self):
+        numbers = sorted(int(name[:-len(SEGMENT_SUFFIX)]) for name in os.listdir(self.path)
+                         if name.endswith(SEGMENT_SUFFIX))
+        for number in numbers or [0]:
+            segment = self._segments[number] = _Segment(self.path, number)
+            for offset, op, data in segment.records():
+                doc_id = bson.decode(data)['_id']
+                previous = self._locations.pop(doc_id, None)
+                if previous is not None:
+                    self._dead_bytes += previous[2] + 1
+                if op == PUT:
+                    self._locations[doc_id] = (number, offset, len(data))
+                else:
+                    self._dead_bytes += len(data) + 1
+
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path) as f:
+                self._index_info = json.load(f)
+            for info in self._index_info.values():
+                info['key'] = [tuple(key) for key in info['key']]
+        self._rebuild_indexes()
+
+        if self._dead_bytes > self.compact_ratio * self._total_bytes():
+            self.compact()
+
+    def _rebuild_indexes(self):
+        fields = {info['key'][0][0] for info in self._index_info.values()} - {'_id', '_fts'}
+        self._indexes = {field: {} for field in fields}
+        if not fields:
+            return
+        for doc_id in self._locations:
+            document = self._load(doc_id)
+            for field, index in self._indexes.items():
+                self._index_add(index, field, doc_id, document)
+
+    def _total_bytes(self) -> int:
+        return sum(segment.size for segment in self._segments.values())
+
+    def _append(self, op: int, document: Dict[str, Any]) -> Location:
+        record = bytes([op]) + bson.encode(document)
+        segment = self._segments[max(self._segments)]
+        if segment.size and segment.size + len(record) > self.segment_bytes:
+            segment.seal(self.fsync)
+            number = segment.number + 1
+            segment = self._segments[number] = _Segment(self.path, number)
+        offset = segment.append(record)
+        return segment.number, offset + 1, len(record) - 1
+
+    # Storage primitives
+
+    def _ids(self) -> List[Any]:
+        return list(self._locations)
+
+    def _contains(self, doc_id: Any) -> bool:
+        return doc_id in self._locations
+
+    def _load(self, doc_id: Any) -> Dict[str, Any]:
+        number, offset, length = self._locations[doc_id]
+        return bson.decode(self._segments[number].read(offset, length))
+
+    def _store(self, document: Dict[str, Any]):
+        location = self._append(PUT, document)
+        # Re-inserted so natural order follows the log
+        previous = self._locations.pop(document['_id'], None)
+        if previous is not None:
+            self._dead_bytes += previous[2] + 1
+        self._locations[document['_id']] = location
+
+    def _delete(self, doc_id: Any):
+        number, offset, length = self._append(DELETE, {'_id': doc_id})
+        self._dead_bytes += self._locations.pop(doc_id)[2] + 1 + length + 1
+
+    def _position(self, doc_id: Any) -> Tuple[int, int]:
+        return self._locations[doc_id][:2]
+
+    def _commit(self):
+        self._segments[max(self._segments)].flush(self.fsync)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _indexes_changed(self):
+        index_path = os.path.join(self.path, INDEX_FILE)
+        temporary = index_path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(self._index_info, f)
+        os.replace(temporary, index_path)
+
+    def compact(self) -> int:
+        """Rewrite live documents into new segments and delete the old ones.
+
+        Returns the bytes reclaimed. The new segments are synced before the
+        old ones are removed, so a crash part way loses nothing.
+        """
+        before = self._total_bytes()
+        old = self._segments
+        first = max(old) + 1
+        self._segments = {first: _Segment(self.path, first)}
+        locations = {}
+        for doc_id, (number, offset, length) in self._locations.items():
+            locations[doc_id] = self._append(PUT, bson.decode(old[number].read(offset, length)))
+        for segment in self._segments.values():
+            segment.flush(fsync=True)
+        for segment in old.values():
+            segment.close()
+            if os.path.exists(segment.path):
+                os.remove(segment.path)
+        self._locations = locations
+        self._dead_bytes = 0
+        reclaimed = before - self._total_bytes()
+        logger.info(f"Compacted {self.path}: {len(locations)} documents, {reclaimed} bytes reclaimed")
+        return reclaimed
+
+    def close(self):
+        for segment in self._segments.values():
+            segment.close()
+        if self._owns_executor:
+            self._executor.shutdown()
+
+
+class EmbeddedDatabase:
+    """Collections under one directory, opened on first access, sharing one storage thread"""
+
+    def __init__(self, path: str, **options: Any):
+        self.path = path
+        self._options = options
+        self._collections: Dict[str, EmbeddedCollection] = {}
+        self.executor = _storage_executor()
+
+    def __getattr__(self, name: str) -> EmbeddedCollection:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = EmbeddedCollection(
+                os.path.join(self.path, name), executor=self.executor, **self._options)
+        return collection
+
+    __getitem__ = __getattr__
+
+    def list_collection_names(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.path) if os.path.isdir(os.path.join(self.path, name)))
+
+    def open_all(self):
+        """Open every collection on disk, replaying its segments"""
+        for name in self.list_collection_names():
+            self[name]
+
+    async def command(self, name: str) -> Dict[str, Any]:
+        return {'ok': 1.0}
+
+    def close(self):
+        """Close every collection; the storage thread stays up for collections opened later"""
+        for collection in self._collections.values():
+            collection.close()
+        self._collections = {}
+
+
+class EmbeddedBackend(StorageBackend):
+    """Collections in segment files under ``path``, served from this process.
+
+    ``segment_bytes`` caps each segment file, ``fsync`` syncs every write
+    to disk, and a collection is compacted on open once tombstoned and
+    superseded records exceed ``compact_ratio`` of its bytes.
+    """
+
+    name = 'embedded'
+
+    def __init__(self, path: str = 'rag_store', segment_bytes: int = 64 * 1024 * 1024, fsync: bool = False,
+                 compact_ratio: float = 0.5):
+        os.makedirs(path, exist_ok=True)
+        self._lock = open(os.path.join(path, LOCK_FILE), 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._lock.close()
+                raise RuntimeError(f"Storage at {path} is open in another process")
+        self.database = EmbeddedDatabase(path, segment_bytes=segment_bytes, fsync=fsync,
+                                         compact_ratio=compact_ratio)
+
+    async def ping(self):
+        # Replaying segments is file I/O, so it runs off the event loop
+        await self._run(self.database.open_all)
+
+    async def compact(self) -> int:
+        """Compact every open collection; returns the bytes reclaimed"""
+        collections = list(self.database._collections.values())
+        return await self._run(lambda: sum(collection.compact() for collection in collections))
+
+    async def _run(self, fn: Callable[[], Any]) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self.database.executor, fn)
+
+    async def close(self):
+        # After any operations still queued on the storage thread
+        await self._run(self.database.close)
+        self.database.executor.shutdown()
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
@@ -0,0 +1,25 @@
+from typing import Any
+
+from contextawarerag.core.storage.base import StorageBackend
+
+
+class MotorBackend(StorageBackend):
+    """Collections on a MongoDB server, through motor.
+
+    Creating the client does not touch the network; ``ping`` does.
+    """
+
+    name = 'mongodb'
+
+    def __init__(self, uri: str, database: str, server_selection_timeout_ms: int = 5000, **options: Any):
+        # Deferred so importing the package does not load the driver
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        self.client = AsyncIOMotorClient(uri, serverSelectionTimeoutMS=server_selection_timeout_ms, **options)
+        self.database = self.client[database]
+
+    async def ping(self):
+        await self.client.admin.command('ping')
+
+    async def close(self):
+        self.client.close()
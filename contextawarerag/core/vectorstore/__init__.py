@@ -0,0 +1,10 @@
+"""Vector store package."""
+from contextawarerag.core.vectorstore.embedders import (
+    Embedder,
+    FunctionEmbedder,
+    HashingEmbedder,
+    load_embedder,
+)
+from contextawarerag.core.vectorstore.vector_index import VectorIndex
+
+__all__ = ['Embedder', 'FunctionEmbedder', 'HashingEmbedder', 'VectorIndex', 'load_embedder']
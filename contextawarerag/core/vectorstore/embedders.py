@@ -0,0 +1,96 @@
+from functools import lru_cache
+from hashlib import blake2b
+from importlib import import_module
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from contextawarerag.core.search.bm25 import tokenize
+
+
+class Embedder:
+    """Base class for text embedders.
+
+    Subclasses set ``dim`` and implement ``embed``, which maps a batch of
+    texts to a float32 matrix of shape ``(len(texts), dim)``.
+    """
+
+    dim: int = 0
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def embed_one(self, text: str) -> np.ndarray:
+        """Embed a single text"""
+        return self.embed([text])[0]
+
+
+class FunctionEmbedder(Embedder):
+    """Adapt a batch embedding function, e.g. a hosted model client"""
+
+    def __init__(self, fn: Callable[[Sequence[str]], Any], dim: int):
+        self.fn = fn
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.asarray(self.fn(list(texts)), dtype=np.float32)
+        return vectors.reshape(len(texts), self.dim)
+
+
+@lru_cache(maxsize=65536)
+def _bucket(feature: str, dim: int) -> Tuple[int, float]:
+    # blake2b rather than hash() so vectors are stable across processes
+    digest = int.from_bytes(blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+    return digest % dim, 1.0 if digest >> 63 else -1.0
+
+
+class HashingEmbedder(Embedder):
+    """Deterministic feature-hashing embedder for offline use.
+
+    Hashes word unigrams and character n-grams into a signed bag of features,
+    so near-identical spellings ("serum" / "serums") land close together.
+    """
+
+    def __init__(self, dim: int = 384, char_ngram: int = 3):
+        self.dim = dim
+        self.char_ngram = char_ngram
+
+    def _features(self, text: str) -> List[str]:
+        features = []
+        n = self.char_ngram
+        for term in tokenize(text):
+            features.append(term)
+            padded = f"#{term}#"
+            features.extend(f"~{padded[i:i + n]}" for i in range(max(1, len(padded) - n + 1)))
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                index, sign = _bucket(feature, self.dim)
+                vectors[row, index] += sign
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+def load_embedder(spec: Union[str, Dict[str, Any], Embedder, None] = None) -> Embedder:
+    """Build an embedder from a config value.
+
+    Accepts an ``Embedder`` instance, ``"hashing"``, a ``"module:Class"`` path,
+    or a dict with a ``type`` key plus constructor keyword arguments.
+    """
+    if isinstance(spec, Embedder):
+        return spec
+    if spec is None:
+        spec = {}
+    if isinstance(spec, str):
+        spec = {'type': spec}
+
+    options = dict(spec)
+    kind = options.pop('type', 'hashing')
+    if kind == 'hashing':
+        return HashingEmbedder(**options)
+    module_name, _, attr = kind.partition(':')
+    return getattr(import_module(module_name), attr)(**options)
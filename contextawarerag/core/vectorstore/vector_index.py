@@ -0,0 +1,226 @@
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from bson import json_util
+
+VECTORS_FILE = 'vectors.npy'
+META_FILE = 'meta.json'
+
+
+class VectorIndex:
+    """Exact cosine-similarity index over one contiguous float32 matrix.
+
+    Rows are L2-normalized on insert, so a search is a blocked matrix product
+    followed by ``argpartition``. Capacity grows geometrically, so adding
+    vectors is amortized O(1) rows copied. An index loaded with ``mmap=True``
+    shares the saved matrix read-only across processes until it is modified.
+    """
+
+    def __init__(self, dim: int, capacity: int = 1024, block_size: int = 65536):
+        self.dim = dim
+        self.block_size = block_size
+        self._matrix = np.empty((capacity, dim), dtype=np.float32)
+        self._live = np.zeros(capacity, dtype=bool)
+        self._codes = np.zeros(capacity, dtype=np.int32)
+        self._categories: Dict[Optional[str], int] = {None: 0}
+        self._ids: List[Hashable] = []
+        self._slots: Dict[Hashable, int] = {}
+        # Slots of removed ids, reused if the id is added again
+        self._removed: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._slots
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """The populated rows, including tombstoned ones"""
+        return self._matrix[:len(self._ids)]
+
+    def _reserve(self, rows: int):
+        capacity = len(self._matrix)
+        # A memory-mapped matrix is read-only; copy it out on the first write
+        if rows <= capacity and self._matrix.flags.writeable:
+            return
+        new_capacity = max(rows, capacity * 2 if rows > capacity else capacity, 16)
+        size = len(self._ids)
+        matrix = np.empty((new_capacity, self.dim), dtype=np.float32)
+        matrix[:size] = self._matrix[:size]
+        live = np.zeros(new_capacity, dtype=bool)
+        live[:size] = self._live[:size]
+        codes = np.zeros(new_capacity, dtype=np.int32)
+        codes[:size] = self._codes[:size]
+        self._matrix, self._live, self._codes = matrix, live, codes
+
+    def add(
+        self,
+        ids: Sequence[Hashable],
+        vectors: np.ndarray,
+        categories: Optional[Sequence[Optional[str]]] = None
+    ):
+        """Append vectors; ids already present are overwritten in place"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+        if categories is None:
+            categories = [None] * len(ids)
+
+        new_ids = [doc_id for doc_id in dict.fromkeys(ids) if doc_id not in self._slots]
+        appended = [doc_id for doc_id in new_ids if doc_id not in self._removed]
+        self._reserve(len(self._ids) + len(appended))
+        for doc_id in new_ids:
+            slot = self._removed.pop(doc_id, None)
+            if slot is None:
+                slot = len(self._ids)
+                self._ids.append(doc_id)
+            self._slots[doc_id] = slot
+
+        rows = np.fromiter((self._slots[doc_id] for doc_id in ids), dtype=np.int64, count=len(ids))
+        codes = [self._categories.setdefault(c, len(self._categories)) for c in categories]
+        self._matrix[rows] = vectors
+        self._codes[rows] = codes
+        self._live[rows] = True
+
+    def remove(self, doc_id: Hashable) -> bool:
+        """Tombstone a vector so it is excluded from results"""
+        slot = self._slots.pop(doc_id, None)
+        if slot is None:
+            return False
+        self._live[slot] = False
+        self._removed[doc_id] = slot
+        return True
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 5,
+        category: Optional[str] = None
+    ) -> List[List[Tuple[Hashable, float]]]:
+        """Return the top ``k`` (doc_id, cosine) pairs for each query row, best first"""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = np.divide(queries, norms, out=np.zeros_like(queries), where=norms > 0)
+
+        size = len(self._ids)
+        mask = self._live[:size]
+        # An empty category means no filter, as in BM25Index.search
+        if category:
+            code = self._categories.get(category)
+            if code is None:
+                return [[] for _ in queries]
+            mask = mask & (self._codes[:size] == code)
+        n_valid = int(mask.sum())
+        k = min(k, n_valid)
+        if k <= 0:
+            return [[] for _ in queries]
+
+        # Keep a running top-k per query while streaming blocks of rows, so
+        # peak memory is len(queries) * block_size scores.
+        best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), k), dtype=np.int64)
+        for start in range(0, size, self.block_size):
+            stop = min(start + self.block_size, size)
+            block_mask = mask[start:stop]
+            if not block_mask.any():
+                continue
+            scores = queries @ self._matrix[start:stop].T
+            scores[:, ~block_mask] = -np.inf
+            rows = np.broadcast_to(np.arange(start, stop), scores.shape)
+
+            scores = np.concatenate([best_scores, scores], axis=1)
+            rows = np.concatenate([best_rows, rows], axis=1)
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            best_scores = np.take_along_axis(scores, top, axis=1)
+            best_rows = np.take_along_axis(rows, top, axis=1)
+
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return [
+            [(self._ids[row], float(score)) for row, score in zip(rows, scores) if score > -np.inf]
+            for rows, scores in zip(best_rows, best_scores)
+        ]
+
+    def save(self, path: str):
+        """Write the index to a directory, swapping out any previous copy"""
+        size = len(self._ids)
+        meta = {
+            'dim': self.dim,
+            'ids': self._ids,
+            'live': self._live[:size].tolist(),
+            'codes': self._codes[:size].tolist(),
+            'categories': [c for c, _ in sorted(self._categories.items(), key=lambda item: item[1])],
+        }
+        parent = os.path.dirname(os.path.abspath(path))
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(prefix='.vectors-', dir=parent)
+        try:
+            np.save(os.path.join(tmp, VECTORS_FILE), self._matrix[:size])
+            with open(os.path.join(tmp, META_FILE), 'w') as f:
+                f.write(json_util.dumps(meta))
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        # Directories cannot be replaced over a non-empty target, so move the
+        # old copy aside first; readers only ever see a complete directory.
+        old = None
+        if os.path.isdir(path):
+            old = tempfile.mkdtemp(prefix='.vectors-old-', dir=parent)
+            os.replace(path, os.path.join(old, 'index'))
+        os.replace(tmp, path)
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, block_size: int = 65536) -> 'VectorIndex':
+        """Load an index saved with ``save``, memory-mapping the matrix by default"""
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json_util.loads(f.read())
+        matrix = np.load(os.path.join(path, VECTORS_FILE), mmap_mode='r' if mmap else None)
+        return cls.from_arrays(meta['ids'], matrix, meta['live'], meta['codes'], meta['categories'],
+                               block_size=block_size)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        ids: Sequence[Hashable],
+        matrix: np.ndarray,
+        live: Sequence[bool],
+        codes: Sequence[int],
+        categories: Sequence[Optional[str]],
+        block_size: int = 65536
+    ) -> 'VectorIndex':
+        """Wrap normalized rows without copying them; ``matrix`` may be memory-mapped.
+
+        ``codes`` index into ``categories``, whose first entry is None.
+        """
+        index = cls(matrix.shape[1], capacity=0, block_size=block_size)
+        index._matrix = matrix
+        # Copied, since they are small and updated in place
+        index._live = np.array(live, dtype=bool)
+        index._codes = np.array(codes, dtype=np.int32)
+        index._categories = {c: code for code, c in enumerate(categories)}
+        index._ids = list(ids)
+        index._slots = {
+            doc_id: slot for slot, doc_id in enumerate(index._ids) if index._live[slot]
+        }
+        index._removed = {
+            doc_id: slot for slot, doc_id in enumerate(index._ids)
+            if not index._live[slot] and doc_id not in index._slots
+        }
+        return index
+
+    def get(self, doc_id: Hashable) -> Optional[np.ndarray]:
+        """The normalized vector for a live id, or None"""
+        slot = self._slots.get(doc_id)
+        return None if slot is None else self._matrix[slot]
+
+    def iter_ids(self) -> Iterable[Hashable]:
+        """Ids of all live vectors"""
+        return iter(self._slots)
@@ -1,9 +1,48 @@
-from typing import Dict, List, Any
+from typing import (TYPE_CHECKING, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Any,
+                    Optional, Tuple)
 from contextawarerag import DataManager
+from contextawarerag.core.cache import SingleFlight, normalize_query
+from contextawarerag.services.stats.catalog import parse_price
+from contextawarerag.utils.metrics import timed, timer
+from datetime import datetime, timedelta, timezone
+import asyncio
 import logging
+import os
+
+if TYPE_CHECKING:
+    from contextawarerag.core.search import BM25Index
+    from contextawarerag.core.snapshot import Snapshot, SnapshotWriter
+    from contextawarerag.core.vectorstore import VectorIndex
 
 logger = logging.getLogger(__name__)
 
+RESPONSE_HEADER = "Here are some products that might interest you:\n\n"
+NO_PRODUCTS_MESSAGE = "I couldn't find any relevant products."
+SEARCH_ERROR_MESSAGE = "Sorry, something went wrong while searching for products."
+
+# Ends the stream of results a search fetch feeds to iter_search_products
+_DONE = object()
+
+# Fields the in-process indexes are built from
+INDEX_PROJECTION = {"content": 1, "metadata.category": 1, "metadata.price": 1, "metadata.product_id": 1}
+
+
+def _utcnow() -> datetime:
+    """Naive UTC floored to the millisecond, as updated_at is stored"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+def price_filter(min_price: Optional[float] = None, max_price: Optional[float] = None) -> Dict[str, Any]:
+    """Query condition for a price range, empty when neither bound is given"""
+    bounds = {}
+    if min_price is not None:
+        bounds["$gte"] = min_price
+    if max_price is not None:
+        bounds["$lte"] = max_price
+    return {"metadata.price": bounds} if bounds else {}
+
+
 class ChatRAGIntegration:
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {
@@ -18,68 +57,606 @@ class ChatRAGIntegration:
             }
         }
         self.rag_manager = None
+        self.search_index = None
+        self.vector_index = None
+        self.snapshot: Optional['Snapshot'] = None
+        self.embedder = None
+        self.recommender = None
+        self.context_packer = None
+        self.semantic_cache = None
+        # Identical concurrent searches share one lookup
+        self._search_flight = SingleFlight()
+        # Every write before this is in the indexes; see catch_up()
+        self._watermark: Optional[datetime] = None
+        self._refresh_task: Optional[asyncio.Task] = None
 
     async def initialize(self):
         """Initialize RAG manager"""
         self.rag_manager = DataManager(self.config)
         await self.rag_manager.initialize()
+        snapshot_path = self.config.get('snapshot', {}).get('path')
+        if snapshot_path and os.path.isdir(snapshot_path):
+            await self.load_snapshot(snapshot_path)
+        else:
+            await self.build_search_index()
+            if 'vectorstore' in self.config:
+                await self.build_vector_index()
+        if 'recommendations' in self.config:
+            await self.build_recommender()
+        if 'semantic_cache' in self.config:
+            self.build_semantic_cache()
+        # Writes from other processes reach the indexes through a periodic
+        # catch-up; a None 'index_refresh' section turns it off
+        refresh = self.config.get('index_refresh', {})
+        if refresh is not None:
+            self._refresh_task = asyncio.ensure_future(self._refresh_indexes(refresh.get('interval', 30.0)))
+
+    async def close(self):
+        """Close the RAG manager's backend connections"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self.snapshot is not None:
+            self.snapshot.close()
+        if self.rag_manager is not None:
+            await self.rag_manager.close()
+
+    async def build_search_index(self):
+        """Build the in-memory BM25 index from rag_content and keep it current"""
+        from contextawarerag.core.search import BM25Index
+
+        index = BM25Index(**self.config.get('search', {}))
+        started = _utcnow()
+        async for doc in self.rag_manager.db.rag_content.find({}, INDEX_PROJECTION):
+            index.add_document(doc)
+        self._install_search_index(index)
+        self._watermark = started
+        logger.info(f"Built search index with {len(index)} documents")
 
-    async def search_products(self, query: str, category: str = None) -> List[Dict]:
-        """Search products based on query"""
+    def _install_search_index(self, index: 'BM25Index'):
+        if self.search_index is not None:
+            self.rag_manager.remove_content_listener(self.search_index.add_document)
+        self.search_index = index
+        self.rag_manager.add_content_listener(index.add_document)
+
+    async def build_vector_index(self):
+        """Load or build the dense vector index and keep it current"""
+        from contextawarerag.core.vectorstore import VectorIndex
+
+        settings = self.config.get('vectorstore', {})
+        batch_size = settings.get('batch_size', 256)
+        self._load_embedder()
+        path = settings.get('path')
+        collection = self.rag_manager.db.rag_content
+
+        if path and os.path.exists(path):
+            index = VectorIndex.load(path)
+            # Only embed documents written since the index was saved
+            missing = [doc["_id"] async for doc in collection.find({}, {"_id": 1})
+                       if doc["_id"] not in index]
+        else:
+            index = VectorIndex(self.embedder.dim)
+            missing = None
+
+        query = {} if missing is None else {"_id": {"$in": missing}}
+        batch = []
+        async for doc in collection.find(query, {"content": 1, "metadata.category": 1}):
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                self._embed_documents(index, batch)
+                batch = []
+        self._embed_documents(index, batch)
+        self._install_vector_index(index)
+        logger.info(f"Built vector index with {len(index)} documents")
+
+    def _load_embedder(self):
+        from contextawarerag.core.vectorstore import load_embedder
+
+        if self.embedder is None:
+            self.embedder = load_embedder(self.config.get('vectorstore', {}).get('embedder'))
+
+    def _install_vector_index(self, index: 'VectorIndex'):
+        if self.vector_index is not None:
+            self.rag_manager.remove_content_listener(self._embed_document)
+        self.vector_index = index
+        self.rag_manager.add_content_listener(self._embed_document)
+
+    async def export_snapshot(self, path: str = None) -> Dict[str, Any]:
+        """Write rag_content, its BM25 index and its vectors to a snapshot.
+
+        Defaults to ``config['snapshot']['path']``. Vectors come from the
+        vector index when it has them, so only new documents are embedded.
+        Returns the snapshot manifest.
+        """
+        from contextawarerag.core.snapshot import SnapshotWriter
+
+        path = path or self.config['snapshot']['path']
+        batch_size = self.config.get('vectorstore', {}).get('batch_size', 256)
+        with_vectors = 'vectorstore' in self.config
+        if with_vectors:
+            self._load_embedder()
+
+        # Taken before the scan, so writes racing it are caught up on load
+        watermark = datetime.now(timezone.utc)
+        loop = asyncio.get_running_loop()
+        writer = SnapshotWriter(path, watermark, dim=self.embedder.dim if with_vectors else None,
+                                search=self.config.get('search'))
         try:
-            search_criteria = {
-                "content": {"$regex": query, "$options": "i"}
-            }
-            if category:
-                search_criteria["metadata.category"] = category
+            batch = []
+            async for doc in self.rag_manager.db.rag_content.find({}):
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    self._write_snapshot_batch(writer, batch, with_vectors)
+                    batch = []
+            self._write_snapshot_batch(writer, batch, with_vectors)
+            # Mostly fsyncs and array writes, so it runs off the event loop
+            manifest = await loop.run_in_executor(None, writer.commit)
+        except BaseException:
+            writer.abort()
+            raise
+        logger.info(f"Exported snapshot of {manifest['count']} documents to {path}")
+        return manifest
 
-            results = []
-            async for doc in self.rag_manager.db.rag_content.find(search_criteria).limit(5):
-                results.append({
-                    "content": doc["content"],
-                    "metadata": doc["metadata"]
-                })
-            return results
+    def _write_snapshot_batch(self, writer: 'SnapshotWriter', docs: List[Dict[str, Any]], with_vectors: bool):
+        vectors = [None] * len(docs)
+        if with_vectors:
+            if self.vector_index is not None:
+                vectors = [self.vector_index.get(doc["_id"]) for doc in docs]
+            missing = [row for row, vector in enumerate(vectors) if vector is None]
+            if missing:
+                embedded = self.embedder.embed([docs[row].get("content", "") for row in missing])
+                for row, vector in zip(missing, embedded):
+                    vectors[row] = vector
+        for doc, vector in zip(docs, vectors):
+            writer.add(doc, vector)
+
+    async def load_snapshot(self, path: str = None):
+        """Serve search from a snapshot, then catch up on newer documents.
+
+        The indexes read the snapshot's arrays through mmap. Documents
+        updated since its watermark, less ``config['snapshot']['catch_up_margin']``
+        seconds (default 5) of clock skew between writers, are re-indexed
+        from rag_content. Documents deleted since the export are not
+        removed; searches skip them when their fetch comes back empty.
+        """
+        from contextawarerag.core.snapshot import Snapshot
+
+        settings = self.config.get('snapshot', {})
+        path = path or settings['path']
+        snapshot = Snapshot(path)
+        self._install_search_index(snapshot.search_index(**self.config.get('search', {})))
+
+        vectors = None
+        if 'vectorstore' in self.config:
+            self._load_embedder()
+            if snapshot.dim == self.embedder.dim:
+                vectors = snapshot.vector_index()
+                self._install_vector_index(vectors)
+            else:
+                # Exported without vectors, or with another embedder
+                await self.build_vector_index()
+
+        started = _utcnow()
+        await self._index_since(snapshot.watermark - timedelta(seconds=settings.get('catch_up_margin', 5.0)),
+                                vectors)
+        self._watermark = started
+        if self.snapshot is not None:
+            self.snapshot.close()
+        self.snapshot = snapshot
+        logger.info(f"Loaded snapshot of {len(snapshot)} documents from {path}")
+
+    async def catch_up(self) -> int:
+        """Index documents written since the last build, load or catch-up.
+
+        Writes made through this process's DataManager are indexed as they
+        happen; this picks up the rest (the populate script, other workers)
+        by ``updated_at``, less ``config['index_refresh']['margin']`` seconds
+        (default 5) of clock skew between writers. Categories of the
+        documents found are invalidated in the result cache, since other
+        workers may have cached rankings from indexes that lacked them.
+        Returns the number of documents found.
+        """
+        if self._watermark is None:
+            return 0
+        margin = (self.config.get('index_refresh') or {}).get('margin', 5.0)
+        started = _utcnow()
+        docs = await self._index_since(self._watermark - timedelta(seconds=margin), self.vector_index)
+        self._watermark = started
+        for doc in docs:
+            if self.recommender is not None:
+                self._set_product_category(self.recommender, doc)
+            if self.semantic_cache is not None:
+                self._invalidate_semantic_cache(doc)
+        for category in {(doc.get("metadata") or {}).get("category") for doc in docs}:
+            await self.rag_manager.cache.invalidate(category)
+        if docs:
+            logger.info(f"Caught up on {len(docs)} documents written elsewhere")
+        return len(docs)
+
+    async def _index_since(self, since: datetime, vectors: Optional['VectorIndex']) -> List[Dict[str, Any]]:
+        """Add documents updated at or after ``since`` to the search index, and to ``vectors``"""
+        batch_size = self.config.get('vectorstore', {}).get('batch_size', 256)
+        docs = []
+        batch = []
+        async for doc in self.rag_manager.db.rag_content.find({"updated_at": {"$gte": since}}, INDEX_PROJECTION):
+            docs.append(doc)
+            self.search_index.add_document(doc)
+            if vectors is not None:
+                batch.append(doc)
+                if len(batch) >= batch_size:
+                    self._embed_documents(vectors, batch)
+                    batch = []
+        if vectors is not None:
+            self._embed_documents(vectors, batch)
+        return docs
+
+    async def _refresh_indexes(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.catch_up()
+            except Exception as e:
+                logger.error(f"Error catching up indexes: {e}")
+
+    async def build_recommender(self):
+        """Build the co-occurrence recommender from purchase history and keep it current"""
+        from contextawarerag.services.recommendations import CoOccurrenceRecommender
+
+        settings = dict(self.config.get('recommendations', {}))
+        orders = self.rag_manager.db[settings.pop('orders_collection', 'orders')]
+        recommender = CoOccurrenceRecommender(**settings)
+
+        projection = {"metadata.product_id": 1, "metadata.category": 1}
+        async for doc in self.rag_manager.db.rag_content.find({}, projection):
+            self._set_product_category(recommender, doc)
+        baskets = []
+        async for order in orders.find({}, {"items": 1}):
+            baskets.append(
+                [item.get("product_id") if isinstance(item, dict) else item for item in order.get("items", [])]
+            )
+        recommender.build(baskets)
+
+        if self.recommender is not None:
+            self.rag_manager.remove_content_listener(self._on_content_for_recommender)
+        self.recommender = recommender
+        self.rag_manager.add_content_listener(self._on_content_for_recommender)
+        logger.info(f"Built recommender from {len(baskets)} orders over {len(recommender)} products")
+
+    @staticmethod
+    def _set_product_category(recommender, doc: Dict[str, Any]):
+        metadata = doc.get("metadata") or {}
+        recommender.set_category(metadata.get("product_id"), metadata.get("category"))
+
+    def _on_content_for_recommender(self, document: Dict[str, Any]):
+        self._set_product_category(self.recommender, document)
+
+    def record_purchase(self, product_ids: List[str]):
+        """Fold a new order into the recommender"""
+        if self.recommender is not None:
+            self.recommender.add_basket(product_ids)
+
+    def save_vector_index(self):
+        """Persist the vector index to the configured path"""
+        self.vector_index.save(self.config['vectorstore']['path'])
+
+    def _embed_documents(self, index: 'VectorIndex', docs: List[Dict[str, Any]]):
+        if not docs:
+            return
+        index.add(
+            [doc["_id"] for doc in docs],
+            self.embedder.embed([doc.get("content", "") for doc in docs]),
+            [(doc.get("metadata") or {}).get("category") for doc in docs]
+        )
+
+    def _embed_document(self, document: Dict[str, Any]):
+        self._embed_documents(self.vector_index, [document])
+
+    async def _fetch_ranked(self, hits: List[Tuple[Hashable, float]]) -> List[Dict]:
+        with timer('mongodb.rag_content.find'):
+            return [result async for result in self._iter_ranked(hits)]
+
+    async def _iter_ranked(self, hits: List[Tuple[Hashable, float]]) -> AsyncIterator[Dict]:
+        """Fetch hits with one query, yielding each as soon as every better-ranked hit has arrived"""
+        if not hits:
+            return
+
+        ranks = {doc_id: rank for rank, (doc_id, _) in enumerate(hits)}
+        arrived = {}
+        next_rank = 0
+        async for doc in self.rag_manager.db.rag_content.find(
+            {"_id": {"$in": list(ranks)}},
+            {"content": 1, "metadata": 1}
+        ):
+            arrived[ranks[doc["_id"]]] = doc
+            while next_rank in arrived:
+                yield self._ranked_result(arrived.pop(next_rank), hits[next_rank][1])
+                next_rank += 1
+
+        # Hits whose documents were not found leave gaps
+        for rank in sorted(arrived):
+            yield self._ranked_result(arrived[rank], hits[rank][1])
+
+    @staticmethod
+    def _ranked_result(doc: Dict[str, Any], score: float) -> Dict[str, Any]:
+        return {"content": doc["content"], "metadata": doc["metadata"], "score": score}
+
+    async def iter_search_products(self, query: str, category: str = None, k: int = 5,
+                                   min_price: float = None, max_price: float = None) -> AsyncIterator[Dict]:
+        """Search products, yielding results in rank order as they are fetched.
+
+        Shares the result cache and in-flight lookups with search_products:
+        a cached search, or one already running, is replayed once it
+        completes; otherwise results are yielded as they arrive and cached
+        when the fetch finishes, even if the caller stops early. Errors
+        propagate.
+        """
+        results = asyncio.Queue()
+
+        async def fetch() -> List[Dict]:
+            fetched = []
+            try:
+                with timer('mongodb.rag_content.find'):
+                    async for result in self._iter_ranked(self._search_hits(query, category, k, min_price,
+                                                                            max_price)):
+                        fetched.append(result)
+                        results.put_nowait(result)
+            finally:
+                results.put_nowait(_DONE)
+            return fetched
+
+        lookup = asyncio.ensure_future(self._cached_search(query, category, k, min_price, max_price, fetch))
+        item = None
+        streamed = 0
+        try:
+            while True:
+                item = asyncio.ensure_future(results.get())
+                await asyncio.wait({item, lookup}, return_when=asyncio.FIRST_COMPLETED)
+                if not item.done():
+                    # Served from the cache or another caller's fetch
+                    item.cancel()
+                    break
+                if item.result() is _DONE:
+                    break
+                streamed += 1
+                yield item.result()
+            for result in (await lookup)[streamed:]:
+                yield result
+        finally:
+            if item is not None:
+                item.cancel()
+            if lookup.done():
+                if not lookup.cancelled():
+                    # Retrieved so a failure we stopped waiting for is not reported as unhandled
+                    lookup.exception()
+            else:
+                # Stops waiting only; the shared fetch still completes and is cached
+                lookup.cancel()
+
+    def _search_hits(self, query: str, category: str = None, k: int = 5, min_price: float = None,
+                     max_price: float = None) -> List[Tuple[Hashable, float]]:
+        # Prices are a column of the search index, so range filters cost no query
+        with timer('search.bm25'):
+            return self.search_index.search(query, k=k, category=category, min_price=min_price, max_price=max_price)
+
+    @timed('search_products')
+    async def search_products(self, query: str, category: str = None,
+                              min_price: float = None, max_price: float = None, k: int = 5) -> List[Dict]:
+        """Search products based on query, optionally within a price range"""
+        try:
+            return await self._cached_search(
+                query, category, k, min_price, max_price,
+                lambda: self._fetch_ranked(self._search_hits(query, category, k, min_price, max_price))
+            )
         except Exception as e:
             logger.error(f"Error searching products: {e}")
             return []
 
+    def _cached_search(self, query: str, category: Optional[str], k: int, min_price: Optional[float],
+                       max_price: Optional[float], fetch: Callable[[], Awaitable[List[Dict]]]) -> Awaitable[List[Dict]]:
+        # Identical concurrent searches share one lookup, and one fetch on a miss
+        normalized = normalize_query(query)
+        return self._search_flight.do(
+            (normalized, category, k, min_price, max_price),
+            lambda: self.rag_manager.cache.get_or_compute(
+                "search",
+                {"query": normalized, "category": category, "k": k, **price_filter(min_price, max_price)},
+                fetch,
+                categories=[category]
+            )
+        )
+
+    async def semantic_search(self, query: str, category: str = None, k: int = 5) -> List[Dict]:
+        """Search products by embedding similarity"""
+        try:
+            with timer('search.vector'):
+                hits = self.vector_index.search(self.embedder.embed_one(query), k=k, category=category)[0]
+            return await self._fetch_ranked(hits)
+        except Exception as e:
+            logger.error(f"Error in semantic search: {e}")
+            return []
+
+    @timed('get_product_recommendations')
     async def get_product_recommendations(self, context: Dict[str, Any]) -> List[Dict]:
-        """Get product recommendations based on context"""
+        """Get product recommendations based on context.
+
+        ``min_price`` and ``max_price`` in the context limit the price range.
+        """
         try:
             # Extract relevant information from context
             user_interests = context.get('interests', [])
             previous_purchases = context.get('previous_purchases', [])
-            
-            # Build search criteria
-            search_criteria = {
-                "$or": [
-                    {"metadata.category": {"$in": user_interests}},
-                    {"metadata.product_id": {"$in": previous_purchases}}
-                ]
-            }
-            
-            recommendations = []
+            price = price_filter(context.get('min_price'), context.get('max_price'))
+
+            if self.recommender is not None:
+                with timer('recommender'):
+                    # Over-fetch when a price range may filter some out
+                    ranked = self.recommender.recommend(previous_purchases, user_interests, n=30 if price else 3)
+                if ranked:
+                    return (await self._fetch_products(ranked, price))[:3]
+
+            # Results can match any category through previous purchases, so
+            # they are scoped to the global cache generation
+            return await self.rag_manager.cache.get_or_compute(
+                "recommendations",
+                {"interests": user_interests, "previous_purchases": previous_purchases, **price},
+                lambda: self._query_recommendations(user_interests, previous_purchases, price)
+            )
+        except Exception as e:
+            logger.error(f"Error getting recommendations: {e}")
+            return []
+
+    async def _fetch_products(self, product_ids: List[str], price: Dict[str, Any] = None) -> List[Dict]:
+        docs = {}
+        with timer('mongodb.rag_content.find'):
+            async for doc in self.rag_manager.db.rag_content.find(
+                {"metadata.product_id": {"$in": product_ids}, **(price or {})},
+                {"content": 1, "metadata": 1}
+            ):
+                docs.setdefault(doc["metadata"]["product_id"], doc)
+        return [
+            {"content": docs[product_id]["content"], "metadata": docs[product_id]["metadata"]}
+            for product_id in product_ids if product_id in docs
+        ]
+
+    async def _query_recommendations(self, user_interests: List[str], previous_purchases: List[str],
+                                     price: Dict[str, Any] = None) -> List[Dict]:
+        # Build search criteria
+        search_criteria = {
+            "$or": [
+                {"metadata.category": {"$in": user_interests}},
+                {"metadata.product_id": {"$in": previous_purchases}}
+            ],
+            **(price or {})
+        }
+
+        recommendations = []
+        with timer('mongodb.rag_content.find'):
             async for doc in self.rag_manager.db.rag_content.find(search_criteria).limit(3):
                 recommendations.append({
                     "content": doc["content"],
                     "metadata": doc["metadata"]
                 })
-            return recommendations
-        except Exception as e:
-            logger.error(f"Error getting recommendations: {e}")
-            return []
+        return recommendations
+
+    def build_semantic_cache(self):
+        """Cache contexts and answers by query similarity, invalidated by content writes"""
+        from contextawarerag.core.cache import SemanticCache
+
+        if self.semantic_cache is not None:
+            self.rag_manager.remove_content_listener(self._invalidate_semantic_cache)
+        self.semantic_cache = SemanticCache(embedder=self.embedder, **self.config.get('semantic_cache', {}))
+        self.rag_manager.add_content_listener(self._invalidate_semantic_cache)
+
+    def _invalidate_semantic_cache(self, document: Dict[str, Any]):
+        self.semantic_cache.invalidate((document.get("metadata") or {}).get("category"))
+
+    async def build_context(self, query: str, category: str = None, budget: int = None) -> Dict[str, Any]:
+        """Retrieve candidates for a query and pack a diverse subset into a token budget.
+
+        Returns ``{"text", "tokens", "items"}`` from ContextPacker.pack. With
+        the default budget, a context built for a similar enough earlier query
+        is reused.
+        """
+        cache = self.semantic_cache if budget is None else None
+        if cache is not None:
+            vector = cache.embed(query)
+            cached = cache.get(query, category, vector=vector)
+            if cached is not None:
+                return cached["context"]
+
+        context = await self._pack_context(query, category, budget)
+        if cache is not None:
+            cache.set(query, {"context": context}, category, vector=vector)
+        return context
 
+    async def _pack_context(self, query: str, category: str = None, budget: int = None) -> Dict[str, Any]:
+        packer = self._get_context_packer()
+        candidates = await self._fetch_ranked(self._search_hits(query, category, packer.max_candidates))
+        with timer('context.pack'):
+            return packer.pack(candidates, query=query, budget=budget)
+
+    async def answer_query(
+        self,
+        query: str,
+        generate: Callable[[str, str], Awaitable[str]],
+        category: str = None
+    ) -> Dict[str, Any]:
+        """Answer with ``generate(query, context_text)``, reusing answers to similar queries.
+
+        Returns ``{"answer", "context", "cached"}``.
+        """
+        cache = self.semantic_cache
+        vector = cache.embed(query) if cache is not None else None
+        cached = cache.get(query, category, vector=vector) if cache is not None else None
+        if cached is not None and "answer" in cached:
+            return {**cached, "cached": True}
+
+        context = cached["context"] if cached is not None else await self._pack_context(query, category)
+        answer = await generate(query, context["text"])
+        if cached is not None:
+            # Attach the answer to the entry whose context it was generated from
+            cached["answer"] = answer
+        elif cache is not None:
+            cache.set(query, {"context": context, "answer": answer}, category, vector=vector)
+        return {"context": context, "answer": answer, "cached": False}
+
+    def _get_context_packer(self):
+        if self.context_packer is None:
+            from contextawarerag.core.processing import ContextPacker
+
+            # Share the vector index's embedder and the ingestion chunker's token cache
+            self.context_packer = ContextPacker(
+                embedder=self.embedder,
+                chunker=getattr(self.rag_manager, 'chunker', None),
+                **self.config.get('context', {})
+            )
+        return self.context_packer
+
+    @timed('format_product_response')
     def format_product_response(self, products: List[Dict]) -> str:
         """Format product information for chat response"""
         if not products:
-            return "I couldn't find any relevant products."
-
-        response = "Here are some products that might interest you:\n\n"
-        for product in products:
-            content = product["content"]
-            metadata = product["metadata"]
-            response += f"🔹 {metadata.get('product_id', 'N/A')}\n"
-            response += f"Price: ${metadata.get('price', '0.00')}\n"
-            response += f"{content}\n\n"
-        return response 
\ No newline at end of file
+            return NO_PRODUCTS_MESSAGE
+        return "".join([RESPONSE_HEADER] + [self._format_product(product) for product in products])
+
+    async def stream_product_response(self, products: AsyncIterable[Dict]) -> AsyncIterator[str]:
+        """Yield the chat response block by block as products arrive"""
+        empty = True
+        async for product in products:
+            if empty:
+                empty = False
+                yield RESPONSE_HEADER
+            yield self._format_product(product)
+        if empty:
+            yield NO_PRODUCTS_MESSAGE
+
+    async def stream_search_response(self, query: str, category: str = None,
+                                     min_price: float = None, max_price: float = None) -> AsyncIterator[str]:
+        """Search and stream the formatted response, starting with the first result.
+
+        A search that fails ends the stream with SEARCH_ERROR_MESSAGE.
+        """
+        products = self.iter_search_products(query, category, min_price=min_price, max_price=max_price)
+        try:
+            async for block in self.stream_product_response(products):
+                yield block
+        except Exception as e:
+            logger.error(f"Error streaming search results: {e}")
+            yield SEARCH_ERROR_MESSAGE
+        finally:
+            await products.aclose()
+
+    @staticmethod
+    def _format_product(product: Dict) -> str:
+        metadata = product["metadata"]
+        # Documents stored before prices were numeric may still hold strings
+        price = parse_price(metadata.get('price'))
+        return (
+            f"🔹 {metadata.get('product_id', 'N/A')}\n"
+            f"Price: {'N/A' if price is None else f'${price:.2f}'}\n"
+            f"{product['content']}\n\n"
+        )
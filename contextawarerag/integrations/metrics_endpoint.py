@@ -0,0 +1,12 @@
+"""aiohttp handler exposing in-process metrics to Prometheus."""
+from aiohttp import web
+
+from contextawarerag.utils.metrics import CONTENT_TYPE, REGISTRY, MetricsRegistry
+
+
+def metrics_handler(registry: MetricsRegistry = REGISTRY):
+    """aiohttp handler serving ``registry`` in the Prometheus text format"""
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(body=registry.render().encode('utf-8'), headers={'Content-Type': CONTENT_TYPE})
+
+    return handler
@@ -0,0 +1,59 @@
+"""aiohttp helpers for streaming chat responses to clients."""
+from typing import AsyncIterable, Awaitable, Callable
+import asyncio
+import logging
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+ERROR_TEXT = "\n\nSorry, the response could not be completed."
+
+
+async def stream_text(
+    request: web.Request,
+    chunks: AsyncIterable[str],
+    content_type: str = 'text/plain',
+    error_text: str = ERROR_TEXT
+) -> web.StreamResponse:
+    """Send text chunks with chunked transfer encoding, flushing each as it is produced.
+
+    If producing a chunk fails, ``error_text`` ends the response. When the
+    client goes away, or the handler is cancelled, ``chunks`` is closed so
+    it can release what it holds, such as an open cursor.
+    """
+    response = web.StreamResponse(headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.content_type = content_type
+    response.charset = 'utf-8'
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+    try:
+        try:
+            async for chunk in chunks:
+                await response.write(chunk.encode('utf-8'))
+        except (ConnectionResetError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            logger.error(f"Error producing streamed response: {e}")
+            await response.write(error_text.encode('utf-8'))
+        await response.write_eof()
+    except ConnectionResetError:
+        logger.info("Client disconnected while streaming")
+    except asyncio.CancelledError:
+        logger.info("Streaming cancelled")
+        raise
+    finally:
+        aclose = getattr(chunks, 'aclose', None)
+        if aclose is not None:
+            await aclose()
+    return response
+
+
+def search_stream_handler(chat) -> Callable[[web.Request], Awaitable[web.StreamResponse]]:
+    """aiohttp handler streaming ``chat.stream_search_response`` for ``?q=...&category=...``"""
+    async def handler(request: web.Request) -> web.StreamResponse:
+        query = request.query.get('q', '')
+        category = request.query.get('category') or None
+        return await stream_text(request, chat.stream_search_response(query, category))
+
+    return handler
@@ -0,0 +1,5 @@
+"""Commission calculation package."""
+from contextawarerag.services.commission.engine import RESULT_COLUMNS, CommissionEngine
+from contextawarerag.services.commission.plan import ORDER_COLUMNS, CommissionPlan, OrderColumns
+
+__all__ = ['CommissionEngine', 'CommissionPlan', 'ORDER_COLUMNS', 'OrderColumns', 'RESULT_COLUMNS']
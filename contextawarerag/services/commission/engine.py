@@ -0,0 +1,147 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Sequence
+import itertools
+import logging
+import uuid
+
+from contextawarerag.services.commission.plan import ORDER_COLUMNS, CommissionPlan, OrderColumns
+
+logger = logging.getLogger(__name__)
+
+RESULT_COLUMNS = (
+    'run_id', 'order_id', 'line_no', 'distributor_id', 'amount',
+    'tier', 'rate_commission', 'tier_bonus', 'commission'
+)
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS {orders} (
+    order_id TEXT NOT NULL,
+    line_no INTEGER NOT NULL,
+    distributor_id TEXT NOT NULL,
+    category TEXT,
+    quantity INTEGER NOT NULL,
+    unit_price DOUBLE PRECISION NOT NULL,
+    ordered_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (order_id, line_no)
+);
+CREATE INDEX IF NOT EXISTS {orders}_ordered_at_idx ON {orders} (ordered_at);
+CREATE TABLE IF NOT EXISTS {results} (
+    run_id TEXT NOT NULL,
+    order_id TEXT NOT NULL,
+    line_no INTEGER NOT NULL,
+    distributor_id TEXT NOT NULL,
+    amount DOUBLE PRECISION NOT NULL,
+    tier INTEGER NOT NULL,
+    rate_commission DOUBLE PRECISION NOT NULL,
+    tier_bonus DOUBLE PRECISION NOT NULL,
+    commission DOUBLE PRECISION NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {results}_run_idx ON {results} (run_id, distributor_id);
+"""
+
+VOLUME_SQL = (
+    "SELECT distributor_id, SUM(quantity * unit_price) AS volume FROM {orders} "
+    "WHERE ordered_at >= $1 AND ordered_at < $2 GROUP BY distributor_id"
+)
+
+LINES_SQL = (
+    "SELECT order_id, line_no, distributor_id, category, quantity, unit_price, ordered_at "
+    "FROM {orders} WHERE ordered_at >= $1 AND ordered_at < $2"
+)
+
+
+class CommissionEngine:
+    """Commission runs over order lines stored in Postgres.
+
+    Order lines are bulk-loaded and results written back with COPY. A run
+    aggregates each distributor's volume in SQL, then streams the period's
+    lines through a server-side cursor in batches that are computed as NumPy
+    columns. Results of a run are written in the same transaction, so they
+    appear all at once or not at all.
+    """
+
+    def __init__(
+        self,
+        pool: Any,
+        plan: CommissionPlan,
+        batch_size: int = 50000,
+        orders_table: str = 'order_lines',
+        results_table: str = 'commissions'
+    ):
+        self.pool = pool
+        self.plan = plan
+        self.batch_size = batch_size
+        self.orders_table = orders_table
+        self.results_table = results_table
+
+    async def ensure_schema(self):
+        """Create the order and result tables if they do not exist"""
+        async with self.pool.acquire() as connection:
+            await connection.execute(
+                SCHEMA_SQL.format(orders=self.orders_table, results=self.results_table)
+            )
+
+    async def load_orders(self, records: Iterable[Sequence[Any]]) -> int:
+        """COPY order lines, given as tuples in ORDER_COLUMNS order, in batches"""
+        loaded = 0
+        records = iter(records)
+        async with self.pool.acquire() as connection:
+            while True:
+                batch = list(itertools.islice(records, self.batch_size))
+                if not batch:
+                    break
+                await connection.copy_records_to_table(
+                    self.orders_table, records=batch, columns=list(ORDER_COLUMNS)
+                )
+                loaded += len(batch)
+        logger.info(f"Loaded {loaded} order lines into {self.orders_table}")
+        return loaded
+
+    async def run(
+        self,
+        period_start: datetime,
+        period_end: datetime,
+        run_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Compute and store commissions for lines ordered in [start, end)"""
+        run_id = run_id or uuid.uuid4().hex
+        summary = {"run_id": run_id, "lines": 0, "distributors": 0, "commission": 0.0}
+
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                rows = await connection.fetch(
+                    VOLUME_SQL.format(orders=self.orders_table), period_start, period_end
+                )
+                volumes = {row['distributor_id']: row['volume'] for row in rows}
+                summary["distributors"] = len(volumes)
+
+                cursor = await connection.cursor(
+                    LINES_SQL.format(orders=self.orders_table), period_start, period_end
+                )
+                while True:
+                    records = await cursor.fetch(self.batch_size)
+                    if not records:
+                        break
+                    lines = OrderColumns.from_records(records)
+                    result = self.plan.compute(lines, volumes)
+                    await connection.copy_records_to_table(
+                        self.results_table,
+                        records=zip(
+                            itertools.repeat(run_id),
+                            lines.order_id.tolist(),
+                            lines.line_no.tolist(),
+                            lines.distributor_id.tolist(),
+                            result["amount"].tolist(),
+                            result["tier"].tolist(),
+                            result["rate_commission"].tolist(),
+                            result["tier_bonus"].tolist(),
+                            result["commission"].tolist(),
+                        ),
+                        columns=list(RESULT_COLUMNS)
+                    )
+                    summary["lines"] += len(lines)
+                    summary["commission"] += float(result["commission"].sum())
+
+        summary["commission"] = round(summary["commission"], 2)
+        logger.info(f"Commission run {run_id}: {summary}")
+        return summary
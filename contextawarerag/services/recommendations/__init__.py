@@ -0,0 +1,4 @@
+"""Product recommendation package."""
+from contextawarerag.services.recommendations.cooccurrence import CoOccurrenceRecommender
+
+__all__ = ['CoOccurrenceRecommender']
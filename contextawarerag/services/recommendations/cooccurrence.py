@@ -0,0 +1,140 @@
+from collections import Counter, defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Set, Tuple
+import heapq
+import math
+
+Scored = List[Tuple[Hashable, float]]
+
+
+class CoOccurrenceRecommender:
+    """Item-item co-occurrence and category-affinity recommender.
+
+    Purchases update sparse co-occurrence counts incrementally. The neighbor
+    lists of the items and categories a purchase touches, and of every item
+    bought alongside those items, are then refreshed, so serving only merges
+    a few precomputed top-N lists and its cost does not depend on the size
+    of the catalog.
+    """
+
+    def __init__(self, top_n: int = 20, category_weight: float = 0.5, max_basket_size: int = 100):
+        self.top_n = top_n
+        self.category_weight = category_weight
+        self.max_basket_size = max_basket_size
+        self._item_counts: Counter = Counter()
+        self._cooccurrence: Dict[Hashable, Counter] = defaultdict(Counter)
+        self._categories: Dict[Hashable, str] = {}
+        self._category_counts: Dict[str, Counter] = defaultdict(Counter)
+        self._category_baskets: Counter = Counter()
+        self._category_affinity: Dict[str, Counter] = defaultdict(Counter)
+        self._neighbors: Dict[Hashable, Scored] = {}
+        self._category_top: Dict[str, Scored] = {}
+        self._related_categories: Dict[str, Scored] = {}
+        self._dirty_items: Set[Hashable] = set()
+        self._dirty_categories: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._item_counts)
+
+    def set_category(self, item: Hashable, category: Optional[str]):
+        if category:
+            self._categories[item] = category
+
+    def add_basket(self, items: Iterable[Hashable], refresh: bool = True):
+        """Record the items bought together in one order"""
+        items = list(dict.fromkeys(item for item in items if item is not None))[:self.max_basket_size]
+        categories = {self._categories[item] for item in items if item in self._categories}
+
+        for item in items:
+            self._item_counts[item] += 1
+            if item in self._categories:
+                self._category_counts[self._categories[item]][item] += 1
+            row = self._cooccurrence[item]
+            for other in items:
+                if other != item:
+                    row[other] += 1
+        for category in categories:
+            self._category_baskets[category] += 1
+            affinity = self._category_affinity[category]
+            for other in categories:
+                if other != category:
+                    affinity[other] += 1
+
+        self._dirty_items.update(items)
+        self._dirty_categories.update(categories)
+        if refresh:
+            self.refresh()
+
+    def build(self, baskets: Iterable[Iterable[Hashable]]):
+        """Load purchase history in bulk, refreshing neighbor lists once at the end"""
+        for basket in baskets:
+            self.add_basket(basket, refresh=False)
+        self.refresh()
+
+    def refresh(self):
+        """Recompute the neighbor lists of items and categories changed since the last refresh"""
+        # A changed purchase count moves the item's cosine score in the row
+        # of every item it co-occurs with, so those rows are stale too
+        items = set(self._dirty_items)
+        for item in self._dirty_items:
+            items.update(self._cooccurrence[item])
+        for item in items:
+            count = self._item_counts[item]
+            # Cosine similarity between the items' purchase vectors
+            self._neighbors[item] = self._top(
+                (other, together / math.sqrt(count * self._item_counts[other]))
+                for other, together in self._cooccurrence[item].items()
+            )
+        for category in self._dirty_categories:
+            counts = self._category_counts[category]
+            peak = max(counts.values(), default=1)
+            self._category_top[category] = self._top((item, n / peak) for item, n in counts.items())
+            # Share of this category's orders that also contain the other one
+            baskets = self._category_baskets[category] or 1
+            self._related_categories[category] = self._top(
+                (other, n / baskets) for other, n in self._category_affinity[category].items()
+            )
+        self._dirty_items.clear()
+        self._dirty_categories.clear()
+
+    def _top(self, scored: Iterable[Tuple[Hashable, float]]) -> Scored:
+        return heapq.nlargest(self.top_n, scored, key=lambda pair: pair[1])
+
+    def neighbors(self, item: Hashable) -> Scored:
+        return self._neighbors.get(item, [])
+
+    def recommend(
+        self,
+        purchased: Iterable[Hashable] = (),
+        interests: Iterable[str] = (),
+        n: int = 3
+    ) -> List[Hashable]:
+        """Top ``n`` items for a customer, excluding what they already bought.
+
+        Items similar to past purchases score by co-occurrence. Popular items
+        in the customer's interest categories, in the categories of their
+        purchases, and in categories often bought alongside those, add a
+        bonus weighted by ``category_weight``.
+        """
+        purchased = list(dict.fromkeys(purchased))
+        scores: Dict[Hashable, float] = defaultdict(float)
+        for item in purchased:
+            for other, score in self._neighbors.get(item, []):
+                scores[other] += score
+
+        category_weights: Dict[str, float] = defaultdict(float)
+        for category in list(interests) + [self._categories.get(item) for item in purchased]:
+            if category is None:
+                continue
+            category_weights[category] = max(category_weights[category], 1.0)
+            for related, affinity in self._related_categories.get(category, []):
+                category_weights[related] = max(category_weights[related], affinity)
+        for category, weight in category_weights.items():
+            for item, popularity in self._category_top.get(category, []):
+                scores[item] += self.category_weight * weight * popularity
+
+        excluded = set(purchased)
+        ranked = heapq.nlargest(
+            n, ((item, score) for item, score in scores.items() if item not in excluded),
+            key=lambda pair: (pair[1], str(pair[0]))
+        )
+        return [item for item, _ in ranked]
@@ -0,0 +1,4 @@
+"""Catalog statistics package."""
+from contextawarerag.services.stats.catalog import CatalogStats, parse_price
+
+__all__ = ['CatalogStats', 'parse_price']
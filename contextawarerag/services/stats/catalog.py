@@ -0,0 +1,210 @@
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_CATEGORY = 'Unknown'
+
+_PRICE_RE = re.compile(r"-?\d+(?:\.\d+)?")
+_INGREDIENTS_RE = re.compile(r"^\s*Ingredients:\s*(.*)$", re.M)
+
+# What a document adds to its category: (category, price, ingredients)
+Contribution = Tuple[str, Optional[float], List[str]]
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """Price as a float from a number or a string like ``'$1,049.99'``"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        match = _PRICE_RE.search(value.replace(',', ''))
+        if match:
+            return float(match.group())
+    return None
+
+
+def _field_name(ingredient: str) -> str:
+    # Ingredients become keys of a subdocument, where '.' and a leading '$' are not allowed
+    return ingredient.replace('.', '_').lstrip('$')
+
+
+def document_ingredients(document: Mapping[str, Any]) -> List[str]:
+    """Distinct, lower-cased ingredients from metadata or the content's Ingredients line"""
+    raw = (document.get('metadata') or {}).get('ingredients')
+    if raw is None:
+        match = _INGREDIENTS_RE.search(document.get('content') or '')
+        raw = match.group(1) if match else ''
+    items = raw if isinstance(raw, (list, tuple)) else str(raw).split(',')
+    names = (_field_name(str(item).strip().lower()) for item in items)
+    return list(dict.fromkeys(name for name in names if name and name != 'n/a'))
+
+
+def contribution(document: Mapping[str, Any]) -> Contribution:
+    metadata = document.get('metadata') or {}
+    return (
+        metadata.get('category') or UNKNOWN_CATEGORY,
+        parse_price(metadata.get('price')),
+        document_ingredients(document),
+    )
+
+
+class _Delta:
+    def __init__(self):
+        self.count = 0
+        self.price_sum = 0.0
+        self.price_count = 0
+        self.added_prices: List[float] = []
+        self.removed_prices: List[float] = []
+        self.ingredients: Counter = Counter()
+
+    def add(self, price: Optional[float], ingredients: Iterable[str], sign: int):
+        self.count += sign
+        if price is not None:
+            self.price_sum += sign * price
+            self.price_count += sign
+            if sign < 0:
+                self.removed_prices.append(price)
+            elif price in self.removed_prices:
+                # Re-stored at the same price: the bounds cannot have changed
+                self.removed_prices.remove(price)
+            else:
+                self.added_prices.append(price)
+        for ingredient in ingredients:
+            self.ingredients[ingredient] += sign
+
+    def update(self) -> Dict[str, Any]:
+        inc = {'count': self.count, 'price_sum': self.price_sum, 'price_count': self.price_count}
+        inc.update({f'ingredients.{name}': n for name, n in self.ingredients.items() if n})
+        update = {'$inc': inc}
+        if self.added_prices:
+            update['$min'] = {'price_min': min(self.added_prices)}
+            update['$max'] = {'price_max': max(self.added_prices)}
+        return update
+
+
+class CatalogStats:
+    """Per-category counts, price bounds and ingredient frequencies.
+
+    Each category has one document in a small stats collection, updated with
+    ``$inc`` deltas as content is written, so reading the stats costs one
+    document per category however large the catalog grows. Replacing a
+    document subtracts its previous contribution. Price bounds only ever
+    widen through ``$min``/``$max``; when the cheapest or dearest product
+    of a category goes away, that category's bounds are recomputed.
+    ``rebuild`` recomputes everything from the content collection.
+    """
+
+    def __init__(self, collection: str = 'catalog_stats', content_collection: str = 'rag_content',
+                 top_ingredients: int = 10):
+        self.collection = collection
+        self.content_collection = content_collection
+        self.top_ingredients = top_ingredients
+
+    async def previous(self, db: Any, ids: Iterable[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Stored versions of documents about to be replaced, keyed by _id"""
+        ids = list(ids)
+        if not ids:
+            return {}
+        found = {}
+        async for doc in db[self.content_collection].find({'_id': {'$in': ids}}, {'content': 1, 'metadata': 1}):
+            found[doc['_id']] = doc
+        return found
+
+    async def apply(self, db: Any, written: Iterable[Mapping[str, Any]],
+                    previous: Optional[Mapping[Any, Mapping[str, Any]]] = None):
+        """Fold written documents, and the versions they replaced, into the stats"""
+        previous = previous or {}
+        deltas: Dict[str, _Delta] = defaultdict(_Delta)
+        # A batch can hold several versions of a document; only the last was stored
+        latest = {document.get('_id', id(document)): document for document in written}
+        for document in latest.values():
+            old = previous.get(document.get('_id'))
+            if old is not None:
+                category, price, ingredients = contribution(old)
+                deltas[category].add(price, ingredients, -1)
+            category, price, ingredients = contribution(document)
+            deltas[category].add(price, ingredients, 1)
+
+        collection = db[self.collection]
+        for category, delta in deltas.items():
+            await collection.update_one({'_id': category}, delta.update(), upsert=True)
+            if delta.removed_prices:
+                await self._refresh_bounds(db, category, delta.removed_prices)
+
+    async def _refresh_bounds(self, db: Any, category: str, removed: List[float]):
+        stats = await db[self.collection].find_one({'_id': category})
+        if stats is None:
+            return
+        if stats.get('count', 0) <= 0:
+            await db[self.collection].delete_many({'_id': category})
+            return
+        low, high = stats.get('price_min'), stats.get('price_max')
+        if low is not None and high is not None and low < min(removed) and max(removed) < high:
+            return
+        prices = []
+        async for doc in db[self.content_collection].find({'metadata.category': category}, {'metadata.price': 1}):
+            price = parse_price((doc.get('metadata') or {}).get('price'))
+            if price is not None:
+                prices.append(price)
+        bounds = {'price_min': min(prices), 'price_max': max(prices)} if prices else {}
+        await db[self.collection].update_one(
+            {'_id': category},
+            {'$set': bounds} if bounds else {'$unset': {'price_min': '', 'price_max': ''}}
+        )
+
+    async def rebuild(self, db: Any) -> int:
+        """Recompute every category from the content collection; returns the documents scanned"""
+        deltas: Dict[str, _Delta] = defaultdict(_Delta)
+        scanned = 0
+        async for document in db[self.content_collection].find({}, {'content': 1, 'metadata': 1}):
+            category, price, ingredients = contribution(document)
+            deltas[category].add(price, ingredients, 1)
+            scanned += 1
+
+        collection = db[self.collection]
+        for category, delta in deltas.items():
+            stats = {
+                'count': delta.count,
+                'price_sum': delta.price_sum,
+                'price_count': delta.price_count,
+                'ingredients': {name: n for name, n in delta.ingredients.items() if n},
+            }
+            if delta.added_prices:
+                stats['price_min'] = min(delta.added_prices)
+                stats['price_max'] = max(delta.added_prices)
+            await collection.replace_one({'_id': category}, stats, upsert=True)
+        await collection.delete_many({'_id': {'$nin': list(deltas)}})
+        logger.info(f"Rebuilt catalog stats for {len(deltas)} categories from {scanned} documents")
+        return scanned
+
+    async def summary(self, db: Any) -> Dict[str, Any]:
+        """``{"total", "top_ingredients", "categories": {category: {"count", "price", "top_ingredients"}}}``
+
+        The outer ``top_ingredients`` ranks ingredients across all categories.
+        """
+        categories = {}
+        total = 0
+        overall: Counter = Counter()
+        async for stats in db[self.collection].find({}):
+            count = stats.get('count', 0)
+            if count <= 0:
+                continue
+            total += count
+            price_count = stats.get('price_count', 0)
+            ingredients = Counter({name: n for name, n in (stats.get('ingredients') or {}).items() if n > 0})
+            overall.update(ingredients)
+            categories[stats['_id']] = {
+                'count': count,
+                'price': {
+                    'min': stats.get('price_min'),
+                    'max': stats.get('price_max'),
+                    'avg': round(stats.get('price_sum', 0.0) / price_count, 2) if price_count else None,
+                },
+                'top_ingredients': ingredients.most_common(self.top_ingredients),
+            }
+        return {'total': total, 'top_ingredients': overall.most_common(self.top_ingredients),
+                'categories': categories}
@@ -1,36 +1,208 @@
+"""Queue-based logging that keeps handler I/O off the calling thread.
+
+Loggers only enqueue records; a ``QueueListener`` thread formats them and
+writes to the console and a size-rotated file. A full queue drops records
+instead of blocking the caller. Chatty call sites can be rate limited or
+sampled before anything is queued.
+"""
+from typing import Any, Dict, Hashable, Optional, Tuple
+import atexit
+import copy
+import json
 import logging
-from typing import Dict, Any
-
-def setup_logging(config: Dict[str, Any] = None):
-    """Setup logging configuration"""
-    logging_config = {
-        'version': 1,
-        'disable_existing_loggers': False,
-        'formatters': {
-            'standard': {
-                'format': '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
-            },
-        },
-        'handlers': {
-            'default': {
-                'level': 'INFO',
-                'formatter': 'standard',
-                'class': 'logging.StreamHandler',
-            },
-            'file': {
-                'level': 'INFO',
-                'formatter': 'standard',
-                'class': 'logging.FileHandler',
-                'filename': 'rag_chat.log',
-                'mode': 'a',
-            },
-        },
-        'loggers': {
-            '': {
-                'handlers': ['default', 'file'],
-                'level': 'INFO',
-                'propagate': True
-            }
+import logging.handlers
+import queue
+import threading
+import time
+
+STANDARD_FORMAT = '%(asctime)s [%(levelname)s] %(name)s: %(message)s'
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed through ``extra``"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
         }
-    }
-    logging.config.dictConfig(logging_config) 
\ No newline at end of file
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def _call_site(record: logging.LogRecord) -> Tuple[Hashable, ...]:
+    # Messages are mostly f-strings, so the call site identifies a message kind
+    return (record.name, record.pathname, record.lineno)
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per call site: ``rate`` records per second, bursts of ``burst``.
+
+    Records at or above ``exempt_level`` always pass, so by default only
+    DEBUG to WARNING noise is throttled and errors are never dropped. The
+    first record let through after some were dropped says how many.
+    """
+
+    def __init__(self, rate: float = 10.0, burst: int = 20, exempt_level: int = logging.ERROR):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.exempt_level = exempt_level
+        # call site -> [tokens, last refill, suppressed]
+        self._buckets: Dict[Tuple[Hashable, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.exempt_level:
+            return True
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.setdefault(_call_site(record), [self.burst, now, 0])
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed:
+            record.msg = f"{record.getMessage()} [{suppressed} similar messages suppressed]"
+            record.args = None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every ``1 / rate`` records per call site for sampled loggers.
+
+    ``rates`` maps logger names to the fraction of their records to keep,
+    applying to child loggers too. Records above ``max_level`` always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float], max_level: int = logging.INFO):
+        super().__init__()
+        self.rates = dict(rates)
+        self.max_level = max_level
+        self._counts: Dict[Tuple[Hashable, ...], int] = {}
+        self._lock = threading.Lock()
+
+    def _rate(self, name: str) -> float:
+        while True:
+            if name in self.rates:
+                return self.rates[name]
+            if '.' not in name:
+                return self.rates.get('', 1.0)
+            name = name.rsplit('.', 1)[0]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1:
+            return True
+        if rate <= 0:
+            return False
+        with self._lock:
+            site = _call_site(record)
+            seen = self._counts.get(site, 0)
+            self._counts[site] = seen + 1
+        return seen % max(1, round(1 / rate)) == 0
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full rather than blocking"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Merge args and render the traceback now, but leave formatting to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _EXCEPTION_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(config: Dict[str, Any] = None) -> logging.handlers.QueueListener:
+    """Route the root logger through a queue to console and rotating file handlers.
+
+    Config keys, all optional: ``level`` ('INFO'), ``console`` (True),
+    ``file`` ('rag_chat.log', None to disable), ``max_bytes`` (10 MB),
+    ``backup_count`` (5), ``json`` (False), ``queue_size`` (10000),
+    ``rate_limit`` (RateLimitFilter arguments) and ``sample`` (logger name
+    to fraction kept). Calling it again replaces the previous setup.
+    Returns the running listener, which is stopped at exit.
+    """
+    global _listener
+    config = config or {}
+    level = config.get('level', 'INFO')
+    formatter = JsonFormatter() if config.get('json') else logging.Formatter(STANDARD_FORMAT)
+
+    handlers = []
+    if config.get('console', True):
+        handlers.append(logging.StreamHandler())
+    filename = config.get('file', 'rag_chat.log')
+    if filename:
+        handlers.append(logging.handlers.RotatingFileHandler(
+            filename,
+            maxBytes=config.get('max_bytes', 10 * 1024 * 1024),
+            backupCount=config.get('backup_count', 5),
+            encoding='utf-8',
+            delay=True
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = DroppingQueueHandler(queue.Queue(config.get('queue_size', 10000)))
+    if config.get('sample'):
+        queue_handler.addFilter(SamplingFilter(config['sample']))
+    if config.get('rate_limit') is not None:
+        queue_handler.addFilter(RateLimitFilter(**config['rate_limit']))
+
+    root = logging.getLogger()
+    shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+    root.addHandler(queue_handler)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
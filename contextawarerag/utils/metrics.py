@@ -0,0 +1,243 @@
+"""In-process metrics for hot paths, exported in Prometheus text format.
+
+Stages are timed with ``timer`` (a context manager) or ``timed`` (a
+decorator for sync and async functions) into one latency histogram
+labelled by stage; exceptions also count towards an error counter.
+
+Metrics can be switched off at runtime with ``configure(enabled=False)``,
+after which ``timer`` hands back a shared no-op and ``timed`` wrappers do a
+single flag check. Setting ``CONTEXTAWARERAG_METRICS=0`` in the environment
+disables them from import, and ``timed`` then returns functions unwrapped.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import asyncio
+import bisect
+import functools
+import os
+import time
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow backends
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label combination; a no-op while its registry is disabled"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str = '', labelnames: Sequence[str] = (),
+                 registry: Optional['MetricsRegistry'] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *labelvalues: str):
+        if self.registry is not None and not self.registry.enabled:
+            return
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def clear(self):
+        self._values.clear()
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labelvalues)} {_format_value(value)}"
+
+
+class Histogram:
+    """Bucketed observations per label combination.
+
+    Each combination keeps per-bucket counts plus a running sum; buckets are
+    made cumulative only when rendered. Observations are dropped while its
+    registry is disabled.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str = '', labelnames: Sequence[str] = (),
+                 registry: Optional['MetricsRegistry'] = None, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.registry = registry
+        self.buckets = tuple(sorted(buckets))
+        # labelvalues -> [count per bucket, plus one for +Inf] + [sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        if self.registry is not None and not self.registry.enabled:
+            return
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labelvalues: str) -> int:
+        series = self._series.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def sum(self, *labelvalues: str) -> float:
+        series = self._series.get(labelvalues)
+        return series[-1] if series else 0.0
+
+    def clear(self):
+        self._series.clear()
+
+    def samples(self) -> Iterable[str]:
+        for labelvalues, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, labelvalues, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield f"{self.name}_sum{labels} {_format_value(series[-1])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """Named metrics, created on first use and rendered together"""
+
+    def __init__(self, enabled: bool = True, namespace: str = 'contextawarerag'):
+        self.enabled = enabled
+        self.namespace = namespace
+        self._metrics: Dict[str, Any] = {}
+
+    def _get(self, cls, name: str, help: str, labelnames: Sequence[str], **kwargs) -> Any:
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        metric = self._metrics.get(full_name)
+        if metric is None:
+            metric = self._metrics[full_name] = cls(full_name, help, labelnames, self, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {full_name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name: str, help: str = '', labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def histogram(self, name: str, help: str = '', labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def clear(self):
+        """Reset every metric's values, keeping the metrics registered"""
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry(enabled=os.environ.get('CONTEXTAWARERAG_METRICS', '1') != '0')
+_DISABLED_AT_IMPORT = not REGISTRY.enabled
+
+STAGE_SECONDS = REGISTRY.histogram('stage_duration_seconds', 'Time spent per pipeline stage or backend call',
+                                   ('stage',))
+STAGE_ERRORS = REGISTRY.counter('stage_errors_total', 'Exceptions raised per pipeline stage or backend call',
+                                ('stage',))
+
+
+def configure(enabled: bool = True):
+    """Turn metric collection on or off for the whole process"""
+    REGISTRY.enabled = enabled
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class _Timer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self) -> '_Timer':
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        STAGE_SECONDS.observe(time.perf_counter() - self.start, self.stage)
+        if exc_type is not None:
+            STAGE_ERRORS.inc(1, self.stage)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullTimer':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(stage: str):
+    """Context manager timing a block as ``stage``; a shared no-op when disabled"""
+    return _Timer(stage) if REGISTRY.enabled else _NULL_TIMER
+
+
+def timed(stage: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorator timing each call of a sync or async function as ``stage``.
+
+    ``stage`` defaults to the function's qualified name.
+    """
+    def decorate(fn: Callable) -> Callable:
+        if _DISABLED_AT_IMPORT:
+            return fn
+        name = stage or fn.__qualname__
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not REGISTRY.enabled:
+                    return await fn(*args, **kwargs)
+                with _Timer(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return fn(*args, **kwargs)
+            with _Timer(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorate
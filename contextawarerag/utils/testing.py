@@ -0,0 +1,198 @@
+"""In-memory stand-ins for the Mongo, Redis and Postgres clients.
+
+They implement the subset of the motor, ``redis.asyncio`` and asyncpg APIs
+the package uses, so tests and benchmarks can run without live services.
+"""
+from typing import Any, Dict, List
+import copy
+import itertools
+import re
+
+from contextawarerag.core.storage.documents import DocumentCollection
+
+
+class InMemoryCollection(DocumentCollection):
+    """Documents kept in a dict keyed by ``_id``, in insertion order.
+
+    Records each ``find`` query in ``queries`` and each bulk write's size
+    in ``bulk_sizes``.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._docs: Dict[Any, Dict[str, Any]] = {}
+        self._seq: Dict[Any, int] = {}
+        self._counter = itertools.count()
+        self.queries = []
+        self.bulk_sizes = []
+
+    @property
+    def docs(self) -> List[Dict[str, Any]]:
+        return list(self._docs.values())
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _ids(self):
+        return list(self._docs)
+
+    def _contains(self, doc_id):
+        return doc_id in self._docs
+
+    def _load(self, doc_id):
+        return self._docs[doc_id]
+
+    def _store(self, document):
+        doc_id = document['_id']
+        if doc_id not in self._docs:
+            self._seq[doc_id] = next(self._counter)
+        self._docs[doc_id] = document
+
+    def _delete(self, doc_id):
+        del self._docs[doc_id]
+        del self._seq[doc_id]
+
+    def _position(self, doc_id):
+        return self._seq[doc_id]
+
+    def _export(self, document):
+        return copy.deepcopy(document)
+
+    def find(self, query=None, projection=None):
+        self.queries.append(query or {})
+        return super().find(query, projection)
+
+    async def bulk_write(self, requests, ordered=True):
+        self.bulk_sizes.append(len(requests))
+        return await super().bulk_write(requests, ordered)
+
+
+class InMemoryDatabase:
+    def __init__(self):
+        self._collections = {}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self._collections.setdefault(name, InMemoryCollection())
+
+    __getitem__ = __getattr__
+
+
+class InMemoryRedis:
+    """Subset of the ``redis.asyncio`` client used by the cache layer"""
+
+    def __init__(self):
+        self.data = {}
+        self.calls = []
+
+    async def ping(self):
+        return True
+
+    async def get(self, key):
+        self.calls.append(('get', key))
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.calls.append(('set', key))
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        return True
+
+    async def mget(self, keys):
+        self.calls.append(('mget', tuple(keys)))
+        return [self.data.get(key) for key in keys]
+
+    async def incr(self, key):
+        value = int(self.data.get(key, 0)) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    def pipeline(self):
+        return _InMemoryPipeline(self)
+
+
+class _InMemoryPipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._ops = []
+
+    def incr(self, key):
+        self._ops.append(('incr', key))
+        return self
+
+    async def execute(self):
+        return [await getattr(self._redis, op)(key) for op, key in self._ops]
+
+
+class InMemoryPgConnection:
+    """Subset of an asyncpg connection: COPY, a grouped volume query and cursors"""
+
+    _from_re = re.compile(r"FROM (\w+)")
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.copies = []
+
+    async def execute(self, query, *args):
+        return 'OK'
+
+    async def copy_records_to_table(self, table, records, columns):
+        rows = [dict(zip(columns, record)) for record in records]
+        self.copies.append((table, len(rows)))
+        self.tables.setdefault(table, []).extend(rows)
+
+    def _rows_in_period(self, query, start, end):
+        table = self._from_re.search(query).group(1)
+        return [row for row in self.tables.get(table, []) if start <= row['ordered_at'] < end]
+
+    async def fetch(self, query, start, end):
+        volumes = {}
+        for row in self._rows_in_period(query, start, end):
+            volumes[row['distributor_id']] = (volumes.get(row['distributor_id'], 0.0)
+                                              + row['quantity'] * row['unit_price'])
+        return [{'distributor_id': d, 'volume': v} for d, v in volumes.items()]
+
+    async def cursor(self, query, start, end):
+        columns = query.split('SELECT ', 1)[1].split(' FROM', 1)[0].split(', ')
+        rows = [tuple(row[c] for c in columns) for row in self._rows_in_period(query, start, end)]
+        return _InMemoryPgCursor(rows)
+
+    def transaction(self):
+        return _NullContext()
+
+    async def fetchval(self, query):
+        return 1
+
+
+class _InMemoryPgCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def fetch(self, n):
+        batch, self.rows = self.rows[:n], self.rows[n:]
+        return batch
+
+
+class _NullContext:
+    def __init__(self, value=None):
+        self.value = value
+
+    async def __aenter__(self):
+        return self.value
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class InMemoryPgPool:
+    """Subset of an asyncpg pool backed by lists of row dicts"""
+
+    def __init__(self):
+        self.tables = {}
+        self.connection = InMemoryPgConnection(self.tables)
+
+    def acquire(self):
+        return _NullContext(self.connection)
+
+    async def close(self):
+        pass
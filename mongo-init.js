@@ -3,9 +3,8 @@ db = db.getSiblingDB('nuskin_rag');
 // Create collections
 db.createCollection('rag_content');
 
-// Create indexes
-db.rag_content.createIndex({ "metadata.product_id": 1 });
-db.rag_content.createIndex({ "metadata.category": 1 });
+// Indexes are declared in contextawarerag/core/data/indexes.py and
+// created by DataManager.initialize()
 
 // Set up initial metadata
 db.rag_content.insertOne({
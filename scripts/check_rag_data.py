@@ -1,22 +1,24 @@
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 from pprint import pprint
+from contextawarerag.services.stats import CatalogStats
 
 async def check_rag_data():
     # Connect to MongoDB
     client = AsyncIOMotorClient('mongodb://localhost:27017')
     db = client.nuskin_rag
     
-    # Get total count
-    total_products = await db.rag_content.count_documents({})
-    print(f"\nTotal products stored: {total_products}")
+    # Counts come from the stats collection, one document per category
+    stats = CatalogStats()
+    summary = await stats.summary(db)
+    if not summary["categories"]:
+        await stats.rebuild(db)
+        summary = await stats.summary(db)
+    print(f"\nTotal products stored: {summary['total']}")
     
-    # Get products by category
-    categories = await db.rag_content.distinct("metadata.category")
     print("\nProducts by category:")
-    for category in categories:
-        count = await db.rag_content.count_documents({"metadata.category": category})
-        print(f"{category}: {count} products")
+    for category, category_stats in sorted(summary["categories"].items()):
+        print(f"{category}: {category_stats['count']} products")
     
     # Show sample products
     print("\nSample products:")
@@ -0,0 +1,27 @@
+"""One-off migration: rewrite string prices in rag_content as numbers.
+
+Documents stored before prices were validated may hold strings like
+'$49.99'; price range filters and the (category, price) index only cover
+numeric prices. Safe to re-run: only string prices are touched.
+"""
+import asyncio
+import logging
+
+from contextawarerag import DataManager
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    config = {
+        'mongodb': {'uri': 'mongodb://localhost:27017', 'database': 'nuskin_rag'},
+        'redis': {'host': 'localhost', 'port': 6379},
+    }
+    async with DataManager(config) as manager:
+        changed = await manager.migrate_prices()
+        logger.info(f"Rewrote {changed} string prices")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,20 +1,40 @@
 import asyncio
 import aiohttp
 import logging
-from bs4 import BeautifulSoup
 from contextawarerag import DataManager
-from typing import List, Dict, Any
-import json
-import time
+from contextawarerag.core.data.bulk import BulkWriter
+from contextawarerag.core.processing import (
+    CrawlPipeline,
+    CrawlStateStore,
+    HostRateLimiter,
+    ParseExecutor,
+    content_hash,
+    create_executor,
+    extract_product_urls,
+    fastest_backend,
+    parse_product_html,
+    stable_document_id,
+)
+from contextawarerag.utils.logging_config import setup_logging
+from contextawarerag.utils.metrics import timer
+from typing import AsyncIterator, List, Dict, Any, Mapping, Optional, Tuple
 from fake_useragent import UserAgent
-import random
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class NuSkinScraper:
-    def __init__(self):
-        self.base_url = "https://www.nuskin.com"
+    def __init__(
+        self,
+        base_url: str = "https://www.nuskin.com",
+        requests_per_second: float = 1.0,
+        fetch_workers: int = 4,
+        parse_workers: Optional[int] = None,
+        store_workers: int = 1,
+        store_batch_size: int = 500,
+        executor: Optional[ParseExecutor] = None,
+        parser_backend: Optional[str] = None
+    ):
+        self.base_url = base_url
         self.categories = [
             "/us/en/catalog/exfoliators",
             "/us/en/catalog/hair_care",
@@ -23,6 +43,16 @@ class NuSkinScraper:
             "/us/en/catalog/tru_face"
         ]
         self.rag_manager = None
+        self.crawl_state = CrawlStateStore()
+        self._unchanged: List[Dict[str, Any]] = []
+        self.rate_limiter = HostRateLimiter(rate=requests_per_second)
+        self.executor = executor or create_executor('process')
+        self.parser_backend = parser_backend or fastest_backend()
+        self.fetch_workers = fetch_workers
+        # Enough parse workers to keep every pool process busy
+        self.parse_workers = parse_workers or getattr(self.executor, 'max_workers', 2)
+        self.store_workers = store_workers
+        self.store_batch_size = store_batch_size
         self.user_agent = UserAgent()
         self.headers = {
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -48,184 +78,234 @@ class NuSkinScraper:
             }
             self.rag_manager = DataManager(config)
             await self.rag_manager.initialize()
+            self.crawl_state = CrawlStateStore(self.rag_manager.db.crawl_state)
+            await self.crawl_state.load()
             logger.info("RAG manager initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize RAG manager: {e}")
             raise
 
-    async def fetch_page(self, session: aiohttp.ClientSession, url: str) -> str:
-        """Fetch page content with retry logic"""
+    async def _get(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        extra_headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, str, Mapping[str, str]]:
+        """GET a page with retry logic; returns (status, text, response headers)
+
+        Headers keep aiohttp's case-insensitive lookup, since servers differ
+        in how they case names like ETag.
+        """
         retries = 3
         delay = 1
-        
+        status = 0
+
         for attempt in range(retries):
             try:
-                self.headers['User-Agent'] = self.user_agent.random
-                async with session.get(url, headers=self.headers, timeout=30) as response:
+                await self.rate_limiter.acquire(url)
+                headers = {**self.headers, **(extra_headers or {}), 'User-Agent': self.user_agent.random}
+                async with session.get(url, headers=headers, timeout=30) as response:
                     if response.status == 200:
                         logger.info(f"Successfully fetched {url}")
-                        return await response.text()
+                        return 200, await response.text(), response.headers.copy()
+                    if response.status == 304:
+                        return 304, "", response.headers.copy()
+                    status = response.status
                     logger.warning(f"Failed to fetch {url}, status: {response.status}")
             except Exception as e:
                 logger.error(f"Attempt {attempt + 1} failed for {url}: {e}")
                 if attempt < retries - 1:
                     await asyncio.sleep(delay * (attempt + 1))
                     continue
-        return ""
+        return status, "", {}
 
-    async def parse_product(self, html: str, category: str) -> Dict[str, Any]:
-        """Parse product details from HTML"""
-        soup = BeautifulSoup(html, 'html.parser')
-        product = {}
-        
-        try:
-            # Product name
-            name_elem = soup.select_one('.product-name, .product-title, h1')
-            if name_elem:
-                product['name'] = name_elem.text.strip()
-
-            # Price
-            price_elem = soup.select_one('.product-price, .price-sales, .price')
-            if price_elem:
-                price_text = price_elem.text.strip()
-                # Extract numbers from price text
-                price = ''.join(c for c in price_text if c.isdigit() or c == '.')
-                product['price'] = price
-
-            # Description
-            desc_elem = soup.select_one('.product-description, .description, .product-details')
-            if desc_elem:
-                product['description'] = desc_elem.text.strip()
-
-            # Benefits
-            benefits = []
-            benefit_elems = soup.select('.benefits li, .product-benefits li, .key-benefits li')
-            for elem in benefit_elems:
-                benefits.append(elem.text.strip())
-            product['benefits'] = benefits
-
-            # Ingredients
-            ingr_elem = soup.select_one('.ingredients, .ingredient-list')
-            if ingr_elem:
-                product['ingredients'] = ingr_elem.text.strip()
-
-            # Product ID/SKU
-            sku_elem = soup.select_one('[data-product-id], [data-sku]')
-            if sku_elem:
-                product['id'] = sku_elem.get('data-product-id') or sku_elem.get('data-sku')
-            else:
-                product['id'] = f"NSK-{random.randint(10000, 99999)}"
+    async def fetch_page(self, session: aiohttp.ClientSession, url: str) -> str:
+        """Fetch page content with retry logic"""
+        _, text, _ = await self._get(session, url)
+        return text
+
+    async def fetch_if_changed(self, session: aiohttp.ClientSession, url: str) -> Optional[Dict[str, Any]]:
+        """Conditionally fetch a page; returns None when it is unchanged since the last crawl"""
+        status, html, headers = await self._get(session, url, self.crawl_state.conditional_headers(url))
+        if status == 304:
+            logger.info(f"Not modified: {url}")
+            return None
+        if not html:
+            return None
 
-            product['category'] = category
+        page = {
+            "url": url,
+            "html": html,
+            "etag": headers.get('ETag'),
+            "last_modified": headers.get('Last-Modified'),
+            "content_hash": content_hash(html)
+        }
+        if self.crawl_state.is_unchanged(url, page["content_hash"]):
+            logger.info(f"Content unchanged: {url}")
+            # Keep the validators fresh so the next crawl can get a 304
+            self._unchanged.append(page)
+            return None
+        return page
+
+    async def parse_product(self, html: str, category: str, url: Optional[str] = None) -> Dict[str, Any]:
+        """Parse product details from HTML in the parse executor"""
+        with timer('parse'):
+            product = await self.executor.run(parse_product_html, html, category, self.parser_backend, url)
+        if product:
             logger.info(f"Successfully parsed product: {product.get('name', 'Unknown')}")
-            return product
-            
-        except Exception as e:
-            logger.error(f"Error parsing product: {e}")
-            return {}
+        return product
 
     async def get_product_urls(self, html: str) -> List[str]:
-        """Extract product URLs from category page"""
-        soup = BeautifulSoup(html, 'html.parser')
-        urls = []
-        
-        # Try different selectors for product links
-        selectors = [
-            '.product-tile a[href*="/product/"]',
-            '.product-grid a[href*="/product/"]',
-            '.product-list a[href*="/product/"]',
-            'a[href*="/product/"]'
-        ]
-        
-        for selector in selectors:
-            links = soup.select(selector)
-            if links:
-                for link in links:
-                    href = link.get('href')
-                    if href and '/product/' in href:
-                        full_url = href if href.startswith('http') else f"{self.base_url}{href}"
-                        urls.append(full_url)
-                break
-                
+        """Extract product URLs from category page in the parse executor"""
+        urls = await self.executor.run(extract_product_urls, html, self.base_url, self.parser_backend)
         logger.info(f"Found {len(urls)} product URLs")
         return urls
 
-    async def store_product_in_rag(self, product: Dict[str, Any]):
-        """Store product in RAG system"""
+    def build_rag_document(self, product: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the rag_content document for a parsed product"""
+        content = f"""
+        Product: {product.get('name', 'N/A')}
+        Description: {product.get('description', 'N/A')}
+        Benefits: {', '.join(product.get('benefits', []))}
+        Ingredients: {product.get('ingredients', 'N/A')}
+        """
+
+        metadata = {
+            "product_id": product.get('id', 'N/A'),
+            "category": product.get('category', 'Unknown'),
+            "price": product.get('price'),
+            "url": product.get('url', 'N/A')
+        }
+
+        return {
+            "_id": stable_document_id(product.get('id'), product.get('url')),
+            "content": content.strip(),
+            "content_type": "product",
+            "metadata": metadata
+        }
+
+    async def store_product_in_rag(
+        self,
+        product: Dict[str, Any],
+        writer: Optional[BulkWriter] = None
+    ) -> Optional[int]:
+        """Store product in RAG system, through a bulk writer when one is given.
+
+        Returns the writer's result index for the product, if it was queued.
+        """
         try:
             if not product:
-                return
-
-            content = f"""
-            Product: {product.get('name', 'N/A')}
-            Description: {product.get('description', 'N/A')}
-            Benefits: {', '.join(product.get('benefits', []))}
-            Ingredients: {product.get('ingredients', 'N/A')}
-            """
-
-            metadata = {
-                "product_id": product.get('id', 'N/A'),
-                "category": product.get('category', 'Unknown'),
-                "price": product.get('price', '0.00'),
-                "url": product.get('url', 'N/A')
-            }
+                return None
 
-            await self.rag_manager.store_rag_content(
-                content=content.strip(),
-                content_type="product",
-                metadata=metadata
-            )
+            document = self.build_rag_document(product)
+            index = None
+            if writer is not None:
+                index = await writer.put(document)
+            else:
+                await self.rag_manager.store_rag_content(
+                    content=document["content"],
+                    content_type=document["content_type"],
+                    metadata=document["metadata"],
+                    document_id=document["_id"]
+                )
 
             logger.info(f"Stored product: {product.get('name', 'Unknown')}")
+            return index
 
         except Exception as e:
             logger.error(f"Error storing product in RAG: {e}")
+            return None
+
+    async def discover_product_urls(self, session: aiohttp.ClientSession) -> AsyncIterator[Tuple[str, str]]:
+        """Yield (product URL, category) pairs from each category page"""
+        for category in self.categories:
+            category_url = f"{self.base_url}{category}"
+            logger.info(f"Scraping category: {category_url}")
+
+            category_html = await self.fetch_page(session, category_url)
+            if not category_html:
+                continue
+
+            for url in await self.get_product_urls(category_html):
+                yield url, category
 
     async def scrape_products(self, limit: int = 100):
-        """Main scraping function"""
+        """Main scraping function; unchanged pages are skipped before parsing"""
+        self._unchanged = []
+        # Pages queued for writing, by URL, until their batch is written
+        pending: Dict[str, Dict[str, Any]] = {}
+        recorded_unchanged = 0
+
+        def take_unchanged() -> List[Dict[str, Any]]:
+            nonlocal recorded_unchanged
+            pages = self._unchanged[recorded_unchanged:]
+            recorded_unchanged = len(self._unchanged)
+            return pages
+
+        async def record_written(documents: List[Dict[str, Any]]):
+            # Only pages whose documents were actually written are remembered,
+            # so a failed write is retried on the next crawl. Recording each
+            # batch as it lands keeps the progress of an interrupted crawl.
+            pages = [pending.pop(document["metadata"].get("url"), None) for document in documents]
+            await self.crawl_state.record_many([page for page in pages if page] + take_unchanged())
+
         async with aiohttp.ClientSession() as session:
-            products_stored = 0
-            
-            for category in self.categories:
-                if products_stored >= limit:
-                    break
-
-                category_url = f"{self.base_url}{category}"
-                logger.info(f"Scraping category: {category_url}")
-                
-                # Fetch category page
-                category_html = await self.fetch_page(session, category_url)
-                if not category_html:
-                    continue
-                
-                # Get product URLs
-                product_urls = await self.get_product_urls(category_html)
-                
-                for url in product_urls:
-                    if products_stored >= limit:
-                        break
-
-                    # Add delay to avoid rate limiting
-                    await asyncio.sleep(random.uniform(1, 2))
-                    
-                    # Fetch and parse product
-                    product_html = await self.fetch_page(session, url)
-                    if product_html:
-                        product_data = await self.parse_product(product_html, category)
-                        if product_data:
-                            product_data['url'] = url
-                            await self.store_product_in_rag(product_data)
-                            products_stored += 1
-                            logger.info(f"Progress: {products_stored}/{limit} products stored")
+            async with self.rag_manager.bulk_writer(self.store_batch_size, on_written=record_written) as writer:
+
+                async def fetch(item: Tuple[str, str]) -> Optional[Tuple[str, Dict[str, Any]]]:
+                    url, category = item
+                    page = await self.fetch_if_changed(session, url)
+                    return (category, page) if page else None
+
+                async def parse(item: Tuple[str, Dict[str, Any]]) -> Optional[Tuple[Dict, Dict]]:
+                    category, page = item
+                    product_data = await self.parse_product(page["html"], category, page["url"])
+                    if not product_data:
+                        return None
+                    product_data['url'] = page["url"]
+                    return product_data, page
+
+                async def store(item: Tuple[Dict[str, Any], Dict[str, Any]]):
+                    product_data, page = item
+                    # Registered first, since the batch may be written before put returns
+                    pending[page["url"]] = page
+                    if await self.store_product_in_rag(product_data, writer) is None:
+                        pending.pop(page["url"], None)
+                    logger.info(f"Progress: {pipeline.stats['stored'] + 1}/{limit} products stored")
+
+                pipeline = CrawlPipeline(
+                    discover=lambda: self.discover_product_urls(session),
+                    fetch=fetch,
+                    parse=parse,
+                    store=store,
+                    fetch_workers=self.fetch_workers,
+                    parse_workers=self.parse_workers,
+                    store_workers=self.store_workers,
+                    limit=limit
+                )
+                try:
+                    stats = await pipeline.run()
+                finally:
+                    self.executor.shutdown()
+
+        await self.crawl_state.record_many(take_unchanged())
+        stats['unchanged'] = len(self._unchanged)
+        logger.info(f"Crawl finished: {dict(stats)}")
+        return stats
 
 async def main():
+    scraper = NuSkinScraper()
     try:
-        scraper = NuSkinScraper()
         await scraper.initialize_rag()
         await scraper.scrape_products(limit=100)
         logger.info("Product population completed!")
     except Exception as e:
         logger.error(f"Main execution failed: {e}")
+    finally:
+        if scraper.rag_manager:
+            await scraper.rag_manager.close()
 
 if __name__ == "__main__":
+    # Per-URL log lines go through the queue, capped per call site
+    setup_logging({'rate_limit': {'rate': 5.0, 'burst': 50}})
     asyncio.run(main())
\ No newline at end of file
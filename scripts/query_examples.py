@@ -1,26 +1,22 @@
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
 from pprint import pprint
+from contextawarerag.services.stats import CatalogStats
 
 async def run_queries():
     client = AsyncIOMotorClient('mongodb://localhost:27017')
     db = client.nuskin_rag
     
+    stats = CatalogStats(top_ingredients=5)
+    summary = await stats.summary(db)
+    if not summary["categories"]:
+        await stats.rebuild(db)
+        summary = await stats.summary(db)
+
     # 1. Price range analysis
-    pipeline = [
-        {
-            "$group": {
-                "_id": "$metadata.category",
-                "avg_price": {"$avg": "$metadata.price"},
-                "min_price": {"$min": "$metadata.price"},
-                "max_price": {"$max": "$metadata.price"}
-            }
-        }
-    ]
-    
     print("\nPrice Analysis by Category:")
-    async for result in db.rag_content.aggregate(pipeline):
-        pprint(result)
+    for category, category_stats in sorted(summary["categories"].items()):
+        pprint({"_id": category, **category_stats["price"]})
     
     # 2. Products without benefits
     print("\nProducts missing benefits:")
@@ -29,16 +25,8 @@ async def run_queries():
     
     # 3. Most common ingredients
     print("\nCommon ingredients:")
-    pipeline = [
-        {"$group": {
-            "_id": "$metadata.ingredients",
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"count": -1}},
-        {"$limit": 5}
-    ]
-    async for result in db.rag_content.aggregate(pipeline):
-        pprint(result)
+    for ingredient, count in summary["top_ingredients"]:
+        pprint({"_id": ingredient, "count": count})
 
 if __name__ == "__main__":
     asyncio.run(run_queries()) 
\ No newline at end of file
@@ -27,8 +27,6 @@ echo "Initializing database..."
 mongosh --eval "
     db = db.getSiblingDB('nuskin_rag');
     db.createCollection('rag_content');
-    db.rag_content.createIndex({ 'metadata.product_id': 1 });
-    db.rag_content.createIndex({ 'metadata.category': 1 });
 "
 
-echo "Setup complete!"
\ No newline at end of file
+echo "Setup complete! Indexes are created by DataManager on first start."
\ No newline at end of file
@@ -34,6 +34,14 @@ class RAGTester:
             rprint(f"[red]✗ Failed to initialize RAG manager: {e}[/red]")
             raise
 
+    async def _catalog_stats(self):
+        # Stats are kept on write; documents stored before they were enabled need a rebuild
+        stats = await self.rag_manager.get_catalog_stats()
+        if not stats['categories']:
+            await self.rag_manager.rebuild_catalog_stats()
+            stats = await self.rag_manager.get_catalog_stats()
+        return stats
+
     async def test_database_connection(self):
         """Test database connections"""
         try:
@@ -42,8 +50,10 @@ class RAGTester:
             rprint("[green]✓ MongoDB connection successful[/green]")
             
             # Count documents
-            count = await self.rag_manager.db.rag_content.count_documents({})
-            rprint(f"[blue]ℹ Total documents in RAG: {count}[/blue]")
+            stats = await self._catalog_stats()
+            rprint(f"[blue]ℹ Total documents in RAG: {stats['total']}[/blue]")
+            for category, category_stats in sorted(stats['categories'].items()):
+                rprint(f"[blue]  {category}: {category_stats['count']}[/blue]")
             
             return True
         except Exception as e:
@@ -71,7 +81,7 @@ class RAGTester:
                     metadata.get("product_id", "N/A"),
                     name,
                     metadata.get("category", "N/A"),
-                    f"${metadata.get('price', '0.00')}"
+                    "N/A" if metadata.get("price") is None else f"${float(metadata['price']):.2f}"
                 )
 
             console.print(table)
@@ -109,23 +119,16 @@ class RAGTester:
     async def test_category_distribution(self):
         """Display category distribution"""
         try:
-            pipeline = [
-                {"$group": {
-                    "_id": "$metadata.category",
-                    "count": {"$sum": 1}
-                }},
-                {"$sort": {"count": -1}}
-            ]
-            
+            # Counts come from the stats collection rather than a $group over rag_content
+            stats = await self._catalog_stats()
+
             table = Table(title="Product Category Distribution")
             table.add_column("Category", style="cyan")
             table.add_column("Count", style="magenta", justify="right")
-            
-            async for result in self.rag_manager.db.rag_content.aggregate(pipeline):
-                table.add_row(
-                    str(result["_id"]),
-                    str(result["count"])
-                )
+
+            categories = sorted(stats['categories'].items(), key=lambda item: item[1]['count'], reverse=True)
+            for category, category_stats in categories:
+                table.add_row(category, str(category_stats['count']))
             
             console.print(table)
             return True
@@ -1,5 +1,6 @@
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
+from contextawarerag.core.data.indexes import reconcile_indexes
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -17,9 +18,9 @@ async def verify_mongodb():
         # Get database
         db = client.nuskin_rag
         
-        # Create indexes if needed
-        await db.rag_content.create_index("metadata.product_id")
-        await db.rag_content.create_index("metadata.category")
+        # Same index specs DataManager reconciles at startup
+        report = await reconcile_indexes(db)
+        logger.info(f"Indexes: {report}")
         
         # Print database stats
         stats = await db.command("dbstats")
@@ -27,6 +27,9 @@ setup(
         # Async support
         "asyncio>=3.4.3",
         
+        # Retrieval
+        "numpy>=1.22.0",
+
         # Utilities
         "python-dotenv>=0.19.2",
         "pydantic>=2.0.0",
@@ -45,6 +48,9 @@ setup(
             'mypy>=0.981',
             'flake8>=4.0.1',
         ],
+        'parsing': [
+            'lxml>=4.9.0',
+        ],
         'chat': [
             'openai>=1.0.0',
             'langchain>=0.1.0',
@@ -0,0 +1,47 @@
+"""Shared fixtures backed by the in-memory service stand-ins."""
+import pytest
+
+from contextawarerag.utils.testing import InMemoryDatabase, InMemoryPgPool, InMemoryRedis
+
+
+@pytest.fixture
+def config():
+    return {
+        'mongodb': {'uri': 'mongodb://localhost:27017', 'database': 'test'},
+        'redis': {'host': 'localhost', 'port': 6379},
+        'postgres': {
+            'host': 'localhost',
+            'port': 5432,
+            'user': 'test',
+            'password': 'test',
+            'database': 'test'
+        }
+    }
+
+
+@pytest.fixture
+def make_memory_manager(config):
+    """Build DataManagers backed by in-memory collections, with extra config sections"""
+    from contextawarerag import DataManager
+
+    def make(**sections):
+        manager = DataManager({**config, **sections})
+        manager.db = InMemoryDatabase()
+        return manager
+
+    return make
+
+
+@pytest.fixture
+def memory_manager(make_memory_manager):
+    return make_memory_manager()
+
+
+@pytest.fixture
+def memory_redis():
+    return InMemoryRedis()
+
+
+@pytest.fixture
+def memory_pg_pool():
+    return InMemoryPgPool()
@@ -0,0 +1,43 @@
+"""The benchmark suite runs end to end and its in-memory stand-ins stay correct."""
+import json
+import os
+import subprocess
+import sys
+
+from contextawarerag.utils.testing import InMemoryCollection
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def test_indexed_lookups_match_a_scan():
+    collection = InMemoryCollection()
+    for i in range(50):
+        await collection.insert_one({'_id': i, 'metadata': {'product_id': f'P{i % 10}'}})
+    query = {'metadata.product_id': {'$in': ['P3', 'P7', 'missing']}}
+    scanned = await collection.find(query).to_list(None)
+
+    await collection.create_index('metadata.product_id')
+    assert await collection.find(query).to_list(None) == scanned
+    assert [doc['_id'] for doc in scanned] == [3, 7, 13, 17, 23, 27, 33, 37, 43, 47]
+
+    await collection.replace_one({'_id': 3}, {'metadata': {'product_id': 'P8'}})
+    await collection.delete_many({'_id': {'$in': [7, 13]}})
+    assert [doc['_id'] for doc in await collection.find(query).to_list(None)] == [17, 23, 27, 33, 37, 43, 47]
+    assert await collection.find_one({'metadata.product_id': 'P8', '_id': 3}) is not None
+
+
+def test_catalog_benchmark_emits_json(tmp_path):
+    output = tmp_path / 'results.json'
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, 'benchmarks', 'bench_catalog.py'),
+         '--docs', '300', '--ops', '40', '--output', str(output)],
+        check=True, cwd=ROOT, timeout=120
+    )
+    report = json.loads(output.read_text())
+    assert report['meta']['docs'] == 300
+    assert set(report['results']) == {
+        'store_rag_content', 'search_products', 'get_product_recommendations', 'get_product_data'
+    }
+    for stats in report['results'].values():
+        assert stats['ops'] == 40
+        assert 0 <= stats['p50_ms'] <= stats['p95_ms'] <= stats['p99_ms'] <= stats['max_ms']
@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+from contextawarerag.core.data.bulk import BulkWriter
+
+
+def _doc(i, category="face", **extra):
+    return {"content": f"product {i}", "content_type": "product",
+            "metadata": {"category": category, "product_id": f"P{i}"}, **extra}
+
+
+async def test_store_rag_content_many_batches_and_notifies(memory_manager):
+    seen = []
+    memory_manager.add_content_listener(seen.append)
+    collection = memory_manager.db.rag_content
+
+    results = await memory_manager.store_rag_content_many([_doc(i) for i in range(7)], batch_size=3)
+
+    assert collection.bulk_sizes == [3, 3, 1]
+    assert [r["error"] for r in results] == [None] * 7
+    assert [r["id"] for r in results] == [str(doc["_id"]) for doc in collection.docs]
+    assert len(seen) == 7
+
+
+async def test_store_rag_content_many_upserts_on_id(memory_manager):
+    async def documents():
+        yield _doc(1, _id="url-1")
+        yield _doc(2)
+        yield _doc(3, _id="url-1")
+
+    seen = []
+    memory_manager.add_content_listener(lambda doc: seen.append(doc["content"]))
+    results = await memory_manager.store_rag_content_many(documents())
+    assert [r["id"] for r in results][::2] == ["url-1", "url-1"]
+    assert [r["skipped"] for r in results] == [True, False, False]
+    assert sorted(d["content"] for d in memory_manager.db.rag_content.docs) == ["product 2", "product 3"]
+    # The superseded version never reaches listeners
+    assert sorted(seen) == ["product 2", "product 3"]
+
+
+async def test_bulk_writer_reports_per_document_errors():
+    from pymongo.errors import BulkWriteError
+
+    class RejectingCollection:
+        async def bulk_write(self, requests, ordered=True):
+            assert ordered is False
+            raise BulkWriteError({"writeErrors": [{"index": 1, "errmsg": "validation failed"}]})
+
+    async with BulkWriter(RejectingCollection()) as writer:
+        for i in range(3):
+            await writer.put(_doc(i))
+    assert [r["error"] for r in writer.results] == [None, "validation failed", None]
+    assert writer.results[1]["id"] is None and writer.results[2]["id"]
+
+
+async def test_bulk_writer_flushes_on_interval(memory_manager):
+    collection = memory_manager.db.rag_content
+    async with BulkWriter(collection, batch_size=100, flush_interval=0.01) as writer:
+        await writer.put(_doc(1))
+        await writer.put(_doc(2))
+        await asyncio.sleep(0.05)
+        assert collection.bulk_sizes == [2]
+
+
+async def test_bulk_writer_applies_backpressure():
+    release = asyncio.Event()
+
+    class SlowCollection:
+        async def bulk_write(self, requests, ordered=True):
+            await release.wait()
+
+    writer = BulkWriter(SlowCollection(), batch_size=1, flush_interval=0, max_queue=2)
+    for i in range(3):
+        # One document in flight, two queued
+        await asyncio.wait_for(writer.put(_doc(i)), 0.1)
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(writer.put(_doc(3)), 0.05)
+
+    release.set()
+    results = await writer.close()
+    assert all(r["id"] for r in results[:3])
+    assert results[3]["error"] == "cancelled before it was queued"
+
+
+async def test_failed_batch_does_not_leak_replaced_versions(memory_manager):
+    collection = memory_manager.db.rag_content
+    await memory_manager.store_rag_content_many([_doc(1, _id="url-1")])
+    bulk_write = collection.bulk_write
+
+    async def fail_once(requests, ordered=True):
+        collection.bulk_write = bulk_write
+        raise ConnectionError("connection reset")
+
+    collection.bulk_write = fail_once
+    async with memory_manager.bulk_writer(batch_size=1) as writer:
+        await writer.put(_doc(1, "hair", _id="url-1"))
+        await asyncio.sleep(0.05)
+        # Removed behind the writer's back, so the retry below is an insert
+        await collection.delete_many({"_id": "url-1"})
+        await writer.put(_doc(1, "body", _id="url-1"))
+    assert writer.results[0]["error"] == "connection reset"
+    assert writer.results[1]["error"] is None
+
+    # The failed batch's view of the face version is not applied to the retry
+    categories = (await memory_manager.get_catalog_stats())["categories"]
+    assert categories["face"]["count"] == 1
+    assert categories["body"]["count"] == 1
+    assert "hair" not in categories
@@ -0,0 +1,182 @@
+import asyncio
+
+import pytest
+from contextawarerag.core.cache import LRUCache, ResultCache, SingleFlight, normalize_query
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_lru_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("contextawarerag.core.cache.result_cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(ttl=10)
+    cache.set("a", 1)
+    now[0] += 11
+    assert cache.get("a", "gone") == "gone"
+    assert len(cache) == 0
+
+
+async def test_result_cache_tiers_and_generations(memory_redis):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return [{"content": "serum"}]
+
+    cache = ResultCache(memory_redis, generation_ttl=0)
+    params = {"query": normalize_query("  Anti-Aging   Serum "), "category": "face"}
+    assert await cache.get_or_compute("search", params, compute, ["face"]) == [{"content": "serum"}]
+    await cache.get_or_compute("search", {"query": "anti-aging serum", "category": "face"}, compute, ["face"])
+    assert len(calls) == 1
+
+    # A second process sharing Redis hits the remote tier
+    other = ResultCache(memory_redis, generation_ttl=0)
+    assert await other.get_or_compute("search", params, compute, ["face"]) == [{"content": "serum"}]
+    assert len(calls) == 1
+
+    # Writes to an unrelated category leave the entry addressable
+    await other.invalidate("hair")
+    await cache.get_or_compute("search", params, compute, ["face"])
+    assert len(calls) == 1
+
+    await other.invalidate("face")
+    await cache.get_or_compute("search", params, compute, ["face"])
+    assert len(calls) == 2
+
+
+async def test_result_cache_does_not_cache_errors():
+    cache = ResultCache()
+
+    async def fail():
+        raise RuntimeError("mongo down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_compute("search", {"query": "x"}, fail)
+
+    async def ok():
+        return ["fresh"]
+
+    assert await cache.get_or_compute("search", {"query": "x"}, ok) == ["fresh"]
+
+
+async def test_result_cache_degrades_when_redis_fails():
+    class BrokenRedis:
+        async def mget(self, keys):
+            raise ConnectionError("redis down")
+
+        async def get(self, key):
+            raise ConnectionError("redis down")
+
+        async def set(self, key, value, ex=None):
+            raise ConnectionError("redis down")
+
+    cache = ResultCache(BrokenRedis())
+
+    async def compute():
+        return [1]
+
+    assert await cache.get_or_compute("search", {"query": "x"}, compute) == [1]
+    assert len(cache.local) == 1
+
+
+async def test_search_and_recommendations_are_cached(memory_manager):
+    await memory_manager.store_rag_content("ageLOC serum", "product", {"category": "face", "product_id": "P1"})
+    chat = ChatRAGIntegration()
+    chat.rag_manager = memory_manager
+    await chat.build_search_index()
+    queries = memory_manager.db.rag_content.queries
+
+    await chat.search_products("ageLOC serum")
+    await chat.search_products("ageloc  SERUM")
+    context = {"interests": ["face", "hair"], "previous_purchases": ["P1"]}
+    await chat.get_product_recommendations(context)
+    await chat.get_product_recommendations({"interests": ["hair", "face"], "previous_purchases": ["P1"]})
+    before = len(queries)
+
+    await chat.search_products("ageloc serum")
+    await chat.get_product_recommendations(context)
+    assert len(queries) == before
+
+    # A write invalidates both through the category and global generations
+    await memory_manager.store_rag_content("ageLOC night serum", "product", {"category": "face"})
+    assert len(await chat.search_products("ageloc serum")) == 2
+    assert len(await chat.get_product_recommendations(context)) == 2
+
+
+async def test_moving_a_document_invalidates_its_old_category(memory_manager):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    def cached(category):
+        return memory_manager.cache.get_or_compute("search", {"q": "serum"}, compute, categories=[category])
+
+    await memory_manager.store_rag_content("ageLOC serum", "product", {"category": "face"}, document_id="doc-1")
+    assert await cached("face") == await cached("face") == 1
+
+    await memory_manager.store_rag_content("ageLOC serum", "product", {"category": "hair"}, document_id="doc-1")
+    assert await cached("face") == 2
+    assert await cached("hair") == await cached("hair") == 3
+    await memory_manager.store_rag_content_many([
+        {"_id": "doc-1", "content": "ageLOC serum", "content_type": "product", "metadata": {"category": "body"}}
+    ])
+    assert await cached("hair") == 4
+
+
+async def test_single_flight_shares_one_call_and_survives_cancellation():
+    flight = SingleFlight()
+    release = asyncio.Event()
+    calls = []
+
+    async def search():
+        calls.append(1)
+        await release.wait()
+        return ["hit"]
+
+    waiters = [asyncio.ensure_future(flight.do(("serum", None), search)) for _ in range(5)]
+    await asyncio.sleep(0)
+    waiters[0].cancel()
+    release.set()
+
+    assert await asyncio.gather(*waiters[1:]) == [["hit"]] * 4
+    assert len(calls) == 1 and len(flight) == 0
+
+
+async def test_single_flight_does_not_keep_errors():
+    flight = SingleFlight()
+    outcomes = [RuntimeError("down"), ["hit"]]
+
+    async def search():
+        await asyncio.sleep(0)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    results = await asyncio.gather(*(flight.do("q", search) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert await flight.do("q", search) == ["hit"]
+
+
+async def test_concurrent_identical_searches_query_once(memory_manager):
+    await memory_manager.store_rag_content("ageLOC serum", "product", {"category": "face"})
+    chat = ChatRAGIntegration()
+    chat.rag_manager = memory_manager
+    await chat.build_search_index()
+    queries = memory_manager.db.rag_content.queries
+    before = len(queries)
+
+    results = await asyncio.gather(*(chat.search_products(q) for q in ["ageLOC serum", "ageloc serum"] * 10))
+    assert all(len(r) == 1 for r in results)
+    assert len(queries) == before + 1
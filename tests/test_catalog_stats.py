@@ -0,0 +1,95 @@
+from contextawarerag.services.stats import CatalogStats, parse_price
+
+
+def _product(i, category, price, ingredients="Water, Glycerin"):
+    return {
+        "_id": f"P{i}",
+        "content": f"Product: Item {i}\nIngredients: {ingredients}",
+        "content_type": "product",
+        "metadata": {"product_id": f"P{i}", "category": category, "price": price},
+    }
+
+
+async def _store(manager, document):
+    await manager.store_rag_content(
+        document["content"], document["content_type"], document["metadata"], document["_id"]
+    )
+
+
+def test_parse_price():
+    assert parse_price("$1,049.99") == 1049.99
+    assert parse_price(12) == 12.0
+    assert parse_price("N/A") is None and parse_price(None) is None
+
+
+async def test_counts_and_bounds_follow_replacements(make_memory_manager):
+    # Stats are kept by default; a None section turns them off
+    assert make_memory_manager(stats=None).stats is None
+    manager = make_memory_manager()
+    await _store(manager, _product(1, "face", "$10.00"))
+    await _store(manager, _product(2, "face", "$30.00", "Water, Retinol"))
+    await _store(manager, _product(3, "hair", "$20.00"))
+    # Re-storing an unchanged product must not double count
+    await _store(manager, _product(3, "hair", "$20.00"))
+
+    summary = await manager.get_catalog_stats()
+    assert summary["total"] == 3
+    face = summary["categories"]["face"]
+    assert face["count"] == 2
+    assert face["price"] == {"min": 10.0, "max": 30.0, "avg": 20.0}
+    assert face["top_ingredients"][0] == ("water", 2)
+    assert summary["top_ingredients"][:2] == [("water", 3), ("glycerin", 2)]
+
+    # The cheapest face product moves to hair: face bounds are recomputed
+    await _store(manager, _product(1, "hair", "$40.00"))
+    summary = await manager.get_catalog_stats()
+    assert summary["categories"]["face"]["price"] == {"min": 30.0, "max": 30.0, "avg": 30.0}
+    assert summary["categories"]["hair"]["count"] == 2
+    assert summary["categories"]["hair"]["price"]["max"] == 40.0
+
+    # Moving the last face product away removes the category
+    await _store(manager, _product(2, "hair", "$5.00"))
+    summary = await manager.get_catalog_stats()
+    assert list(summary["categories"]) == ["hair"]
+    assert summary["categories"]["hair"]["price"]["min"] == 5.0
+
+
+async def test_bulk_writes_match_a_rebuild(make_memory_manager):
+    manager = make_memory_manager(stats={})
+    await manager.store_rag_content_many([_product(i, ("face", "hair")[i % 2], f"${i}.50") for i in range(20)])
+    # Replacements, including two versions of one product in the same batch
+    await manager.store_rag_content_many([
+        _product(4, "body", "$99.00"),
+        _product(5, "face", "$1.00"),
+        _product(5, "face", "$2.00"),
+        {"content": "Product: New", "content_type": "product", "metadata": {"category": "body"}},
+    ])
+
+    incremental = await manager.get_catalog_stats()
+    assert incremental["total"] == 21
+    assert incremental["categories"]["face"]["price"]["min"] == 0.5
+    assert incremental["categories"]["body"]["count"] == 2
+    assert incremental["categories"]["body"]["price"] == {"min": 99.0, "max": 99.0, "avg": 99.0}
+
+    assert await manager.rebuild_catalog_stats() == 21
+    assert await manager.get_catalog_stats() == incremental
+
+
+async def test_rebuild_drops_stale_categories(memory_manager):
+    db = memory_manager.db
+    stats = CatalogStats(top_ingredients=1)
+    await db.catalog_stats.insert_one({"_id": "gone", "count": 4})
+    await db.rag_content.insert_one(_product(1, None, "N/A", "Aloe"))
+
+    assert await stats.rebuild(db) == 1
+    assert await stats.summary(db) == {
+        "total": 1,
+        "top_ingredients": [("aloe", 1)],
+        "categories": {
+            "Unknown": {
+                "count": 1,
+                "price": {"min": None, "max": None, "avg": None},
+                "top_ingredients": [("aloe", 1)],
+            }
+        },
+    }
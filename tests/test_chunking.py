@@ -0,0 +1,86 @@
+import pytest
+from contextawarerag.core.processing import Chunker, WhitespaceTokenizer
+
+TEXT = " ".join(f"word{i}" for i in range(100))
+
+
+class CountingTokenizer(WhitespaceTokenizer):
+    def __init__(self):
+        self.calls = 0
+
+    def offsets(self, text):
+        self.calls += 1
+        return super().offsets(text)
+
+
+def test_chunks_overlap_and_cover_text():
+    chunker = Chunker(max_tokens=30, overlap=10, tokenizer=WhitespaceTokenizer())
+    chunks = list(chunker.chunk(TEXT))
+
+    assert [c["token_count"] for c in chunks] == [30, 30, 30, 30, 20]
+    assert all(TEXT[c["offset"]:].startswith(c["content"]) for c in chunks)
+    assert chunks[0]["content"].split()[-10:] == chunks[1]["content"].split()[:10]
+    assert chunks[-1]["content"].endswith("word99")
+
+
+def test_empty_and_short_text_yield_one_chunk():
+    chunker = Chunker(max_tokens=30, overlap=10, tokenizer=WhitespaceTokenizer())
+    assert [c["content"] for c in chunker.chunk("")] == [""]
+    assert [c["content"] for c in chunker.chunk("just a few words")] == ["just a few words"]
+    with pytest.raises(ValueError):
+        Chunker(max_tokens=10, overlap=10, tokenizer=WhitespaceTokenizer())
+
+
+def test_tokenization_is_cached_by_content():
+    tokenizer = CountingTokenizer()
+    chunker = Chunker(max_tokens=30, overlap=10, tokenizer=tokenizer)
+    list(chunker.chunk(TEXT))
+    assert chunker.count_tokens(TEXT) == 100
+    assert tokenizer.calls == 1
+
+
+def test_tiktoken_offsets_match_token_boundaries():
+    pytest.importorskip("tiktoken")
+    try:
+        chunker = Chunker(max_tokens=8, overlap=2, encoding="cl100k_base")
+    except Exception:
+        pytest.skip("tiktoken encoding unavailable")
+    if isinstance(chunker.tokenizer, WhitespaceTokenizer):
+        pytest.skip("tiktoken encoding unavailable")
+    chunks = list(chunker.chunk(TEXT))
+    assert all(c["content"] and c["token_count"] <= 8 for c in chunks)
+    assert chunks[0]["offset"] == 0 and chunks[-1]["content"].endswith("word99")
+
+
+async def test_store_rag_content_writes_chunks(make_memory_manager):
+    tokenizer = CountingTokenizer()
+    manager = make_memory_manager(chunking={'max_tokens': 30, 'overlap': 10, 'tokenizer': tokenizer})
+
+    parent_id = await manager.store_rag_content(TEXT, "product", {"category": "face"},
+                                                document_id="p1")
+    chunks = await manager.get_chunks(parent_id)
+    assert [c["chunk_index"] for c in chunks] == [0, 1, 2, 3, 4]
+    assert all(c["parent_id"] == "p1" and c["metadata"]["category"] == "face" for c in chunks)
+    assert TEXT[chunks[2]["offset"]:].startswith(chunks[2]["content"])
+
+    # Unchanged content is neither re-tokenized nor rewritten
+    writes = len(manager.db.rag_chunks.bulk_sizes)
+    await manager.store_rag_content(TEXT, "product", {"category": "face"}, document_id="p1")
+    assert tokenizer.calls == 1 and len(manager.db.rag_chunks.bulk_sizes) == writes
+
+    # Shrinking a document drops its surplus chunks
+    await manager.store_rag_content("short text", "product", {"category": "face"},
+                                    document_id="p1")
+    assert [c["content"] for c in await manager.get_chunks("p1")] == ["short text"]
+
+
+async def test_bulk_ingest_writes_chunks(make_memory_manager):
+    manager = make_memory_manager(chunking={'max_tokens': 30, 'overlap': 10,
+                                            'tokenizer': WhitespaceTokenizer()})
+    documents = [{"_id": f"p{i}", "content": TEXT, "content_type": "product",
+                  "metadata": {"category": "face"}} for i in range(3)]
+
+    await manager.store_rag_content_many(documents, batch_size=2)
+
+    assert len(manager.db.rag_chunks.docs) == 15
+    assert manager.db.rag_chunks.bulk_sizes == [10, 5]
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pytest
+from contextawarerag.services.commission import CommissionEngine, CommissionPlan, OrderColumns
+from contextawarerag.services.commission.plan import round_cents
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+END = datetime(2025, 2, 1, tzinfo=timezone.utc)
+
+PLAN = CommissionPlan(
+    tiers=[(0, 0.0), (500, 0.02), (2000, 0.05)],
+    category_rates={'skincare': 0.10, 'nutrition': 0.08},
+    default_rate=0.05
+)
+
+
+def _orders(n=200, seed=7):
+    rng = np.random.default_rng(seed)
+    categories = ['skincare', 'nutrition', 'other']
+    return [
+        (f"O{i // 3}", i % 3, f"D{rng.integers(12)}", categories[rng.integers(3)],
+         int(rng.integers(1, 5)), round(float(rng.uniform(5, 150)), 2),
+         START + timedelta(hours=int(rng.integers(24 * 40))))
+        for i in range(n)
+    ]
+
+
+def _cents(quantity, price, rate):
+    exact = quantity * Decimal(repr(price)) * Decimal(repr(rate))
+    return float(exact.quantize(Decimal('0.01'), ROUND_HALF_UP))
+
+
+def _reference(records, plan):
+    """Per-row reference implementation of the plan, in exact decimals"""
+    in_period = [r for r in records if START <= r[6] < END]
+    volumes = {}
+    for r in in_period:
+        volumes[r[2]] = volumes.get(r[2], 0.0) + r[4] * r[5]
+    expected = {}
+    for r in in_period:
+        tier_rate = [rate for threshold, rate in [(0, 0.0), (500, 0.02), (2000, 0.05)]
+                     if volumes[r[2]] >= threshold][-1]
+        rate = plan.category_rates.get(r[3], plan.default_rate)
+        expected[(r[0], r[1])] = _cents(r[4], r[5], rate) + _cents(r[4], r[5], tier_rate)
+    return expected
+
+
+def test_tiers_are_picked_by_volume():
+    assert PLAN.tier_index(np.array([0, 499.99, 500, 1999, 2000, 1e9])).tolist() == [0, 0, 1, 1, 2, 2]
+    # Net returns give negative volumes, which stay in the first tier
+    assert PLAN.tier_index(np.array([-250.0, -0.01])).tolist() == [0, 0]
+
+
+def test_round_cents_is_symmetric_and_matches_decimal():
+    values = [0.125, -0.125, 2.675, -2.675, 1.005, -1.005, 0.004, -0.004]
+    expected = [float(Decimal(repr(v)).quantize(Decimal('0.01'), ROUND_HALF_UP)) for v in values]
+    assert round_cents(np.array(values)).tolist() == expected
+
+    # Returns earn the exact negative of the sale, and totals stay in cents
+    lines = OrderColumns.from_records([('O1', 0, 'D1', 'other', 1, 10.1, START),
+                                       ('O2', 0, 'D1', 'other', -1, 10.1, START)])
+    commission = PLAN.compute(lines, volumes={'D1': 600.0})['commission']
+    assert commission.tolist() == [0.71, -0.71]
+    assert (commission == round_cents(commission)).all()
+
+
+def test_compute_uses_batch_volume_when_none_given():
+    lines = OrderColumns.from_records([
+        ('O1', 0, 'D1', 'skincare', 2, 200.0, START),
+        ('O1', 1, 'D1', 'unknown', 1, 200.0, START),
+        ('O2', 0, 'D2', 'nutrition', 1, 100.0, START),
+    ])
+    result = PLAN.compute(lines)
+    assert result['tier'].tolist() == [1, 1, 0]
+    assert result['commission'].tolist() == pytest.approx([48.0, 14.0, 8.0])
+    assert len(PLAN.compute(OrderColumns.from_records([]))['commission']) == 0
+
+
+def test_negative_volume_pays_first_tier_rate():
+    lines = OrderColumns.from_records([('O1', 0, 'D1', 'skincare', 1, 100.0, START)])
+    result = PLAN.compute(lines, volumes={'D1': -300.0})
+    assert result['tier'].tolist() == [0]
+    assert result['commission'].tolist() == pytest.approx([10.0])
+
+
+async def test_run_matches_per_row_reference(memory_pg_pool):
+    records = _orders()
+    engine = CommissionEngine(memory_pg_pool, PLAN, batch_size=64)
+    await engine.ensure_schema()
+
+    assert await engine.load_orders(records) == len(records)
+    summary = await engine.run(START, END, run_id='jan')
+
+    results = memory_pg_pool.tables['commissions']
+    expected = _reference(records, PLAN)
+    assert summary['lines'] == len(results) == len(expected)
+    assert {(r['order_id'], r['line_no']): r['commission'] for r in results} == pytest.approx(expected)
+    assert summary['commission'] == pytest.approx(sum(expected.values()))
+    assert {r['run_id'] for r in results} == {'jan'}
+    assert [size for table, size in memory_pg_pool.connection.copies if table == 'order_lines'] == \
+        [64, 64, 64, 8]
+
+
+async def test_data_manager_builds_engine_from_config(make_memory_manager, memory_pg_pool):
+    manager = make_memory_manager(commission={
+        'plan': {'tiers': [[0, 0.0], [100, 0.1]], 'default_rate': 0.05},
+        'batch_size': 10
+    })
+    manager.pg_pool = memory_pg_pool
+
+    engine = await manager.commission_engine()
+    assert engine.pool is memory_pg_pool and engine.batch_size == 10
+    assert engine.plan.tier_rates.tolist() == [0.0, 0.1]
@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import asyncpg
+import motor.motor_asyncio  # noqa: F401  drivers load lazily; keep that out of the timings
+import pytest
+import redis.asyncio  # noqa: F401
+from contextawarerag import DataManager
+from contextawarerag.core.data.data_manager import DataManagerError
+
+
+class FakePool:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_pg(monkeypatch):
+    created = []
+
+    async def create_pool(**kwargs):
+        await asyncio.sleep(0.01)
+        created.append(FakePool(**kwargs))
+        return created[-1]
+
+    monkeypatch.setattr(asyncpg, 'create_pool', create_pool)
+    return created
+
+
+def _slow_ping(delay=0.1, error=None):
+    async def ping():
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+    return ping
+
+
+async def test_initialize_connects_backends_concurrently(config, fake_pg):
+    manager = DataManager({**config, 'indexes': {'ensure': False}})
+    manager._ping_mongodb = _slow_ping()
+    manager._ping_redis = _slow_ping()
+
+    start = time.perf_counter()
+    await manager.initialize()
+
+    assert time.perf_counter() - start < 0.18
+    assert manager.db is not None and manager.cache.redis is manager.redis_client
+    # Postgres is not used at startup, so no pool is opened
+    assert manager.pg_pool is None and fake_pg == []
+    await manager.close()
+
+
+async def test_lazy_mode_opens_postgres_once_on_first_use(config, fake_pg):
+    manager = DataManager({**config, 'connections': {'eager': []}})
+    manager._ping_mongodb = manager._ping_redis = _slow_ping(error=AssertionError("pinged"))
+    await manager.initialize()
+
+    pools = await asyncio.gather(*(manager.get_pg_pool() for _ in range(5)))
+    assert len(fake_pg) == 1 and all(pool is fake_pg[0] for pool in pools)
+    assert fake_pg[0].kwargs['min_size'] == 1
+
+    await manager.close()
+    assert fake_pg[0].closed and manager.pg_pool is None and manager.db is None
+
+
+async def test_initialize_reports_failed_backends(config):
+    manager = DataManager(config)
+    manager._ping_mongodb = _slow_ping(0)
+    manager._ping_redis = _slow_ping(0, ConnectionError("redis down"))
+
+    with pytest.raises(DataManagerError, match="redis: redis down"):
+        await manager.initialize()
+    assert manager.redis_client is None and manager.mongo_client is None
+
+
+async def test_health_reports_each_backend(config):
+    async with DataManager({**config, 'connections': {'eager': []}}) as manager:
+        manager._ping_mongodb = _slow_ping(0)
+        manager._ping_redis = _slow_ping(1)
+        health = await manager.health(timeout=0.05)
+
+    assert health['mongodb']['status'] == 'ok'
+    assert health['redis']['status'] == 'error' and health['redis']['error'] == 'TimeoutError'
+    assert health['postgres'] == {"status": "not_connected", "latency_ms": None, "error": None}
+    assert manager.mongo_client is None
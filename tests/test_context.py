@@ -0,0 +1,67 @@
+from contextawarerag.core.processing import Chunker, ContextPacker, WhitespaceTokenizer
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration
+
+
+class CountingTokenizer(WhitespaceTokenizer):
+    def __init__(self):
+        self.calls = 0
+
+    def offsets(self, text):
+        self.calls += 1
+        return super().offsets(text)
+
+
+def _packer(**kwargs):
+    tokenizer = CountingTokenizer()
+    return ContextPacker(chunker=Chunker(tokenizer=tokenizer), **kwargs), tokenizer
+
+
+CANDIDATES = [
+    {"content": "ageLOC serum hydrates and firms skin", "score": 9.0},
+    {"content": "ageLOC serum hydrates and firms the skin", "score": 8.9},
+    {"content": "ageLOC serum hydrates, firms skin", "score": 8.8},
+    {"content": "Protein shake for post workout nutrition", "score": 6.0},
+]
+
+
+def test_mmr_prefers_diverse_candidates():
+    packer, _ = _packer(lambda_mult=0.5)
+    assert packer.select(CANDIDATES, k=2) == [0, 3]
+    # Pure relevance keeps the score order
+    packer, _ = _packer(lambda_mult=1.0)
+    assert packer.select(CANDIDATES, k=2) == [0, 1]
+
+
+def test_pack_respects_budget_and_truncates_last_pick():
+    long_doc = {"content": " ".join(f"word{i}" for i in range(500)), "score": 10.0}
+    packer, _ = _packer(budget=100, min_tokens=10)
+
+    packed = packer.pack([long_doc] + CANDIDATES)
+
+    assert packed["tokens"] <= 100
+    assert packer.chunker.count_tokens(packed["text"]) <= 100
+    assert packed["items"][0]["truncated"] and packed["items"][0]["token_count"] == 100
+    assert len(packed["items"]) == 1
+
+
+def test_token_counts_are_cached_by_content():
+    packer, tokenizer = _packer(budget=1000)
+    for _ in range(3):
+        packer.pack(CANDIDATES, query="ageloc serum")
+    # One tokenization per distinct content plus the separator
+    assert tokenizer.calls == len(CANDIDATES) + 1
+
+
+async def test_build_context_packs_search_results(make_memory_manager):
+    manager = make_memory_manager(chunking={'max_tokens': 64, 'overlap': 8, 'tokenizer': WhitespaceTokenizer()})
+    for candidate in CANDIDATES:
+        await manager.store_rag_content(candidate["content"], "product", {"category": "face"})
+    chat = ChatRAGIntegration({'context': {'budget': 12, 'min_tokens': 4}})
+    chat.rag_manager = manager
+    await chat.build_search_index()
+
+    packed = await chat.build_context("ageloc serum")
+
+    assert 0 < packed["tokens"] <= 12
+    assert packed["items"][0]["content"].startswith("ageLOC serum")
+    assert chat.context_packer.chunker is manager.chunker
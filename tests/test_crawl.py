@@ -0,0 +1,233 @@
+import asyncio
+import importlib.util
+import os
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from contextawarerag.core.processing import (
+    CrawlPipeline,
+    CrawlStateStore,
+    HostRateLimiter,
+    TokenBucket,
+    content_hash,
+    stable_document_id,
+)
+
+N_PRODUCTS = 12
+
+
+def _load_scraper_module():
+    path = os.path.join(os.path.dirname(__file__), os.pardir, 'scripts', 'populate_products.py')
+    spec = importlib.util.spec_from_file_location('populate_products', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+async def catalog_server():
+    in_flight = {'now': 0, 'max': 0}
+    versions = {}
+
+    async def category(request):
+        links = ''.join(f'<div class="product-tile"><a href="/product/{i}">p{i}</a></div>'
+                        for i in range(N_PRODUCTS))
+        return web.Response(text=f'<html><body>{links}</body></html>', content_type='text/html')
+
+    async def product(request):
+        in_flight['now'] += 1
+        in_flight['max'] = max(in_flight['max'], in_flight['now'])
+        try:
+            await asyncio.sleep(0.02)
+        finally:
+            in_flight['now'] -= 1
+        i = request.match_info['id']
+        version = versions.get(i, 1)
+        etag = f'"{i}-v{version}"'
+        if request.headers.get('If-None-Match') == etag:
+            return web.Response(status=304, headers={'ETag': etag})
+        # Odd products have no SKU in the markup
+        sku = f'<div data-product-id="SKU{i}"></div>' if int(i) % 2 == 0 else ''
+        return web.Response(text=(
+            f'<html><h1 class="product-name">Product {i}</h1>'
+            f'<span class="product-price">${i}.99</span>'
+            f'<div class="description">Version {version}</div>{sku}</html>'
+        ), content_type='text/html', headers={'ETag': etag})
+
+    app = web.Application()
+    app.router.add_get('/catalog/{name}', category)
+    app.router.add_get('/product/{id}', product)
+    server = TestServer(app)
+    await server.start_server()
+    server.in_flight = in_flight
+    server.versions = versions
+    yield server
+    await server.close()
+
+
+async def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=1)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(6):
+        await bucket.acquire()
+    # One token is available immediately, the other five refill at 50/s
+    assert loop.time() - start >= 0.09
+
+
+def test_host_rate_limiter_buckets_per_host():
+    limiter = HostRateLimiter(rate=2, overrides={'slow.example': 0.5})
+    assert limiter.bucket('https://a.example/x') is limiter.bucket('https://A.example/y')
+    assert limiter.bucket('https://a.example/x') is not limiter.bucket('https://b.example/x')
+    assert limiter.bucket('http://slow.example/').rate == 0.5
+
+
+async def test_pipeline_runs_concurrently_and_stops_at_limit(catalog_server):
+    stored = []
+
+    async with aiohttp.ClientSession() as session:
+        async def discover():
+            for i in range(N_PRODUCTS):
+                yield str(catalog_server.make_url(f'/product/{i}'))
+
+        async def fetch(url):
+            async with session.get(url) as response:
+                return await response.text()
+
+        async def parse(html):
+            return html if 'Product' in html else None
+
+        async def store(item):
+            stored.append(item)
+
+        pipeline = CrawlPipeline(discover, fetch, parse, store, fetch_workers=4, limit=5)
+        stats = await pipeline.run()
+
+    assert len(stored) == 5
+    assert stats['stored'] == 5
+    assert catalog_server.in_flight['max'] > 1
+
+
+async def test_pipeline_survives_stage_errors():
+    async def discover():
+        for i in range(6):
+            yield i
+
+    async def fetch(i):
+        if i == 2:
+            raise ValueError("boom")
+        return i
+
+    async def parse(i):
+        return None if i == 3 else i
+
+    stored = []
+
+    async def store(i):
+        stored.append(i)
+
+    stats = await CrawlPipeline(discover, fetch, parse, store).run()
+    assert sorted(stored) == [0, 1, 4, 5]
+    assert stats['errors'] == 1 and stats['discovered'] == 6
+
+
+async def test_scraper_recrawl_is_incremental(catalog_server, memory_manager):
+    module = _load_scraper_module()
+
+    def make_scraper():
+        scraper = module.NuSkinScraper(base_url=str(catalog_server.make_url('')).rstrip('/'),
+                                       requests_per_second=1000)
+        scraper.categories = ['/catalog/face']
+        scraper.rag_manager = memory_manager
+        scraper.crawl_state = CrawlStateStore(memory_manager.db.crawl_state)
+        return scraper
+
+    scraper = make_scraper()
+    stats = await scraper.scrape_products(limit=N_PRODUCTS)
+    docs = memory_manager.db.rag_content.docs
+    assert stats['stored'] == N_PRODUCTS and len(docs) == N_PRODUCTS
+    assert sum(doc['metadata']['product_id'].startswith('SKU') for doc in docs) == N_PRODUCTS // 2
+
+    # A fresh process reloads state, sends validators and gets 304s back
+    scraper = make_scraper()
+    await scraper.crawl_state.load()
+    stats = await scraper.scrape_products(limit=N_PRODUCTS)
+    assert stats['parsed'] == 0 and stats['stored'] == 0 and stats['unchanged'] == 0
+    assert len(memory_manager.db.rag_content.docs) == N_PRODUCTS
+
+    # A changed page is re-parsed and upserted in place, without duplicates
+    catalog_server.versions['3'] = 2
+    stats = await scraper.scrape_products(limit=N_PRODUCTS)
+    docs = memory_manager.db.rag_content.docs
+    assert stats['stored'] == 1 and len(docs) == N_PRODUCTS
+    assert sum('Version 2' in doc['content'] for doc in docs) == 1
+
+
+async def test_scraper_records_crawl_state_per_batch(catalog_server, memory_manager):
+    module = _load_scraper_module()
+    scraper = module.NuSkinScraper(base_url=str(catalog_server.make_url('')).rstrip('/'),
+                                   requests_per_second=1000, store_batch_size=4)
+    scraper.categories = ['/catalog/face']
+    scraper.rag_manager = memory_manager
+    scraper.crawl_state = CrawlStateStore(memory_manager.db.crawl_state)
+
+    recorded = []
+    record_many = scraper.crawl_state.record_many
+
+    async def spy(states):
+        states = list(states)
+        recorded.append(len(states))
+        await record_many(states)
+
+    scraper.crawl_state.record_many = spy
+    collection = memory_manager.db.rag_content
+    bulk_write, writes = collection.bulk_write, []
+
+    async def fail_third(requests, ordered=True):
+        writes.append(len(requests))
+        if len(writes) == 3:
+            raise ConnectionError("connection reset")
+        return await bulk_write(requests, ordered)
+
+    collection.bulk_write = fail_third
+    await scraper.scrape_products(limit=N_PRODUCTS)
+    # Each written batch is recorded as it lands; the failed one never is
+    assert writes == [4, 4, 4]
+    assert recorded == [4, 4, 0]
+    assert len(scraper.crawl_state) == 8 and len(collection.docs) == 8
+
+    collection.bulk_write = bulk_write
+    stats = await scraper.scrape_products(limit=N_PRODUCTS)
+    assert stats['stored'] == 4 and stats['unchanged'] == 0
+    assert len(scraper.crawl_state) == N_PRODUCTS
+
+
+async def test_crawl_state_skips_identical_content():
+    state = CrawlStateStore()
+    assert state.conditional_headers('http://x/p') == {}
+    await state.record_many([{'url': 'http://x/p', 'etag': '"a"',
+                              'last_modified': 'Wed, 01 Jan 2025 00:00:00 GMT',
+                              'content_hash': content_hash('<html/>')}])
+    assert state.conditional_headers('http://x/p') == {
+        'If-None-Match': '"a"', 'If-Modified-Since': 'Wed, 01 Jan 2025 00:00:00 GMT'
+    }
+    assert state.is_unchanged('http://x/p', content_hash('<html/>'))
+    assert not state.is_unchanged('http://x/p', content_hash('<html>new</html>'))
+    assert stable_document_id('SKU1', 'http://a') == stable_document_id('SKU1', 'http://b')
+    assert stable_document_id(None, 'http://a') != stable_document_id(None, 'http://b')
+
+
+async def test_scraper_crawls_local_server(catalog_server, memory_manager):
+    module = _load_scraper_module()
+    scraper = module.NuSkinScraper(base_url=str(catalog_server.make_url('')).rstrip('/'),
+                                   requests_per_second=1000)
+    scraper.categories = ['/catalog/face']
+    scraper.rag_manager = memory_manager
+
+    stats = await scraper.scrape_products(limit=4)
+
+    docs = memory_manager.db.rag_content.docs
+    assert stats['stored'] == 4 and len(docs) == 4
+    assert all(doc['metadata']['product_id'].startswith(('SKU', 'NSK-')) for doc in docs)
@@ -0,0 +1,37 @@
+"""Import-time budgets, so CLI and serverless entry points start fast."""
+import subprocess
+import sys
+
+import pytest
+
+DRIVERS = ('asyncpg', 'motor', 'redis', 'pymongo', 'bson', 'bs4', 'numpy')
+
+
+def _import_profile(statement):
+    """Return ``{module: self_time_us}`` for modules imported by ``statement``"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        capture_output=True, text=True, check=True
+    )
+    profile = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        profile[name.strip()] = int(self_us)
+    return profile
+
+
+@pytest.mark.parametrize('statement, budget_ms', [
+    ('import contextawarerag', 20),
+    ('from contextawarerag import DataManager', 150),
+    ('from contextawarerag.integrations.chat_integration import ChatRAGIntegration', 200),
+])
+def test_import_stays_within_budget(statement, budget_ms):
+    baseline = _import_profile('pass')
+    profile = _import_profile(statement)
+
+    loaded_drivers = sorted({name.split('.')[0] for name in profile} & set(DRIVERS))
+    assert loaded_drivers == []
+    added_ms = sum(us for name, us in profile.items() if name not in baseline) / 1000
+    assert added_ms < budget_ms
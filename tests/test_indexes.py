@@ -0,0 +1,93 @@
+from pymongo.errors import OperationFailure
+
+from contextawarerag.core.data.indexes import (INDEX_SPECS, IndexSpec, ProfiledCollection, QueryProfiler,
+                                               query_shape, reconcile_indexes)
+from contextawarerag.utils.testing import InMemoryDatabase
+
+
+async def test_reconcile_is_idempotent():
+    db = InMemoryDatabase()
+    first = await reconcile_indexes(db)
+    second = await reconcile_indexes(db)
+
+    assert sorted(first['rag_content']['created']) == [
+        'content_text', 'metadata.category_1_metadata.price_1',
+        'metadata.category_1_metadata.product_id_1', 'metadata.product_id_1', 'updated_at_1'
+    ]
+    assert first['products']['created'] == ['product_id_1']
+    assert all(not report['created'] and not report['conflicts'] for report in second.values())
+    assert sum(len(report['existing']) for report in second.values()) == len(INDEX_SPECS)
+    assert (await db.products.index_information())['product_id_1']['unique'] is True
+
+
+async def test_option_conflicts_are_reported_or_rebuilt():
+    db = InMemoryDatabase()
+    await db.products.create_index('product_id', name='legacy_product_id')
+    spec = [IndexSpec('products', [('product_id', 1)], unique=True)]
+
+    report = await reconcile_indexes(db, spec)
+    assert report['products']['conflicts'] == ['legacy_product_id']
+    assert 'unique' not in (await db.products.index_information())['legacy_product_id']
+
+    report = await reconcile_indexes(db, spec, rebuild=True)
+    assert report['products']['rebuilt'] == ['product_id_1']
+    indexes = await db.products.index_information()
+    assert 'legacy_product_id' not in indexes and indexes['product_id_1']['unique'] is True
+
+
+async def test_a_rejected_spec_does_not_block_the_others(monkeypatch):
+    db = InMemoryDatabase()
+    create_indexes = db.rag_content.create_indexes
+
+    async def reject_text(models):
+        if 'text' in models[0].document['key'].values():
+            raise OperationFailure("An equivalent index already exists with a different name")
+        return await create_indexes(models)
+
+    monkeypatch.setattr(db.rag_content, 'create_indexes', reject_text)
+    report = await reconcile_indexes(db)
+    assert report['rag_content']['conflicts'] == ['content_text']
+    assert 'content_text' not in report['rag_content']['created']
+    indexes = await db.rag_content.index_information()
+    assert 'content_text' not in indexes and 'updated_at_1' in indexes
+
+
+def test_query_shape_hides_values():
+    query = {
+        "$or": [{"metadata.category": {"$in": ["face", "hair"]}}, {"metadata.product_id": "P1"}],
+        "price": {"$gte": 10, "$lt": 50},
+    }
+    assert query_shape(query) == {
+        "$or": [{"metadata.category": {"$in": "?"}}, {"metadata.product_id": "?"}],
+        "price": {"$gte": "?", "$lt": "?"},
+    }
+
+
+async def test_profiler_flags_collection_scans_by_shape(make_memory_manager):
+    manager = make_memory_manager(profiling={'sample_rate': 1.0, 'slow_ms': 1000})
+    await manager.ensure_indexes()
+    for i in range(3):
+        await manager.store_rag_content(f"serum {i}", "product", {"category": "face", "product_id": f"P{i}"})
+
+    await manager.get_products_many(["P1", "P2"])
+    await manager.db.rag_content.find({"metadata.product_id": {"$in": ["P1"]}}).to_list(None)
+    for word in ("serum", "cream"):
+        await manager.db.rag_content.find({"content": {"$regex": word}}).to_list(None)
+    await manager.profiler.drain()
+
+    [finding] = manager.profiler.report()
+    assert finding["collection"] == "rag_content"
+    assert finding["shape"] == repr({"content": {"$regex": "?"}})
+    assert finding["reasons"] == ["collection scan"] and finding["count"] == 2
+    assert finding["docs_examined"] == 3
+
+
+async def test_profiled_database_passes_database_methods_through():
+    class Database(InMemoryDatabase):
+        async def command(self, name):
+            return {"ok": 1, "command": name}
+
+    db = QueryProfiler().wrap(Database())
+    assert await db.command("ping") == {"ok": 1, "command": "ping"}
+    assert isinstance(db.rag_content, ProfiledCollection)
+    assert db["command"] is db["command"] and isinstance(db["command"], ProfiledCollection)
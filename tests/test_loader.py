@@ -0,0 +1,74 @@
+import asyncio
+
+from contextawarerag.core.data import BatchLoader
+
+
+async def _seed(manager, n=5):
+    for i in range(n):
+        await manager.db.products.insert_one({"product_id": f"P{i}", "name": f"Product {i}", "price": i,
+                                           "benefits": ["hydrating"]})
+
+
+async def test_get_products_many_uses_one_query(memory_manager):
+    await _seed(memory_manager)
+    products = await memory_manager.get_products_many(["P1", "P3", "P1", "missing"], {"name": 1})
+
+    assert set(products) == {"P1", "P3"}
+    assert "_id" not in products["P1"]
+    assert memory_manager.db.products.queries == [{"product_id": {"$in": ["P1", "P3", "missing"]}}]
+
+
+async def test_concurrent_lookups_are_batched_and_cached(memory_manager):
+    await _seed(memory_manager)
+    ids = ["P0", "P1", "P1", "P2", "nope", "P0"]
+
+    products = await asyncio.gather(*(memory_manager.get_product_data(i) for i in ids))
+
+    assert [p.get("product_id") for p in products] == ["P0", "P1", "P1", "P2", None, "P0"]
+    assert memory_manager.db.products.queries == [{"product_id": {"$in": ["P0", "P1", "P2", "nope"]}}]
+
+    # Served from the TTL cache, and callers get their own copies
+    products[0]["name"] = "changed"
+    products[0]["benefits"].append("changed")
+    products[1]["benefits"].append("changed")
+    assert products[2]["benefits"] == ["hydrating"]
+    product = await memory_manager.get_product_data("P0")
+    assert product["name"] == "Product 0" and product["benefits"] == ["hydrating"]
+    assert len(memory_manager.db.products.queries) == 1
+
+
+async def test_cancelled_caller_does_not_cancel_batch():
+    release = asyncio.Event()
+    calls = []
+
+    async def batch_fn(keys):
+        calls.append(keys)
+        await release.wait()
+        return {key: key.upper() for key in keys}
+
+    loader = BatchLoader(batch_fn)
+    first = asyncio.ensure_future(loader.load("a"))
+    second = asyncio.ensure_future(loader.load("a"))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+
+    assert await second == "A"
+    assert calls == [["a"]]
+
+
+async def test_errors_reach_every_caller_and_are_not_cached():
+    calls = []
+
+    async def batch_fn(keys):
+        calls.append(keys)
+        if len(calls) == 1:
+            raise RuntimeError("down")
+        return {key: 1 for key in keys}
+
+    loader = BatchLoader(batch_fn, max_batch_size=2)
+    results = await asyncio.gather(*(loader.load(k) for k in "abc"), return_exceptions=True)
+    assert isinstance(results[0], RuntimeError) and isinstance(results[1], RuntimeError)
+    assert results[2] == 1 and calls[:2] == [["a", "b"], ["c"]]
+
+    assert await loader.load("a") == 1
@@ -0,0 +1,124 @@
+import json
+import logging
+import queue
+import time
+
+import pytest
+from contextawarerag.utils import logging_config
+from contextawarerag.utils.logging_config import (
+    DroppingQueueHandler,
+    RateLimitFilter,
+    SamplingFilter,
+    setup_logging,
+    shutdown_logging,
+)
+
+
+@pytest.fixture(autouse=True)
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    shutdown_logging()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+
+
+def _records(logger, filter_, n):
+    passed = []
+    for i in range(n):
+        record = logger.makeRecord(logger.name, logging.INFO, __file__, 42, f"message {i}", None, None)
+        if filter_.filter(record):
+            passed.append(record.getMessage())
+    return passed
+
+
+def test_json_output_with_extra_fields_and_exceptions(tmp_path):
+    path = tmp_path / 'app.log'
+    setup_logging({'file': str(path), 'console': False, 'json': True})
+    logger = logging.getLogger('contextawarerag.test')
+    logger.info("stored %s documents", 3, extra={'collection': 'rag_content'})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("write failed")
+    shutdown_logging()
+
+    first, second = [json.loads(line) for line in path.read_text().splitlines()]
+    assert first['message'] == 'stored 3 documents'
+    assert first['level'] == 'INFO' and first['logger'] == 'contextawarerag.test'
+    assert first['collection'] == 'rag_content'
+    assert second['message'] == 'write failed'
+    assert 'ValueError: boom' in second['exception']
+
+
+def test_file_rotates_by_size(tmp_path):
+    path = tmp_path / 'app.log'
+    setup_logging({'file': str(path), 'console': False, 'max_bytes': 500, 'backup_count': 2})
+    logger = logging.getLogger('contextawarerag.test')
+    for i in range(100):
+        logger.info(f"line {i} " + "x" * 40)
+    shutdown_logging()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['app.log', 'app.log.1', 'app.log.2']
+    assert all(p.stat().st_size <= 500 for p in tmp_path.iterdir())
+
+
+def test_slow_handlers_do_not_block_callers(tmp_path, monkeypatch):
+    written = []
+
+    def slow_emit(self, record):
+        time.sleep(0.05)
+        written.append(record.getMessage())
+
+    monkeypatch.setattr(logging.handlers.RotatingFileHandler, 'emit', slow_emit)
+    setup_logging({'file': str(tmp_path / 'app.log'), 'console': False})
+    logger = logging.getLogger('contextawarerag.test')
+
+    start = time.perf_counter()
+    for i in range(10):
+        logger.info(f"line {i}")
+    # Ten synchronous writes would take 0.5s
+    assert time.perf_counter() - start < 0.25
+    shutdown_logging()
+    assert written == [f"line {i}" for i in range(10)]
+
+
+def test_full_queue_drops_records():
+    handler = DroppingQueueHandler(queue.Queue(2))
+    logger = logging.getLogger('contextawarerag.test.queue')
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        for i in range(5):
+            logger.warning(f"line {i}")
+    finally:
+        logger.removeHandler(handler)
+        logger.propagate = True
+    assert handler.queue.qsize() == 2
+    assert handler.dropped == 3
+
+
+def test_rate_limit_is_per_call_site_and_reports_suppressed(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(logging_config.time, 'monotonic', lambda: now[0])
+    limiter = RateLimitFilter(rate=1.0, burst=2)
+    logger = logging.getLogger('contextawarerag.test')
+
+    assert _records(logger, limiter, 5) == ["message 0", "message 1"]
+    now[0] += 1.0
+    assert _records(logger, limiter, 2) == ["message 0 [3 similar messages suppressed]"]
+
+    # Errors are never throttled
+    error = logger.makeRecord(logger.name, logging.ERROR, __file__, 42, "down", None, None)
+    assert all(limiter.filter(error) for _ in range(5))
+
+
+def test_sampling_keeps_a_fraction_of_chatty_loggers():
+    sampler = SamplingFilter({'contextawarerag.test': 0.25})
+    assert len(_records(logging.getLogger('contextawarerag.test.child'), sampler, 40)) == 10
+    assert len(_records(logging.getLogger('contextawarerag.other'), sampler, 40)) == 40
+
+    warning = logging.getLogger('contextawarerag.test').makeRecord(
+        'contextawarerag.test', logging.WARNING, __file__, 1, "slow", None, None)
+    assert all(sampler.filter(warning) for _ in range(4))
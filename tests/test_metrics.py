@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration
+from contextawarerag.integrations.metrics_endpoint import metrics_handler
+from contextawarerag.utils import metrics
+from contextawarerag.utils.metrics import STAGE_ERRORS, STAGE_SECONDS, MetricsRegistry, timed, timer
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    metrics.REGISTRY.clear()
+    yield
+    metrics.configure(enabled=True)
+    metrics.REGISTRY.clear()
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry(namespace='test')
+    histogram = registry.histogram('latency_seconds', 'Latency', ('stage',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, 'mongo')
+    registry.counter('requests_total', labelnames=('path',)).inc(2, 'a"b')
+
+    assert registry.render().splitlines() == [
+        '# HELP test_latency_seconds Latency',
+        '# TYPE test_latency_seconds histogram',
+        'test_latency_seconds_bucket{stage="mongo",le="0.1"} 2',
+        'test_latency_seconds_bucket{stage="mongo",le="1.0"} 3',
+        'test_latency_seconds_bucket{stage="mongo",le="+Inf"} 4',
+        'test_latency_seconds_sum{stage="mongo"} 3.65',
+        'test_latency_seconds_count{stage="mongo"} 4',
+        '# TYPE test_requests_total counter',
+        'test_requests_total{path="a\\"b"} 2',
+    ]
+
+
+async def test_timed_records_calls_and_errors():
+    @timed('work')
+    async def work(fail=False):
+        if fail:
+            raise ValueError("boom")
+        return 1
+
+    @timed()
+    def helper():
+        return 2
+
+    assert await work() == 1
+    with pytest.raises(ValueError):
+        await work(fail=True)
+    assert helper() == 2
+    with timer('block'):
+        pass
+
+    assert STAGE_SECONDS.count('work') == 2
+    assert STAGE_ERRORS.value('work') == 1
+    assert STAGE_SECONDS.count(helper.__qualname__) == 1
+    assert STAGE_SECONDS.count('block') == 1
+
+
+async def test_disabled_metrics_record_nothing(memory_manager):
+    metrics.configure(enabled=False)
+    chat = ChatRAGIntegration()
+    chat.rag_manager = memory_manager
+    await memory_manager.store_rag_content("ageloc serum", "product", {"category": "face", "product_id": "P1"})
+    await chat.build_search_index()
+    assert await chat.search_products("serum")
+
+    assert timer('anything') is timer('other')
+    assert 'stage_duration_seconds_bucket' not in metrics.render()
+
+
+def test_environment_switch_leaves_functions_unwrapped():
+    code = (
+        "from contextawarerag.utils.metrics import timed\n"
+        "def f(): pass\n"
+        "assert timed('f')(f) is f\n"
+    )
+    subprocess.run([sys.executable, '-c', code], check=True, env={**os.environ, 'CONTEXTAWARERAG_METRICS': '0'})
+
+
+async def test_endpoint_exposes_stage_latencies(memory_manager):
+    chat = ChatRAGIntegration()
+    chat.rag_manager = memory_manager
+    await memory_manager.store_rag_content("ageloc serum", "product", {"category": "face", "product_id": "P1"})
+    await chat.build_search_index()
+    await chat.search_products("serum")
+
+    app = web.Application()
+    app.router.add_get('/metrics', metrics_handler())
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(server.make_url('/metrics')) as response:
+                assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+                body = await response.text()
+    finally:
+        await server.close()
+
+    for stage in ('store_rag_content', 'mongodb.rag_content.write', 'search_products',
+                  'search.bm25', 'mongodb.rag_content.find'):
+        assert f'contextawarerag_stage_duration_seconds_count{{stage="{stage}"}} 1' in body
+    assert 'contextawarerag_cache_lookups_total{cache="search",result="miss"} 1' in body
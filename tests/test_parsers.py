@@ -0,0 +1,69 @@
+import pytest
+from contextawarerag.core.processing import (
+    InlineExecutor,
+    ProcessPoolParseExecutor,
+    create_executor,
+    extract_product_urls,
+    parse_product_html,
+)
+
+PRODUCT_HTML = """
+<html><body>
+  <h1 class="product-name"> ageLOC Serum </h1>
+  <span class="price-sales">USD $89.50</span>
+  <div class="product-description">Visibly firmer skin.</div>
+  <ul class="key-benefits"><li>Firms</li><li>Hydrates</li></ul>
+  <div class="ingredients">Water, Glycerin</div>
+  <div data-sku="01003901"></div>
+</body></html>
+"""
+
+CATEGORY_HTML = """
+<div class="product-grid">
+  <a href="/product/ageloc-serum">Serum</a>
+  <a href="https://www.nuskin.com/product/shampoo">Shampoo</a>
+</div>
+<a href="/product/not-in-grid">Other</a>
+"""
+
+
+def test_parse_product_html():
+    product = parse_product_html(PRODUCT_HTML, "anti-aging")
+    assert product == {
+        "name": "ageLOC Serum",
+        "price": 89.5,
+        "description": "Visibly firmer skin.",
+        "benefits": ["Firms", "Hydrates"],
+        "ingredients": "Water, Glycerin",
+        "id": "01003901",
+        "category": "anti-aging",
+    }
+
+
+def test_extract_product_urls_uses_first_matching_selector():
+    assert extract_product_urls(CATEGORY_HTML, "https://www.nuskin.com") == [
+        "https://www.nuskin.com/product/ageloc-serum",
+        "https://www.nuskin.com/product/shampoo",
+    ]
+
+
+def test_lxml_backend_matches_stdlib_parser():
+    pytest.importorskip("lxml")
+    assert parse_product_html(PRODUCT_HTML, "x", "lxml") == parse_product_html(PRODUCT_HTML, "x")
+    assert (extract_product_urls(CATEGORY_HTML, "", "lxml")
+            == extract_product_urls(CATEGORY_HTML, ""))
+
+
+async def test_process_pool_executor_matches_inline():
+    pool = ProcessPoolParseExecutor(max_workers=2)
+    async with pool:
+        result = await pool.run(parse_product_html, PRODUCT_HTML, "anti-aging")
+    assert pool._pool is None
+    assert result == await InlineExecutor().run(parse_product_html, PRODUCT_HTML, "anti-aging")
+
+
+def test_create_executor():
+    assert create_executor('process').max_workers >= 1
+    assert isinstance(create_executor('inline'), InlineExecutor)
+    with pytest.raises(ValueError):
+        create_executor('gpu')
@@ -0,0 +1,73 @@
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration
+from contextawarerag.services.recommendations import CoOccurrenceRecommender
+
+
+def _recommender(**kwargs):
+    recommender = CoOccurrenceRecommender(**kwargs)
+    for item, category in [("serum", "face"), ("cleanser", "face"), ("toner", "face"),
+                           ("shampoo", "hair"), ("conditioner", "hair"), ("vitamins", "nutrition")]:
+        recommender.set_category(item, category)
+    recommender.build([
+        ["serum", "cleanser"], ["serum", "cleanser"], ["serum", "toner"],
+        ["shampoo", "conditioner"], ["shampoo", "conditioner", "serum"], ["vitamins"],
+    ])
+    return recommender
+
+
+def test_neighbors_rank_by_co_occurrence():
+    recommender = _recommender()
+    assert [item for item, _ in recommender.neighbors("serum")][:2] == ["cleanser", "toner"]
+    assert recommender.recommend(["serum"], n=2) == ["cleanser", "toner"]
+
+
+def test_purchases_update_neighbors_incrementally():
+    recommender = _recommender()
+    for _ in range(3):
+        recommender.add_basket(["serum", "vitamins"])
+    assert recommender.neighbors("serum")[0][0] == "vitamins"
+    assert recommender.neighbors("vitamins")[0][0] == "serum"
+
+
+def test_refresh_rescores_rows_of_co_purchased_items():
+    recommender = _recommender()
+    # Cleanser bought alone lowers its similarity to serum in serum's row too
+    for _ in range(4):
+        recommender.add_basket(["cleanser"])
+    rebuilt = _recommender()
+    rebuilt.build([["cleanser"]] * 4)
+    for item in ("serum", "cleanser", "toner", "shampoo"):
+        assert recommender.neighbors(item) == rebuilt.neighbors(item)
+    assert recommender.neighbors("serum")[0][0] == "toner"
+
+
+def test_interests_use_category_popularity_and_affinity():
+    recommender = _recommender(category_weight=1.0)
+    # Cold start: no purchases, only an interest
+    assert recommender.recommend(interests=["hair"], n=2) == ["shampoo", "conditioner"]
+    # Face is bought alongside hair; unrelated nutrition is not suggested
+    ranked = recommender.recommend(interests=["hair"], n=6)
+    assert ranked[2] == "serum" and "vitamins" not in ranked
+    assert "serum" not in recommender.recommend(["serum"], ["face"], n=5)
+
+
+async def test_chat_serves_ranked_recommendations(memory_manager):
+    for product_id, category in [("P1", "face"), ("P2", "face"), ("P3", "hair"), ("P4", "face")]:
+        await memory_manager.store_rag_content(f"Product {product_id}", "product",
+                                               {"category": category, "product_id": product_id})
+    for items in (["P1", "P2"], ["P1", "P2"], ["P1", "P4"]):
+        await memory_manager.db.orders.insert_one({"items": [{"product_id": i} for i in items]})
+
+    chat = ChatRAGIntegration({'recommendations': {'top_n': 10}})
+    chat.rag_manager = memory_manager
+    await chat.build_recommender()
+    queries = memory_manager.db.rag_content.queries
+    before = len(queries)
+
+    results = await chat.get_product_recommendations({"interests": [], "previous_purchases": ["P1"]})
+    assert [r["metadata"]["product_id"] for r in results] == ["P2", "P4"]
+    assert queries[before:] == [{"metadata.product_id": {"$in": ["P2", "P4"]}}]
+
+    for _ in range(3):
+        chat.record_purchase(["P1", "P3"])
+    results = await chat.get_product_recommendations({"interests": [], "previous_purchases": ["P1"]})
+    assert results[0]["metadata"]["product_id"] == "P3"
@@ -0,0 +1,73 @@
+import pytest
+from contextawarerag.core.data.data_manager import DataManagerError
+from contextawarerag.core.data.indexes import reconcile_indexes
+from contextawarerag.core.data.schema import validate_metadata
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration, price_filter
+
+
+def test_product_metadata_is_normalized():
+    assert validate_metadata("product", {"product_id": 1003, "price": "USD $1,049.99", "size": "50ml"}) == {
+        "category": "Unknown", "product_id": "1003", "price": 1049.99, "size": "50ml"
+    }
+    assert validate_metadata("product", {"category": "face", "price": ""}) == {"category": "face"}
+    assert validate_metadata("faq", {"price": 12}) == {"price": 12.0}
+    with pytest.raises(ValueError):
+        validate_metadata("product", {"price": -1})
+
+
+async def test_invalid_metadata_is_rejected(memory_manager):
+    with pytest.raises(DataManagerError, match="Invalid product metadata"):
+        await memory_manager.store_rag_content("serum", "product", {"category": ["face"]})
+
+    results = await memory_manager.store_rag_content_many([
+        {"content": "ok", "content_type": "product", "metadata": {"category": "face", "price": "$5"}},
+        {"content": "bad", "content_type": "product", "metadata": {"price": -5}},
+    ])
+    assert results[0]["error"] is None and "price" in results[1]["error"]
+    [stored] = memory_manager.db.rag_content.docs
+    assert stored["metadata"]["price"] == 5.0
+
+
+def test_price_filter():
+    assert price_filter() == {}
+    assert price_filter(10, None) == {"metadata.price": {"$gte": 10}}
+    assert price_filter(10, 50) == {"metadata.price": {"$gte": 10, "$lte": 50}}
+
+
+async def test_search_and_recommendations_filter_by_price(memory_manager):
+    await reconcile_indexes(memory_manager.db)
+    for i, (category, price) in enumerate([("face", "$12.00"), ("face", "$45.00"), ("face", "$90.00"),
+                                           ("hair", "$20.00")]):
+        await memory_manager.store_rag_content(f"ageLOC serum {i}", "product",
+                                               {"category": category, "product_id": f"P{i}", "price": price})
+    chat = ChatRAGIntegration()
+    chat.rag_manager = memory_manager
+    await chat.build_search_index()
+
+    results = await chat.search_products("ageloc serum", category="face", min_price=20, max_price=100)
+    assert sorted(r["metadata"]["product_id"] for r in results) == ["P1", "P2"]
+    results = await chat.search_products("ageloc serum", max_price=20)
+    assert sorted(r["metadata"]["product_id"] for r in results) == ["P0", "P3"]
+    # The search index filters on its price column; only the hits are fetched
+    assert all("metadata.price" not in query for query in memory_manager.db.rag_content.queries)
+    # The range lookup goes through the (category, price) index
+    explained = await memory_manager.db.rag_content.find(
+        {"metadata.category": "face", **price_filter(20, 100)}).explain()
+    assert explained["queryPlanner"]["winningPlan"]["stage"] != "COLLSCAN"
+
+    results = await chat.get_product_recommendations({"interests": ["face"], "min_price": 40})
+    assert sorted(r["metadata"]["product_id"] for r in results) == ["P1", "P2"]
+    assert "Price: $45.00" in chat.format_product_response(results)
+
+
+async def test_migrate_prices_rewrites_legacy_strings(memory_manager):
+    # Stored directly, as before prices were validated
+    for doc_id, price in [(1, "$49.99"), (2, "call us"), (3, 20.0)]:
+        await memory_manager.db.rag_content.insert_one(
+            {"_id": doc_id, "content": "serum", "metadata": {"category": "face", "price": price}})
+    assert await memory_manager.migrate_prices(batch_size=1) == 2
+    prices = {doc["_id"]: doc["metadata"].get("price") for doc in memory_manager.db.rag_content.docs}
+    assert prices == {1: 49.99, 2: None, 3: 20.0}
+    found = await memory_manager.db.rag_content.find(price_filter(min_price=0)).to_list(None)
+    assert sorted(doc["_id"] for doc in found) == [1, 3]
+    assert await memory_manager.migrate_prices() == 0
@@ -0,0 +1,102 @@
+import pytest
+from contextawarerag.core.search import BM25Index, tokenize
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration
+
+
+def test_tokenize_splits_and_drops_stopwords():
+    assert tokenize("The Anti-Aging serum, for DRY skin") == ["anti", "aging", "serum", "dry", "skin"]
+
+
+def test_bm25_ranks_by_relevance():
+    index = BM25Index()
+    index.add(1, "hydrating serum with vitamin c")
+    index.add(2, "serum serum serum anti aging serum")
+    index.add(3, "daily facial cleanser")
+
+    hits = index.search("serum", k=5)
+    assert [doc_id for doc_id, _ in hits] == [2, 1]
+    assert hits[0][1] > hits[1][1]
+    assert index.search("shampoo") == []
+
+
+def test_bm25_category_filter_and_replace():
+    index = BM25Index()
+    index.add("a", "ageLOC serum", category="anti-aging")
+    index.add("b", "ageLOC shampoo", category="hair_care")
+    assert [doc_id for doc_id, _ in index.search("ageloc", category="hair_care")] == ["b"]
+    assert len(index.search("ageloc", category="")) == 2
+
+    index.add("b", "volumizing conditioner", category="hair_care")
+    assert [doc_id for doc_id, _ in index.search("ageloc")] == ["a"]
+    assert len(index) == 2
+
+
+def test_bm25_remove_and_compact():
+    index = BM25Index(compact_ratio=1.0)
+    for i in range(200):
+        index.add(i, " ".join(["cream"] * (i % 7 + 1) + ["rare"] * (i % 13 == 0)))
+    for i in range(0, 200, 3):
+        index.remove(i)
+
+    hits = index.search("rare cream", k=200)
+    assert not any(doc_id % 3 == 0 for doc_id, _ in hits)
+    assert len(hits) == len(index)
+
+    index.compact()
+    assert sorted(d for d, _ in index.search("rare cream", k=200)) == sorted(d for d, _ in hits)
+    assert index.search("rare", k=1)[0][0] == hits[0][0]
+
+
+async def test_search_products_uses_index(memory_manager):
+    await memory_manager.store_rag_content("Nutricentials moisturizer", "product", {"category": "face"})
+    await memory_manager.store_rag_content("ageLOC serum, the best serum", "product", {"category": "anti-aging"})
+
+    chat = ChatRAGIntegration()
+    chat.rag_manager = memory_manager
+    await chat.build_search_index()
+
+    # Documents written after the build are picked up through the listener
+    await memory_manager.store_rag_content("ageLOC shampoo", "product", {"category": "hair"})
+
+    results = await chat.search_products("ageloc serum")
+    assert [r["metadata"]["category"] for r in results] == ["anti-aging", "hair"]
+    assert not any("$regex" in str(q) for q in memory_manager.db.rag_content.queries)
+
+    results = await chat.search_products("ageloc", category="hair")
+    assert [r["content"] for r in results] == ["ageLOC shampoo"]
+
+
+async def test_catch_up_indexes_writes_from_other_processes(make_memory_manager):
+    manager = make_memory_manager()
+    chat = ChatRAGIntegration({**manager.config, 'index_refresh': {'margin': 0}})
+    chat.rag_manager = manager
+    await chat.build_search_index()
+    assert await chat.search_products("conditioner", category="hair") == []
+
+    # Another worker, sharing the database but not the in-process listeners
+    other = make_memory_manager()
+    other.db = manager.db
+    await other.store_rag_content("repair conditioner", "product", {"category": "hair"}, document_id="doc-1")
+    assert await chat.search_products("conditioner", category="hair") == []
+
+    assert await chat.catch_up() == 1
+    # The stale empty result cached above is invalidated with the index update
+    results = await chat.search_products("conditioner", category="hair")
+    assert [r["content"] for r in results] == ["repair conditioner"]
+
+
+def test_price_range_filter():
+    index = BM25Index()
+    index.add_document({"_id": 1, "content": "serum", "metadata": {"price": 12.0}})
+    index.add_document({"_id": 2, "content": "serum", "metadata": {"price": 45.0}})
+    index.add_document({"_id": 3, "content": "serum", "metadata": {"price": "N/A"}})
+    # Legacy string prices are parsed, not dropped from ranges
+    index.add_document({"_id": 4, "content": "serum", "metadata": {"price": "$49.99"}})
+    assert {doc_id for doc_id, _ in index.search("serum", min_price=20)} == {2, 4}
+    assert {doc_id for doc_id, _ in index.search("serum", max_price=12)} == {1}
+    assert len(index.search("serum")) == 4
+
+    index.remove(1)
+    index.compact()
+    restored = BM25Index.from_state(index.doc_ids, *index.state())
+    assert restored.search("serum", max_price=50) == index.search("serum", max_price=50)
@@ -0,0 +1,90 @@
+import numpy as np
+from contextawarerag.core.cache import SemanticCache
+from contextawarerag.core.vectorstore import HashingEmbedder
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration
+
+
+def test_paraphrases_hit_and_unrelated_queries_miss():
+    cache = SemanticCache()
+    cache.set("anti aging serum", "serum answer", category="face")
+
+    assert cache.get("anti-aging serums", category="face") == "serum answer"
+    assert cache.get("anti aging cream", category="face") is None
+    assert cache.get("protein shake", category="face") is None
+    # Entries are scoped to their category
+    assert cache.get("anti aging serum", category="hair") is None
+
+
+def test_near_misses_do_not_hit():
+    cache = SemanticCache()
+    pairs = [("vitamin c serum", "vitamin e serum"),
+             ("products under 50 dollars", "products under 20 dollars"),
+             ("anti aging serum for men", "anti aging serum for women")]
+    for cached, query in pairs:
+        cache.set(cached, cached)
+        assert cache.get(query) is None, query
+        assert cache.get(cached.upper()) == cached
+
+
+def test_lru_and_ttl_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("contextawarerag.core.cache.semantic.time.monotonic", lambda: now[0])
+    cache = SemanticCache(maxsize=2, ttl=10)
+    cache.set("ageloc serum", 1)
+    cache.set("protein shake", 2)
+    cache.get("ageloc serum")
+    cache.set("shampoo for dry hair", 3)
+
+    assert cache.get("protein shake") is None
+    assert cache.get("ageloc serum") == 1 and len(cache) == 2
+    now[0] += 11
+    assert cache.get("ageloc serum") is None and len(cache) == 0
+
+
+def test_invalidate_drops_category_and_unscoped_entries():
+    cache = SemanticCache()
+    cache.set("ageloc serum", "face", category="face")
+    cache.set("shampoo", "hair", category="hair")
+    cache.set("best sellers", "any")
+
+    cache.invalidate("face")
+
+    assert cache.get("ageloc serum", category="face") is None
+    assert cache.get("best sellers") is None
+    assert cache.get("shampoo", category="hair") == "hair"
+
+    # An empty category is the unscoped one
+    cache.set("gift sets", "any", category="")
+    assert cache.get("gift sets") == "any"
+    cache.invalidate("hair")
+    assert cache.get("gift sets", category="") is None
+
+
+def test_vectors_are_normalized_for_any_embedder():
+    cache = SemanticCache(embedder=HashingEmbedder(dim=64))
+    assert np.isclose(np.linalg.norm(cache.embed("ageloc serum")), 1.0)
+
+
+async def test_chat_reuses_answers_for_similar_questions(memory_manager):
+    await memory_manager.store_rag_content("ageLOC anti-aging serum for firmer skin", "product",
+                                           {"category": "face"})
+    chat = ChatRAGIntegration({'semantic_cache': {'threshold': 0.75}})
+    chat.rag_manager = memory_manager
+    await chat.build_search_index()
+    chat.build_semantic_cache()
+    prompts = []
+
+    async def generate(query, context):
+        prompts.append(context)
+        return f"answer {len(prompts)}"
+
+    first = await chat.answer_query("anti aging serum", generate, category="face")
+    second = await chat.answer_query("anti-aging serums", generate, category="face")
+    assert not first["cached"] and second["cached"]
+    assert second["answer"] == "answer 1" and len(prompts) == 1
+    assert "ageLOC" in prompts[0]
+
+    # New content in the category invalidates the cached answer
+    await memory_manager.store_rag_content("ageLOC night serum", "product", {"category": "face"})
+    third = await chat.answer_query("anti-aging serums", generate, category="face")
+    assert not third["cached"] and len(prompts) == 2
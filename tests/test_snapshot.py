@@ -0,0 +1,102 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+from bson import ObjectId
+from contextawarerag.core.search import BM25Index
+from contextawarerag.core.snapshot import Snapshot, SnapshotWriter
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration
+
+DOCS = [
+    {"_id": ObjectId(), "content": "ageLOC anti-aging serum", "content_type": "product",
+     "metadata": {"category": "face", "product_id": "P1", "price": 89.5},
+     "updated_at": datetime(2026, 1, 2, 3, 4, 5, 678000)},
+    {"_id": "doc-2", "content": "volumizing shampoo for fine hair", "content_type": "product",
+     "metadata": {"category": "hair", "product_id": "P2", "price": "call us"}, "source": "crawl"},
+    {"_id": 3, "content": "serum serum night cream", "metadata": {"url": "https://example.com/3"}},
+]
+
+
+def _write(path, docs=DOCS, **options):
+    with SnapshotWriter(str(path), **options) as writer:
+        for doc in docs:
+            writer.add(doc)
+    return Snapshot(str(path))
+
+
+def test_round_trip_and_search_from_mapped_arrays(tmp_path):
+    snapshot = _write(tmp_path / "snap")
+    assert len(snapshot) == 3
+    assert list(snapshot.documents()) == DOCS
+    assert isinstance(snapshot.prices, np.memmap)
+    assert np.isnan(snapshot.prices[1]) and snapshot.prices[0] == 89.5
+
+    live = BM25Index()
+    for doc in DOCS:
+        live.add_document(doc)
+    index = snapshot.search_index()
+    for query, category in [("serum", None), ("serum", "face"), ("hair shampoo", None)]:
+        assert index.search(query, category=category) == live.search(query, category=category)
+
+    # Writes after loading copy only the touched postings out of the mapped arrays
+    index.add("doc-4", "serum for hair", "hair")
+    index.remove(3)
+    assert [doc_id for doc_id, _ in index.search("serum")] == ["doc-4", DOCS[0]["_id"]]
+    snapshot.close()
+
+
+def test_vectors_are_streamed_to_a_mappable_array(tmp_path):
+    vectors = np.random.default_rng(0).normal(size=(len(DOCS), 8)).astype(np.float32)
+    with SnapshotWriter(str(tmp_path / "snap"), dim=8) as writer:
+        for doc, vector in zip(DOCS, vectors):
+            writer.add(doc, vector)
+    stored = np.load(str(tmp_path / "snap" / "embeddings.npy"), mmap_mode="r")
+    assert stored.shape == (3, 8) and stored.dtype == np.float32
+    np.testing.assert_allclose(stored, vectors / np.linalg.norm(vectors, axis=1, keepdims=True), rtol=1e-6)
+
+    with SnapshotWriter(str(tmp_path / "empty"), dim=8):
+        pass
+    assert np.load(str(tmp_path / "empty" / "embeddings.npy")).shape == (0, 8)
+
+
+def test_failed_export_keeps_previous_snapshot(tmp_path):
+    path = tmp_path / "snap"
+    _write(path, DOCS[:1]).close()
+    with pytest.raises(RuntimeError):
+        with SnapshotWriter(str(path)) as writer:
+            writer.add(DOCS[1])
+            raise RuntimeError("scan failed")
+    assert [doc["_id"] for doc in Snapshot(str(path)).documents()] == [DOCS[0]["_id"]]
+
+    _write(path, DOCS[1:]).close()
+    assert len(Snapshot(str(path))) == 2
+    assert os.listdir(tmp_path) == ["snap"]
+
+
+async def test_load_snapshot_catches_up_on_newer_documents(make_memory_manager, tmp_path):
+    manager = make_memory_manager()
+    sections = {'vectorstore': {'embedder': {'dim': 64}}, 'snapshot': {'path': str(tmp_path / "snap"),
+                                                                       'catch_up_margin': 0}}
+    for i, category in enumerate(["face", "hair"]):
+        await manager.store_rag_content(f"ageLOC serum {category}", "product", {"category": category},
+                                        document_id=f"doc-{i}")
+    chat = ChatRAGIntegration({**manager.config, **sections})
+    chat.rag_manager = manager
+    await chat.build_search_index()
+    manifest = await chat.export_snapshot()
+    assert manifest['count'] == 2 and manifest['dim'] == 64
+
+    await manager.store_rag_content("repair conditioner", "product", {"category": "hair"}, document_id="doc-2")
+    replica = ChatRAGIntegration({**manager.config, **sections})
+    replica.rag_manager = manager
+    manager.db.rag_content.queries.clear()
+    await replica.load_snapshot()
+
+    # Only the catch-up query touched rag_content
+    assert manager.db.rag_content.queries == [{"updated_at": {"$gte": replica.snapshot.watermark}}]
+    assert len(replica.search_index) == len(replica.vector_index) == 3
+    assert [r["content"] for r in await replica.search_products("conditioner")] == ["repair conditioner"]
+    results = await replica.semantic_search("serum", category="face", k=1)
+    assert results[0]["content"] == "ageLOC serum face"
+    await replica.close()
@@ -0,0 +1,178 @@
+import os
+
+import pytest
+from bson import ObjectId
+from contextawarerag import DataManager
+from contextawarerag.core.storage import EmbeddedBackend, create_backend
+from contextawarerag.core.storage.embedded import EmbeddedCollection
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration
+
+
+def _segments(path):
+    return sorted(name for name in os.listdir(path) if name.endswith('.seg'))
+
+
+async def test_embedded_collection_survives_reopen(tmp_path):
+    path = str(tmp_path / 'rag_content')
+    collection = EmbeddedCollection(path)
+    await collection.create_index([('metadata.product_id', 1)])
+    inserted = await collection.insert_one({"content": "serum", "metadata": {"product_id": "P1", "price": 10.0}})
+    await collection.replace_one({"_id": "p2"}, {"content": "cream", "metadata": {"product_id": "P2"}}, upsert=True)
+    await collection.update_one({"_id": "p2"}, {"$set": {"metadata.price": 25.0}})
+    await collection.insert_one({"_id": "p3", "content": "gone", "metadata": {"product_id": "P3"}})
+    await collection.delete_many({"_id": "p3"})
+    collection.close()
+
+    reopened = EmbeddedCollection(path)
+    assert isinstance(inserted.inserted_id, ObjectId)
+    assert len(reopened) == 2
+    assert (await reopened.find_one({"_id": inserted.inserted_id}))["content"] == "serum"
+    docs = await reopened.find({"metadata.price": {"$gte": 20}}, {"metadata.price": 1}).to_list(None)
+    assert docs == [{"_id": "p2", "metadata": {"price": 25.0}}]
+
+    explained = await reopened.find({"metadata.product_id": {"$in": ["P2", "P3"]}}).explain()
+    assert explained["queryPlanner"]["winningPlan"]["inputStage"]["stage"] == "IXSCAN"
+    assert explained["executionStats"]["totalDocsExamined"] == 1
+    reopened.close()
+
+
+async def test_torn_tail_is_truncated_and_segments_roll(tmp_path):
+    path = str(tmp_path / 'docs')
+    collection = EmbeddedCollection(path, segment_bytes=200)
+    for i in range(6):
+        await collection.insert_one({"_id": i, "text": "x" * 40})
+    collection.close()
+    segments = _segments(path)
+    assert len(segments) > 1
+
+    # A crash mid-write leaves a partial record at the end of the last segment
+    with open(os.path.join(path, segments[-1]), 'ab') as f:
+        f.write(b'P\x40\x00\x00\x00partial')
+    reopened = EmbeddedCollection(path, segment_bytes=200)
+    assert [doc["_id"] for doc in await reopened.find().to_list(None)] == list(range(6))
+    await reopened.insert_one({"_id": 6, "text": "after"})
+    assert (await reopened.find_one({"_id": 6}))["text"] == "after"
+    reopened.close()
+
+
+async def test_compaction_keeps_live_documents(tmp_path):
+    path = str(tmp_path / 'docs')
+    collection = EmbeddedCollection(path, compact_ratio=10.0)
+    for round_ in range(5):
+        for i in range(20):
+            await collection.replace_one({"_id": i}, {"round": round_}, upsert=True)
+    await collection.delete_many({"_id": {"$in": [0, 1]}})
+
+    assert collection.compact() > 0
+    assert len(_segments(path)) == 1
+    assert [doc["round"] for doc in await collection.find().to_list(None)] == [4] * 18
+    collection.close()
+    assert len(EmbeddedCollection(path)) == 18
+
+
+async def test_data_manager_runs_on_the_embedded_backend(tmp_path):
+    config = {'storage': {'backend': 'embedded', 'path': str(tmp_path)}, 'connections': {'eager': ['mongodb']}}
+    async with DataManager(config) as manager:
+        assert isinstance(manager.storage, EmbeddedBackend) and manager.mongo_client is None
+        for i, category in enumerate(["face", "face", "hair"]):
+            await manager.store_rag_content(f"ageLOC serum {i}", "product",
+                                            {"category": category, "product_id": f"P{i}", "price": f"${i}0"},
+                                            document_id=f"doc-{i}")
+        assert (await manager.health())['mongodb']['status'] == 'ok'
+        with pytest.raises(RuntimeError, match="open in another process"):
+            create_backend(config)
+
+    async with DataManager(config) as manager:
+        # Indexes were reconciled on the first start and persisted
+        assert 'metadata.category_1_metadata.price_1' in await manager.db.rag_content.index_information()
+        chat = ChatRAGIntegration(config)
+        chat.rag_manager = manager
+        await chat.build_search_index()
+        results = await chat.search_products("ageloc serum", category="face", min_price=5)
+        assert [r["metadata"]["product_id"] for r in results] == ["P1"]
+
+
+async def test_query_semantics_match_mongo(tmp_path):
+    from pymongo import DeleteOne, InsertOne, UpdateMany
+
+    collection = EmbeddedCollection(str(tmp_path / 'docs'))
+    await collection.create_index([('tags', 1)])
+    await collection.insert_one({"_id": 1, "tags": ["serum", "face"], "price": 10.0})
+    await collection.insert_one({"_id": 2, "tags": ["shampoo"], "category": "hair"})
+    await collection.insert_one({"_id": 3, "tags": [], "category": "hair"})
+
+    async def ids(query):
+        return [doc["_id"] for doc in await collection.find(query).to_list(None)]
+
+    # Conditions on arrays match any element, through the index or a scan
+    assert await ids({"tags": "serum"}) == [1]
+    assert await ids({"tags": {"$in": ["face", "shampoo"]}}) == [1, 2]
+    assert await ids({"category": {"$ne": "hair"}}) == [1]
+    assert await ids({"price": {"$exists": False}}) == [2, 3]
+    assert await ids({"tags": {"$size": 0}}) == [3]
+    with pytest.raises(NotImplementedError, match=r"\$elemMatch"):
+        await ids({"tags": {"$elemMatch": {"$eq": "serum"}}})
+
+    # replace_one replaces only the first match and keeps filter fields out
+    result = await collection.replace_one({"category": "hair"}, {"tags": ["conditioner"]})
+    assert result.matched_count == 1
+    assert await collection.find_one({"_id": 2}) == {"_id": 2, "tags": ["conditioner"]}
+    assert await ids({"category": "hair"}) == [3]
+    await collection.replace_one({"sku": "S9"}, {"tags": []}, upsert=True)
+    upserted = await collection.find_one({"sku": "S9"})
+    assert upserted["tags"] == []
+
+    await collection.bulk_write([UpdateMany({"tags": {"$size": 0}}, {"$set": {"empty": True}}),
+                                 DeleteOne({"_id": 1})])
+    assert await ids({"empty": True}) == [3, upserted["_id"]]
+    assert await collection.find_one({"_id": 1}) is None
+    with pytest.raises(NotImplementedError, match="Unsupported bulk write request"):
+        await collection.bulk_write([InsertOne({"_id": 9}), object()])
+    assert await collection.find_one({"_id": 9}) is None
+    collection.close()
+
+
+async def test_unique_indexes_are_enforced(tmp_path):
+    from pymongo import InsertOne, ReplaceOne
+    from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+    collection = EmbeddedCollection(str(tmp_path / 'products'))
+    await collection.insert_one({"_id": 1, "product_id": "P1"})
+    await collection.create_index([('product_id', 1)], unique=True)
+    with pytest.raises(DuplicateKeyError):
+        await collection.insert_one({"_id": 2, "product_id": "P1"})
+    with pytest.raises(DuplicateKeyError):
+        await collection.insert_one({"_id": 1, "product_id": "P2"})
+    # Replacing a document with its own key is not a duplicate
+    await collection.replace_one({"_id": 1}, {"product_id": "P1", "name": "serum"})
+
+    with pytest.raises(BulkWriteError) as error:
+        await collection.bulk_write([InsertOne({"_id": 3, "product_id": "P1"}),
+                                     ReplaceOne({"_id": 4}, {"product_id": "P4"}, upsert=True)], ordered=False)
+    assert [e["index"] for e in error.value.details["writeErrors"]] == [0]
+    assert await collection.count_documents({}) == 2
+
+    # Both documents lack sku, which a unique index sees as two nulls unless it is sparse
+    with pytest.raises(DuplicateKeyError):
+        await collection.create_index([('sku', 1)], unique=True)
+    await collection.create_index([('sku', 1)], unique=True, sparse=True)
+    with pytest.raises(NotImplementedError, match="Unsupported unique index"):
+        await collection.create_index([('product_id', 1), ('name', 1)], unique=True)
+    collection.close()
+
+
+async def test_file_io_runs_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+
+    from pymongo import DeleteOne
+
+    backend = EmbeddedBackend(str(tmp_path))
+    collection = backend.database.docs
+    threads = []
+    monkeypatch.setattr(collection, '_commit', lambda: threads.append(threading.current_thread().name))
+    await collection.insert_one({"_id": 1})
+    await collection.update_one({"_id": 1}, {"$set": {"a": 1}})
+    await collection.bulk_write([DeleteOne({"_id": 1})])
+    assert len(threads) == 3 and not any(name == threading.current_thread().name for name in threads)
+    assert await backend.compact() >= 0
+    await backend.close()
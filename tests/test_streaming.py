@@ -0,0 +1,144 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from contextawarerag.integrations.chat_integration import (NO_PRODUCTS_MESSAGE, SEARCH_ERROR_MESSAGE,
+                                                           ChatRAGIntegration)
+from contextawarerag.integrations.streaming import ERROR_TEXT, search_stream_handler, stream_text
+
+
+class SlowCursorCollection:
+    """Wraps a collection so its cursors yield one document per ``delay``"""
+
+    def __init__(self, collection, delay=0.01):
+        self.collection = collection
+        self.delay = delay
+        self.yielded = 0
+
+    def find(self, *args, **kwargs):
+        return self._iterate(self.collection.find(*args, **kwargs))
+
+    async def _iterate(self, cursor):
+        async for doc in cursor:
+            await asyncio.sleep(self.delay)
+            self.yielded += 1
+            yield doc
+
+
+async def _chat(memory_manager):
+    # Inserted least relevant first, so the cursor returns them out of rank order
+    for i, text in enumerate(["serum", "ageloc serum", "ageloc serum ageloc"]):
+        await memory_manager.store_rag_content(text, "product", {"category": "face", "product_id": f"P{i}"})
+    chat = ChatRAGIntegration()
+    chat.rag_manager = memory_manager
+    await chat.build_search_index()
+    return chat
+
+
+async def test_stream_matches_formatted_response_in_rank_order(memory_manager):
+    chat = await _chat(memory_manager)
+
+    blocks = [block async for block in chat.stream_search_response("ageloc serum")]
+
+    assert "".join(blocks) == chat.format_product_response(await chat.search_products("ageloc serum"))
+    assert [b.split("\n")[0] for b in blocks[1:]] == ["🔹 P2", "🔹 P1", "🔹 P0"]
+    assert [b async for b in chat.stream_search_response("nothing here")] == [NO_PRODUCTS_MESSAGE]
+
+
+async def test_first_block_is_sent_before_retrieval_finishes(memory_manager):
+    chat = await _chat(memory_manager)
+    slow = SlowCursorCollection(memory_manager.db.rag_content)
+    memory_manager.db._collections['rag_content'] = slow
+
+    stream = chat.stream_search_response("serum")
+    assert (await stream.__anext__()).startswith("Here are")
+    first = await stream.__anext__()
+    # The top hit is the first document off the cursor, so it is sent
+    # before the remaining documents have been read
+    assert first.startswith("🔹 P0") and slow.yielded == 1
+    assert len([block async for block in stream]) == 2 and slow.yielded == 3
+
+
+async def test_streams_share_the_search_cache(memory_manager):
+    chat = await _chat(memory_manager)
+    queries = memory_manager.db.rag_content.queries
+
+    streamed = [block async for block in chat.stream_search_response("ageloc serum")]
+    fetches = len(queries)
+    # Cached once the stream finished: neither a search nor another stream refetches
+    assert chat.format_product_response(await chat.search_products("ageloc serum")) == "".join(streamed)
+    assert [block async for block in chat.stream_search_response("ageLOC  serum")] == streamed
+    assert len(queries) == fetches
+
+    # Concurrent streams and searches share one fetch
+    async def stream():
+        return "".join([block async for block in chat.stream_search_response("serum")])
+
+    memory_manager.cache.local.clear()
+    results, *streams = await asyncio.gather(chat.search_products("serum"), stream(), stream(), stream())
+    assert len(queries) == fetches + 1
+    assert streams == [chat.format_product_response(results)] * 3
+
+
+async def test_a_failing_fetch_ends_the_stream_with_an_error(memory_manager):
+    chat = await _chat(memory_manager)
+
+    class FailingCollection:
+        def find(self, *args, **kwargs):
+            return self._iterate()
+
+        async def _iterate(self):
+            raise ConnectionError("mongo down")
+            yield
+
+    memory_manager.db._collections['rag_content'] = FailingCollection()
+    assert [block async for block in chat.stream_search_response("serum")] == [SEARCH_ERROR_MESSAGE]
+
+
+async def _serve(handler):
+    app = web.Application()
+    app.router.add_get('/', handler)
+    server = TestServer(app)
+    await server.start_server()
+    return server
+
+
+async def test_stream_text_ends_with_error_text_and_closes_chunks():
+    closed = []
+
+    async def chunks():
+        try:
+            yield "partial"
+            raise RuntimeError("backend failed")
+        finally:
+            closed.append(True)
+
+    async def handler(request):
+        return await stream_text(request, chunks())
+
+    server = await _serve(handler)
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(server.make_url('/')) as response:
+                body = await response.text()
+    finally:
+        await server.close()
+    assert body == "partial" + ERROR_TEXT and closed == [True]
+
+
+async def test_aiohttp_handler_streams_chunks(memory_manager):
+    chat = await _chat(memory_manager)
+    app = web.Application()
+    app.router.add_get('/search', search_stream_handler(chat))
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(server.make_url('/search'), params={'q': 'ageloc serum'}) as response:
+                assert response.headers['Transfer-Encoding'] == 'chunked'
+                body = await response.text()
+    finally:
+        await server.close()
+
+    assert body == chat.format_product_response(await chat.search_products("ageloc serum"))
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from bson import ObjectId
+from contextawarerag.core.vectorstore import HashingEmbedder, VectorIndex, load_embedder
+from contextawarerag.integrations.chat_integration import ChatRAGIntegration
+
+
+def test_hashing_embedder_is_deterministic_and_normalized():
+    embedder = HashingEmbedder(dim=64)
+    vectors = embedder.embed(["anti aging serum", "anti-aging serums", "volumizing shampoo"])
+    assert vectors.dtype == np.float32
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert np.array_equal(vectors[0], HashingEmbedder(dim=64).embed_one("anti aging serum"))
+    assert vectors[0] @ vectors[1] > vectors[0] @ vectors[2]
+
+
+def test_load_embedder_specs():
+    assert load_embedder(None).dim == 384
+    assert load_embedder({'type': 'hashing', 'dim': 32}).dim == 32
+    embedder = HashingEmbedder(dim=8)
+    assert load_embedder(embedder) is embedder
+
+
+def test_vector_index_topk_blocks_and_filters():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 16)).astype(np.float32)
+    index = VectorIndex(16, capacity=4, block_size=64)
+    for start in range(0, 500, 100):
+        index.add(list(range(start, start + 100)), vectors[start:start + 100],
+                  ["even" if i % 2 == 0 else "odd" for i in range(start, start + 100)])
+
+    queries = vectors[[7, 42]]
+    results = index.search(queries, k=3)
+    assert [hits[0][0] for hits in results] == [7, 42]
+    assert results[0][0][1] == pytest.approx(1.0, abs=1e-5)
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ normalized[42]))[:3]
+    assert [doc_id for doc_id, _ in results[1]] == list(expected)
+
+    assert all(doc_id % 2 == 1 for doc_id, _ in index.search(queries[0], k=5, category="odd")[0])
+    assert index.search(queries[0], k=5, category="") == index.search(queries[0], k=5)
+    index.remove(7)
+    assert 7 not in [doc_id for doc_id, _ in index.search(queries[0], k=5)[0]]
+
+    # Re-adding a removed id reuses its slot
+    index.add([7], vectors[[7]], ["odd"])
+    assert len(index.matrix) == 500
+    assert [doc_id for doc_id, _ in index.search(queries[0], k=500)[0]].count(7) == 1
+
+
+def test_vector_index_save_and_mmap_load(tmp_path):
+    embedder = HashingEmbedder(dim=32)
+    ids = [ObjectId() for _ in range(3)]
+    index = VectorIndex(32)
+    index.add(ids, embedder.embed(["serum", "shampoo", "cleanser"]), ["face", "hair", "face"])
+    path = str(tmp_path / "vectors")
+    index.save(path)
+    index.save(path)
+
+    loaded = VectorIndex.load(path)
+    assert isinstance(loaded.matrix, np.memmap)
+    assert loaded.search(embedder.embed_one("shampoo"), k=1)[0][0][0] == ids[1]
+
+    # Writes copy the shared matrix instead of touching the file
+    loaded.add(["new"], embedder.embed(["conditioner"]), ["hair"])
+    assert not isinstance(loaded.matrix, np.memmap)
+    assert len(loaded) == 4
+    assert len(VectorIndex.load(path)) == 3
+
+
+async def test_semantic_search_builds_and_updates(memory_manager, tmp_path):
+    await memory_manager.store_rag_content("ageLOC anti-aging serum", "product", {"category": "anti-aging"})
+    await memory_manager.store_rag_content("volumizing shampoo", "product", {"category": "hair"})
+
+    chat = ChatRAGIntegration({**memory_manager.config,
+                               'vectorstore': {'embedder': {'dim': 64}, 'path': str(tmp_path / "v")}})
+    chat.rag_manager = memory_manager
+    await chat.build_vector_index()
+    chat.save_vector_index()
+
+    await memory_manager.store_rag_content("repair conditioner for dry hair", "product", {"category": "hair"})
+    results = await chat.semantic_search("anti aging serums")
+    assert results[0]["metadata"]["category"] == "anti-aging"
+    results = await chat.semantic_search("conditioner", category="hair", k=1)
+    assert results[0]["content"] == "repair conditioner for dry hair"
+
+    # Reloading from disk only embeds the document written after the save
+    await chat.build_vector_index()
+    assert len(chat.vector_index) == 3